@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Futures style helper for overlapping pure python work, e.g. reading a schedule,
+with Revit API work on the main thread.
+The Revit API must only be called from the main thread, never from the background call.
+"""
+import sys
+import threading
+import timeit
+
+
+class BackgroundCall(object):
+    """
+    Runs func(*args, **kwargs) on a worker thread, result() joins it
+    and returns its return value or re-raises its exception.
+    """
+    def __init__(self, name, func, *args, **kwargs):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.seconds = None
+        self.wait_seconds = None
+        self._result = None
+        self._exc_info = None
+        self._finished = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="vrph_{}".format(name))
+        self.thread.daemon = True
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    @property
+    def saved_seconds(self):
+        """
+        Wall-clock seconds saved against running the call on the main thread.
+        :return:
+        """
+        if self.seconds is None or self.wait_seconds is None:
+            return None
+        return self.seconds - self.wait_seconds
+
+    @property
+    def error(self):
+        """
+        The exception the call raised, None while running or on success.
+        :return:
+        """
+        return self._exc_info[1] if self._exc_info else None
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """
+        Waits for the call to finish without retrieving its result, returns False on timeout.
+        :param timeout: seconds, None waits without limit
+        :return:
+        """
+        return self._finished.wait(timeout)
+
+    def _run(self):
+        start = timeit.default_timer()
+        try:
+            self._result = self.func(*self.args, **self.kwargs)
+        except BaseException:
+            self._exc_info = sys.exc_info()
+        finally:
+            self.seconds = timeit.default_timer() - start
+            self._finished.set()
+
+    def result(self, timeout=None, verbose=True):
+        """
+        Waits for the call to finish and retrieves its return value.
+        :param timeout: seconds, None waits without limit
+        :param verbose: prints the timing
+        :return:
+        """
+        start = timeit.default_timer()
+        if not self._finished.wait(timeout):
+            raise RuntimeError("background call {} did not finish within {}s".format(self.name, timeout))
+        if self.wait_seconds is None:
+            self.wait_seconds = timeit.default_timer() - start
+            if verbose:
+                self.print_timing()
+        if self._exc_info:
+            raise self._exc_info[1].with_traceback(self._exc_info[2])
+        return self._result
+
+    def print_timing(self):
+        print("INFO: {} ran {:.3f}s in background, waited {:.3f}s, saved {:.3f}s wall-clock".format(
+            self.name,
+            self.seconds,
+            self.wait_seconds,
+            self.saved_seconds,
+        ))
+
+
+def run_in_background(name, func, *args, **kwargs):
+    """
+    Starts func(*args, **kwargs) on a worker thread.
+    :param name: shown in timing output
+    :param func:
+    :param args:
+    :param kwargs:
+    :return: the started BackgroundCall
+    """
+    return BackgroundCall(name, func, *args, **kwargs).start()
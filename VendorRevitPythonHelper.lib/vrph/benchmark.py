@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Fakes and benchmarks of the schedule reading in vrph.mpp, runnable without mpxj
+on plain CPython, e.g. benchmark.benchmark_schedule_sources().
+"""
+import gc
+import importlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+
+from vrph import mpp, mspdi, tabular
+
+
+class FakeLocalDateTime(object):
+    """
+    Stand-in for a java LocalDateTime, to test and benchmark without mpxj.
+    Counts its native calls in call_count.
+    """
+    call_count = 0
+
+    def __init__(self, year, month, day, hour=8):
+        self.year = year
+        self.month = month
+        self.day = day
+        self.text = "{:04d}-{:02d}-{:02d}T{:02d}:00".format(year, month, day, hour)
+
+    def getYear(self):
+        FakeLocalDateTime.call_count += 1
+        return self.year
+
+    def getMonthValue(self):
+        FakeLocalDateTime.call_count += 1
+        return self.month
+
+    def getDayOfMonth(self):
+        FakeLocalDateTime.call_count += 1
+        return self.day
+
+    def __str__(self):
+        # like IKVM, the java toString() is only reachable as the .net ToString()
+        FakeLocalDateTime.call_count += 1
+        return self.text
+
+
+def benchmark_date_conversion(task_count=20000, distinct_date_count=300, repeat=3):
+    """
+    Micro-benchmark of the per-task date conversion cost:
+    legacy per-part conversion versus memoised and batch conversion.
+    Uses FakeLocalDateTime: inside Revit every native call additionally
+    crosses the .net/java boundary, so the call count is the dominant cost there.
+    :param task_count:
+    :param distinct_date_count:
+    :param repeat:
+    :return: dict of microseconds per task by method
+    """
+    def legacy_conversion(task_date):
+        day   = str(task_date.getDayOfMonth()).zfill(2)
+        month = str(task_date.getMonthValue()).zfill(2)
+        year  = str(task_date.getYear())
+        return int("{}{}{}".format(year[-2:], month, day))
+
+    distinct_dates = [FakeLocalDateTime(*row.start) for row in mspdi.iter_fixture_rows(distinct_date_count)]
+    task_dates = [distinct_dates[i % distinct_date_count] for i in range(task_count)]
+    methods = (
+        ("legacy", lambda: [legacy_conversion(task_date) for task_date in task_dates]),
+        ("memoised", lambda: [mpp.get_date_truncated_iso_short(task_date) for task_date in task_dates]),
+        ("batch", lambda: mpp.convert_dates_truncated_iso_short(task_dates)),
+    )
+    micro_seconds_per_task_by_method = {}
+    for name, method in methods:
+        FakeLocalDateTime.call_count = 0
+        best = min(timeit.repeat(method, number=1, repeat=repeat))
+        calls_per_task = FakeLocalDateTime.call_count / float(task_count * repeat)
+        micro_seconds_per_task_by_method[name] = best / task_count * 1000000
+        print("{:<10} {:8.3f} us/task {:4.1f} native calls/task".format(
+            name, micro_seconds_per_task_by_method[name], calls_per_task,
+        ))
+    return micro_seconds_per_task_by_method
+
+
+class FakeJavaInteger(object):
+    """
+    Stand-in for a java Integer.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def intValue(self):
+        return self.value
+
+
+class FakeMpxjTask(object):
+    """
+    Stand-in for a mpxj Task, to test and benchmark the conversion without mpxj.
+    """
+    def __init__(self, unique_id, task_id, name, start, finish, texts):
+        self.unique_id = FakeJavaInteger(unique_id)
+        self.task_id = FakeJavaInteger(task_id)
+        self.name = name
+        self.start = start
+        self.finish = finish
+        self.texts = texts
+
+    def getUniqueID(self):
+        return self.unique_id
+
+    def getID(self):
+        return self.task_id
+
+    def getName(self):
+        return self.name
+
+    def getStart(self):
+        return self.start
+
+    def getFinish(self):
+        return self.finish
+
+    def getText(self, text_number):
+        return self.texts.get(text_number)
+
+
+def get_fake_mpxj_tasks(task_count):
+    """
+    Generates FakeMpxjTask of the fixture rows of mspdi.iter_fixture_rows.
+    :param task_count:
+    :return:
+    """
+    return [
+        FakeMpxjTask(
+            unique_id=row.uid,
+            task_id=row.id,
+            name=row.name,
+            start=FakeLocalDateTime(*row.start),
+            finish=FakeLocalDateTime(*row.finish, hour=17),
+            texts=row.texts,
+        )
+        for row in mspdi.iter_fixture_rows(task_count)
+    ]
+
+
+def benchmark_mpxj_task_conversion(task_count=20000, repeat=3):
+    """
+    Micro-benchmark of per task conversion versus bulk conversion of mpxj tasks,
+    for full Task rows and for SheetInfo rows, on FakeMpxjTask.
+    :param task_count:
+    :param repeat:
+    :return: dict of microseconds per task by method
+    """
+    fake_tasks = get_fake_mpxj_tasks(task_count)
+    getters = mpp.DETACHED_MPXJ_FIELD_GETTERS
+    methods = (
+        ("task",            lambda tasks: [mpp.convert_mpxj_task_to_task(task, detached=True) for task in tasks]),
+        ("task bulk",       lambda tasks: mpp.convert_tasks_bulk(tasks, getters=getters)),
+        ("sheet_info",      lambda tasks: [mpp.convert_mpxj_task_to_sheet_info(task, detached=True) for task in tasks]),
+        ("sheet_info bulk", lambda tasks: mpp.convert_tasks_bulk(tasks, mpp.SheetInfo._fields, getters, mpp.SheetInfo)),
+    )
+    micro_seconds_per_task_by_method = {}
+    for name, method in methods:
+        best = min(timeit.repeat(lambda: method(fake_tasks), number=1, repeat=repeat))
+        converted, calls_per_task = mpp.count_native_calls(method, fake_tasks[:1000])
+        micro_seconds_per_task_by_method[name] = best / task_count * 1000000
+        print("{:<16} {:8.3f} us/task {:4.1f} native calls/task".format(
+            name, micro_seconds_per_task_by_method[name], calls_per_task,
+        ))
+    return micro_seconds_per_task_by_method
+
+
+def get_fixture_records(row_count):
+    """
+    Generates task records of the fixture rows of mspdi.iter_fixture_rows,
+    keyed by the DEFAULT_COLUMN_BY_FIELD columns.
+    :param row_count:
+    :return:
+    """
+    for row in mspdi.iter_fixture_rows(row_count):
+        record = {
+            "id": row.id,
+            "name": row.name,
+            "start_date": "{:04d}-{:02d}-{:02d}".format(*row.start),
+            "end_date": "{:04d}-{:02d}-{:02d}".format(*row.finish),
+            "unique_id": row.uid,
+        }
+        for text_number, value in row.texts.items():
+            record[mpp.TASK_FIELD_NAME_BY_ID[text_number]] = value
+        yield record
+
+
+def benchmark_schedule_sources(row_count=100000, fixture_dir=None):
+    """
+    Benchmarks reading a row_count fixture with every pure python schedule source,
+    without caches.
+    :param row_count:
+    :param fixture_dir: default a temporary directory, removed afterwards
+    :return: dict of seconds by source name
+    """
+    temp_dir = None
+    if fixture_dir is None:
+        fixture_dir = temp_dir = tempfile.mkdtemp(prefix="vrph_sources_")
+    columns = list(mpp.DEFAULT_COLUMN_BY_FIELD.values())
+    fixture_writers = (
+        ("mspdi", "fixture.xml", lambda path: mspdi.write_mspdi_fixture(path, row_count)),
+        ("csv", "fixture.csv", lambda path: tabular.write_csv_fixture(path, get_fixture_records(row_count), columns)),
+        ("jsonl", "fixture.jsonl", lambda path: tabular.write_jsonl_fixture(path, get_fixture_records(row_count))),
+    )
+    seconds_by_source = {}
+    try:
+        for source_name, file_name, write_fixture in fixture_writers:
+            fixture_path = write_fixture(os.path.join(str(fixture_dir), file_name))
+            started = timeit.default_timer()
+            tasks = mpp.read_tasks(fixture_path, source_name, use_sidecar_cache=False, use_session_cache=False)
+            seconds_by_source[source_name] = timeit.default_timer() - started
+            print("{:<6} {:8.3f}s {:10.0f} rows/s {} rows".format(
+                source_name, seconds_by_source[source_name],
+                len(tasks) / seconds_by_source[source_name], len(tasks),
+            ))
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return seconds_by_source
+
+
+def _get_allocated_bytes():
+    gc.collect()
+    try:
+        from System import GC
+    except ImportError:
+        GC = None
+    if GC is not None:
+        return GC.GetTotalMemory(True)
+    # not available on IronPython, imported on the CPython path only
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure_retained_memory(mpp_path, backend=None):
+    """
+    Measures the memory retained by the converted tasks of a schedule file,
+    with native references and detached. On .net the managed heap is measured,
+    on CPython the python heap via tracemalloc.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :return: dict with retained bytes per mode and the task count
+    """
+    retained_by_mode = {}
+    task_count = 0
+    for mode, detached in (("attached", False), ("detached", True)):
+        baseline = _get_allocated_bytes()
+        tasks = list(mpp.iter_tasks(mpp_path, backend, detached=detached))
+        retained_by_mode[mode] = _get_allocated_bytes() - baseline
+        task_count = len(tasks)
+        del tasks
+    retained_by_mode["task_count"] = task_count
+    print("INFO: retained memory of {} tasks: attached {attached} bytes, detached {detached} bytes".format(
+        task_count, **retained_by_mode
+    ))
+    return retained_by_mode
+
+
+def benchmark_mpxj_readers(mpp_paths, repeat=1):
+    """
+    Benchmarks parse time and retained memory of the universal against
+    the trimmed mpxj reader, e.g. on the largest schedules. Needs mpxj.
+    :param mpp_paths:
+    :param repeat:
+    :return: dict of (seconds, retained bytes) by (mpp_path, reader)
+    """
+    results = {}
+    for mpp_path in mpp_paths:
+        for name, reader_options in (
+                ("universal", mpp.UNIVERSAL_MPXJ_READER_OPTIONS),
+                ("trimmed", mpp.TRIMMED_MPXJ_READER_OPTIONS)):
+            best_seconds = None
+            retained_bytes = None
+            for _ in range(repeat):
+                baseline = _get_allocated_bytes()
+                started = timeit.default_timer()
+                project = mpp.mpxj_backend.read_project(mpp_path, reader_options)
+                seconds = timeit.default_timer() - started
+                retained_bytes = _get_allocated_bytes() - baseline
+                task_count = project.getTasks().size()
+                del project
+                if best_seconds is None or seconds < best_seconds:
+                    best_seconds = seconds
+            results[(str(mpp_path), name)] = best_seconds, retained_bytes
+            print("{:<10} {:8.3f}s {:12d} bytes {:6d} tasks {}".format(
+                name, best_seconds, retained_bytes, task_count, mpp_path,
+            ))
+    return results
+
+
+def benchmark_designation_matching(pattern_count=20000, lookup_count=2000, repeat=3):
+    """
+    Micro-benchmark of designation pattern lookups: DesignationTrie versus a scan
+    over all patterns, the latter on a tenth of the lookups only.
+    Patterns are zone prefixes "Z0001-*", sub zone wildcards "Z0001-?1" and exact designations.
+    :param pattern_count:
+    :param lookup_count:
+    :param repeat:
+    :return: dict of microseconds per lookup by method
+    """
+    def get_specificity(pattern):
+        return [
+            0 if char == mpp.DESIGNATION_ANY_SUFFIX and i == len(pattern) - 1
+            else 1 if char == mpp.DESIGNATION_ANY_CHAR
+            else 2
+            for i, char in enumerate(pattern)
+        ]
+
+    def scan_match(designation):
+        matching = []
+        for pattern, compiled in compiled_patterns:
+            if compiled.match(designation):
+                matching.append(pattern)
+        return max(matching, key=get_specificity) if matching else None
+
+    patterns = []
+    for i in range(pattern_count):
+        zone = "Z{:04d}".format(i // 3)
+        patterns.append(("{}-*", "{}-?1", "{}-101")[i % 3].format(zone))
+    compiled_patterns = [
+        (pattern, re.compile(re.escape(pattern).replace(r"\?", ".").replace(r"\*", ".*") + "$"))
+        for pattern in patterns
+    ]
+    trie = mpp.DesignationTrie((pattern, pattern) for pattern in patterns)
+    designations = ["Z{:04d}-{}".format(i % (pattern_count // 3), (101, 201, 305)[i % 3]) for i in range(lookup_count)]
+    scan_designations = designations[:max(1, lookup_count // 10)]
+    for designation in scan_designations:
+        matched = trie.match(designation)
+        if (matched and matched[0]) != scan_match(designation):
+            raise RuntimeError("trie and scan differ on: '{}'".format(designation))
+    methods = (
+        ("scan", scan_designations, scan_match),
+        ("trie", designations, trie.match),
+    )
+    micro_seconds_per_lookup_by_method = {}
+    for name, method_designations, match in methods:
+        best = min(timeit.repeat(lambda: [match(designation) for designation in method_designations],
+                                 number=1, repeat=repeat))
+        micro_seconds_per_lookup_by_method[name] = best / len(method_designations) * 1000000
+        print("{:<10} {:12.3f} us/lookup over {} patterns".format(
+            name, micro_seconds_per_lookup_by_method[name], len(trie),
+        ))
+    return micro_seconds_per_lookup_by_method
+
+
+def _time_fresh_import(module_name, eager=False):
+    """
+    Times a fresh import of a module, the loaded module and its package attribute are restored after.
+    :param module_name: e.g. vrph.mpp
+    :param eager: also load the mpxj assemblies, as it was done on import before
+    :return: seconds
+    """
+    package_name, _, attribute_name = module_name.rpartition(".")
+    package = sys.modules[package_name]
+    loaded_module = sys.modules.pop(module_name)
+    try:
+        started = timeit.default_timer()
+        fresh_module = importlib.import_module(module_name)
+        if eager:
+            fresh_module.mpxj_backend.load()
+        return timeit.default_timer() - started
+    finally:
+        sys.modules[module_name] = loaded_module
+        setattr(package, attribute_name, loaded_module)
+
+
+def benchmark_import_time():
+    """
+    Measures how long `import vrph.mpp` takes with deferred assembly loading
+    and with the mpxj assemblies loaded on import, as it was done before.
+    Loaded assemblies stay loaded in the process, so run this in a fresh engine
+    before any schedule was read to get a meaningful eager time.
+    :return: dict of seconds by mode, eager is None without mpxj
+    """
+    deferred_seconds = _time_fresh_import(mpp.__name__)
+    try:
+        eager_seconds = _time_fresh_import(mpp.__name__, eager=True)
+    except ImportError:
+        eager_seconds = None
+    print("import vrph.mpp deferred: {:.3f}s".format(deferred_seconds))
+    if eager_seconds is not None:
+        print("import vrph.mpp eager   : {:.3f}s".format(eager_seconds))
+    return {"deferred": deferred_seconds, "eager": eager_seconds}
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Headless command line interface on schedule files and snapshots,
+e.g. on plain CPython: python -m vrph.cli stats 20240101.xml, python -m vrph.mpp runs it as well
+"""
+import sys
+import timeit
+
+from vrph import mpp, snapshot
+
+
+def _print_task_rows(rows, fields):
+    print("\t".join(fields))
+    for row in rows:
+        print("\t".join(str(getattr(row, name)) for name in fields))
+
+
+def _get_cli_fields(fields_text):
+    fields = tuple(name.strip() for name in fields_text.split(",") if name.strip())
+    unknown_fields = [name for name in fields if name not in mpp.TaskTable.FIELDS]
+    if unknown_fields:
+        raise ValueError(", ".join(unknown_fields))
+    return fields
+
+
+def main(argv=None):
+    """
+    Headless command line interface on snapshots or any schedule file readable
+    without Revit, e.g. on plain CPython: python -m vrph.cli stats 20240101.xml
+    :param argv:
+    :return: exit code
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m vrph.cli", description="vrph schedule tool")
+    parser.add_argument("--backend", default=None, help="schedule source, default by extension")
+    commands = parser.add_subparsers(dest="command")
+    dump_parser = commands.add_parser("dump", help="print the task rows")
+    dump_parser.add_argument("schedule_path")
+    dump_parser.add_argument("--start", type=int, default=0)
+    dump_parser.add_argument("--limit", type=int, default=None)
+    dump_parser.add_argument("--fields", type=_get_cli_fields, default=mpp.TaskTable.FIELDS,
+                              help="comma separated, e.g. id,designation")
+    stats_parser = commands.add_parser("stats", help="print row, designation and date statistics")
+    stats_parser.add_argument("schedule_path")
+    export_parser = commands.add_parser("export", help="export a schedule file into a snapshot")
+    export_parser.add_argument("schedule_path")
+    export_parser.add_argument("-o", "--output", default=None, help="default next to the schedule file")
+    query_parser = commands.add_parser("query", help="print the task rows of a designation")
+    query_parser.add_argument("schedule_path")
+    query_parser.add_argument("designation")
+    query_parser.add_argument("--fields", type=_get_cli_fields, default=mpp.TaskTable.FIELDS,
+                              help="comma separated, e.g. id,designation")
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        return 2
+    if args.command == "export":
+        print("exported: {}".format(snapshot.export_task_snapshot(args.schedule_path, args.output, args.backend)))
+        return 0
+    started = timeit.default_timer()
+    table = snapshot.open_task_table(args.schedule_path, args.backend)
+    load_seconds = timeit.default_timer() - started
+    if args.command == "dump":
+        stop = None if args.limit is None else args.start + args.limit
+        _print_task_rows(table[args.start:stop], args.fields)
+    elif args.command == "query":
+        if isinstance(table, snapshot.TaskSnapshot):
+            rows = table.find_rows("designation", args.designation)
+        else:
+            rows = [row for row in table if row.designation == args.designation]
+        _print_task_rows(rows, args.fields)
+        print("{} rows".format(len(rows)))
+    elif args.command == "stats":
+        dates = [date for name in mpp.TaskTable.DATE_FIELDS for date in table.codes(name) if date]
+        print("rows:         {}".format(len(table)))
+        print("strings:      {}".format(len(table.strings)))
+        print("designations: {}".format(len(set(table.codes("designation")) - {0, -1})))
+        print("sheet_numbers:{}".format(len(set(table.codes("sheet_number")) - {0, -1})))
+        print("dates:        {} - {}".format(min(dates) if dates else "", max(dates) if dates else ""))
+        print("loaded in:    {:.4f}s".format(load_seconds))
+    if isinstance(table, snapshot.TaskSnapshot):
+        table.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Schedule diff: the tasks added, removed and changed between two schedule versions.
+"""
+import collections
+import operator
+
+from vrph import mpp
+
+
+# fields compared by the schedule diff: id is the row number and changes on any insert
+DIFF_COMPARE_FIELDS = (
+    "name",
+    "designation",
+    "start_date",
+    "end_date",
+    "sheet_number",
+    "task_type",
+    "zone_name",
+    "version_number",
+    "version_date",
+)
+DIFF_KEY_FIELDS_BY_UNIQUE_ID = ("unique_id",)
+DIFF_KEY_FIELDS_BY_DESIGNATION = ("designation", "task_type")
+
+
+TaskChange = collections.namedtuple(
+    typename="TaskChange",
+    field_names=[
+        "key",
+        "old_task",
+        "new_task",
+        "changed_fields",
+    ],
+)
+
+
+class ScheduleDiff(object):
+    """
+    Structured difference between two schedule versions: added, removed and changed tasks.
+    """
+    def __init__(self, added, removed, changed, unchanged_count):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.unchanged_count = unchanged_count
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def _get_affected(self, field_name):
+        affected = set()
+        for task in self.added + self.removed:
+            affected.add(getattr(task, field_name))
+        for change in self.changed:
+            affected.add(getattr(change.old_task, field_name))
+            affected.add(getattr(change.new_task, field_name))
+        affected.discard("")
+        return affected
+
+    @property
+    def affected_designations(self):
+        return self._get_affected("designation")
+
+    @property
+    def affected_sheet_numbers(self):
+        return self._get_affected("sheet_number")
+
+    def print_summary(self, verbose=False):
+        print("schedule diff: {} added, {} removed, {} changed, {} unchanged tasks".format(
+            len(self.added), len(self.removed), len(self.changed), self.unchanged_count,
+        ))
+        if verbose:
+            for task in self.added:
+                print("added:   {}".format(task))
+            for task in self.removed:
+                print("removed: {}".format(task))
+            for change in self.changed:
+                print("changed: {} {}".format(change.key, ", ".join(
+                    "{}: {} -> {}".format(name, getattr(change.old_task, name), getattr(change.new_task, name))
+                    for name in change.changed_fields
+                )))
+
+
+def _get_tasks_by_diff_key(tasks, key_fields):
+    """
+    Maps tasks by their diff key, repeated keys are told apart by their occurrence.
+    :param tasks:
+    :param key_fields:
+    :return:
+    """
+    get_key = operator.attrgetter(*key_fields)
+    tasks_by_key = collections.OrderedDict()
+    occurrences_by_key = collections.Counter()
+    for task in tasks:
+        key = get_key(task)
+        occurrence = occurrences_by_key[key]
+        occurrences_by_key[key] += 1
+        if occurrence:
+            key = (key, occurrence)
+        tasks_by_key[key] = task
+    return tasks_by_key
+
+
+def diff_tasks(old_tasks, new_tasks, key_fields=DIFF_KEY_FIELDS_BY_UNIQUE_ID, compare_fields=DIFF_COMPARE_FIELDS):
+    """
+    Computes the ScheduleDiff between two task lists in linear time.
+    :param old_tasks:
+    :param new_tasks:
+    :param key_fields: fields identifying a task across versions,
+                       DIFF_KEY_FIELDS_BY_UNIQUE_ID or DIFF_KEY_FIELDS_BY_DESIGNATION
+    :param compare_fields:
+    :return:
+    """
+    old_tasks_by_key = _get_tasks_by_diff_key(old_tasks, key_fields)
+    new_tasks_by_key = _get_tasks_by_diff_key(new_tasks, key_fields)
+    get_compared = operator.attrgetter(*compare_fields)
+    added = []
+    changed = []
+    unchanged_count = 0
+    for key, new_task in new_tasks_by_key.items():
+        old_task = old_tasks_by_key.get(key)
+        if old_task is None:
+            added.append(new_task)
+            continue
+        if get_compared(old_task) == get_compared(new_task):
+            unchanged_count += 1
+            continue
+        changed_fields = tuple(
+            name for name in compare_fields if getattr(old_task, name) != getattr(new_task, name)
+        )
+        changed.append(TaskChange(key=key, old_task=old_task, new_task=new_task, changed_fields=changed_fields))
+    removed = [task for key, task in old_tasks_by_key.items() if key not in new_tasks_by_key]
+    return ScheduleDiff(added=added, removed=removed, changed=changed, unchanged_count=unchanged_count)
+
+
+def diff_schedules(old_mpp_path, new_mpp_path, backend=None, key_fields=DIFF_KEY_FIELDS_BY_UNIQUE_ID,
+                   compare_fields=DIFF_COMPARE_FIELDS):
+    """
+    Computes the ScheduleDiff between two schedule files, e.g. the latest and the previous dated one.
+    :param old_mpp_path:
+    :param new_mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param key_fields:
+    :param compare_fields:
+    :return:
+    """
+    return diff_tasks(
+        mpp.read_tasks(old_mpp_path, backend),
+        mpp.read_tasks(new_mpp_path, backend),
+        key_fields=key_fields,
+        compare_fields=compare_fields,
+    )
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Schedule history: the date timeline of the designations and sheet numbers
+over the dated schedules of each lot.
+"""
+import bisect
+import collections
+import json
+import os
+
+from vrph import mpp
+
+
+SCHEDULE_HISTORY_VERSION = 2
+SCHEDULE_HISTORY_FILE_NAME = ".vrph_schedule_history.json"
+
+
+TaskVersion = collections.namedtuple(
+    typename="TaskVersion",
+    field_names=[
+        "iso_date",
+        "start_date",
+        "end_date",
+    ],
+)
+
+
+class ScheduleHistory(object):
+    """
+    Timeline of the start and end dates per designation and per sheet number
+    over the dated schedule versions of each lot, see get_schedule_lot.
+    Only changes are recorded: a TaskVersion per schedule in which the dates
+    differ from the previous schedule of the same lot,
+    with None dates from the schedule on where the task disappeared from its lot.
+    """
+    def __init__(self):
+        # lot: {(task_type, designation): [TaskVersion]}
+        self.versions_by_designation_by_lot = {}
+        # lot: {sheet_number: [TaskVersion]}
+        self.versions_by_sheet_number_by_lot = {}
+        # file name: [iso_date, size, mtime] of the ingested schedule files
+        self.signature_by_file_name = {}
+
+    @property
+    def lots(self):
+        return sorted({mpp.get_schedule_lot(name) for name in self.signature_by_file_name})
+
+    def get_latest_ingest_key(self, lot=""):
+        """
+        Retrieves (iso_date, file name) of the latest ingested schedule of a lot.
+        :param lot:
+        :return: ("", "") if none of the lot was ingested
+        """
+        ingest_keys = [
+            (signature[0], name) for name, signature in self.signature_by_file_name.items()
+            if mpp.get_schedule_lot(name) == lot
+        ]
+        return max(ingest_keys) if ingest_keys else ("", "")
+
+    def add_schedule(self, iso_date, tasks, mpp_path):
+        """
+        Records the dates of a schedule version, which has to be newer than the ingested ones of its lot.
+        :param iso_date:
+        :param tasks:
+        :param mpp_path:
+        :return:
+        """
+        file_name = os.path.basename(str(mpp_path))
+        lot = mpp.get_schedule_lot(file_name)
+        latest_ingest_key = self.get_latest_ingest_key(lot)
+        if (iso_date, file_name) <= latest_ingest_key:
+            raise ValueError("schedule {} is not newer than the history {}".format(file_name, latest_ingest_key))
+        dates_by_designation = {}
+        dates_by_sheet_number = {}
+        for task in tasks:
+            if task.designation:
+                dates_by_designation[(mpp.get_normalized_task_type(task.task_type), task.designation)] = (
+                    task.start_date, task.end_date,
+                )
+            if task.sheet_number:
+                dates_by_sheet_number[task.sheet_number] = task.start_date, task.end_date
+        self._record(self.versions_by_designation_by_lot.setdefault(lot, {}), dates_by_designation, iso_date)
+        self._record(self.versions_by_sheet_number_by_lot.setdefault(lot, {}), dates_by_sheet_number, iso_date)
+        self.signature_by_file_name[file_name] = [iso_date] + list(mpp.get_file_signature(mpp_path))
+
+    def remove_lot(self, lot):
+        """
+        Forgets all versions and ingested schedules of a lot, e.g. to rebuild it.
+        :param lot:
+        :return:
+        """
+        self.versions_by_designation_by_lot.pop(lot, None)
+        self.versions_by_sheet_number_by_lot.pop(lot, None)
+        for name in list(self.signature_by_file_name):
+            if mpp.get_schedule_lot(name) == lot:
+                del self.signature_by_file_name[name]
+
+    @staticmethod
+    def _record(versions_by_key, dates_by_key, iso_date):
+        for key, dates in dates_by_key.items():
+            versions = versions_by_key.setdefault(key, [])
+            if not versions or tuple(versions[-1][1:]) != dates:
+                versions.append(TaskVersion(iso_date, *dates))
+        for key, versions in versions_by_key.items():
+            if key not in dates_by_key and versions[-1].start_date is not None:
+                versions.append(TaskVersion(iso_date, None, None))
+
+    def get_designation_versions(self, designation, task_type="construction", lot=""):
+        """
+        Retrieves the TaskVersion timeline of a designation task in the schedules of a lot, e.g.
+        [TaskVersion("20230102", 230301, 230630), TaskVersion("20230410", 230315, 230630)]
+        :param designation:
+        :param task_type: matched accent- and case-insensitive
+        :param lot: e.g. "LOT2", "" for schedules without lot
+        :return:
+        """
+        versions_by_designation = self.versions_by_designation_by_lot.get(lot, {})
+        return versions_by_designation.get((mpp.get_normalized_task_type(task_type), designation), [])
+
+    def get_sheet_number_versions(self, sheet_number, lot=""):
+        """
+        Retrieves the TaskVersion timeline of a sheet number task in the schedules of a lot.
+        :param sheet_number:
+        :param lot: e.g. "LOT2", "" for schedules without lot
+        :return:
+        """
+        return self.versions_by_sheet_number_by_lot.get(lot, {}).get(sheet_number, [])
+
+    def to_json(self):
+        return {
+            "version": SCHEDULE_HISTORY_VERSION,
+            "signature_by_file_name": self.signature_by_file_name,
+            "designations": [
+                [lot, task_type, designation, [list(version) for version in versions]]
+                for lot, versions_by_designation in self.versions_by_designation_by_lot.items()
+                for (task_type, designation), versions in versions_by_designation.items()
+            ],
+            "sheet_numbers": [
+                [lot, sheet_number, [list(version) for version in versions]]
+                for lot, versions_by_sheet_number in self.versions_by_sheet_number_by_lot.items()
+                for sheet_number, versions in versions_by_sheet_number.items()
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, content):
+        history = cls()
+        history.signature_by_file_name = content["signature_by_file_name"]
+        for lot, task_type, designation, versions in content["designations"]:
+            versions_by_designation = history.versions_by_designation_by_lot.setdefault(lot, {})
+            versions_by_designation[(task_type, designation)] = [TaskVersion(*v) for v in versions]
+        for lot, sheet_number, versions in content["sheet_numbers"]:
+            versions_by_sheet_number = history.versions_by_sheet_number_by_lot.setdefault(lot, {})
+            versions_by_sheet_number[sheet_number] = [TaskVersion(*v) for v in versions]
+        return history
+
+
+def get_task_version_on(versions, iso_date):
+    """
+    Retrieves the TaskVersion valid in the schedule of given iso short date, None before the first.
+    :param versions: TaskVersion timeline
+    :param iso_date: e.g. "20230410"
+    :return:
+    """
+    index = bisect.bisect_right([version.iso_date for version in versions], iso_date)
+    if index == 0:
+        return None
+    return versions[index - 1]
+
+
+def get_task_moves(versions):
+    """
+    Retrieves when and from what dates a task moved.
+    :param versions: TaskVersion timeline
+    :return: list of (previous TaskVersion, TaskVersion)
+    """
+    return list(zip(versions, versions[1:]))
+
+
+def print_task_versions(versions, title=""):
+    """
+    Prints a TaskVersion timeline.
+    :param versions:
+    :param title:
+    :return:
+    """
+    print("{} {} versions:".format(title, len(versions)))
+    for version in versions:
+        if version.start_date is None:
+            print("{}  removed".format(version.iso_date))
+        else:
+            print("{}  {} - {}".format(version.iso_date, version.start_date, version.end_date))
+
+
+def get_schedule_history_path(mpp_dir):
+    return os.path.join(str(mpp_dir), SCHEDULE_HISTORY_FILE_NAME)
+
+
+def read_schedule_history(mpp_dir):
+    """
+    Reads the ScheduleHistory index of the directory, None if missing, outdated or corrupt.
+    :param mpp_dir:
+    :return:
+    """
+    history_path = get_schedule_history_path(mpp_dir)
+    if not os.path.exists(history_path):
+        return None
+    try:
+        with open(history_path, "r", encoding="utf-8") as history_file:
+            content = json.load(history_file)
+        if content["version"] != SCHEDULE_HISTORY_VERSION:
+            return None
+        return ScheduleHistory.from_json(content)
+    except (ValueError, KeyError, TypeError, OSError) as error:
+        print("WARNING: ignoring corrupt schedule history {}: {}".format(history_path, error))
+        return None
+
+
+def update_schedule_history(mpp_dir, extensions=None, max_workers=mpp.HISTORY_MAX_WORKERS, backend=None):
+    """
+    Brings the ScheduleHistory index of the directory up to date and stores it there.
+    Only dated schedule files newer than the index of their lot are ingested, a lot is
+    rebuilt if one of its ingested files changed or vanished or an older one appeared.
+    :param mpp_dir: e.g. the pyrevit_config_mpp_dir directory
+    :param extensions:
+    :param max_workers:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :return: the ScheduleHistory
+    """
+    history = read_schedule_history(mpp_dir) or ScheduleHistory()
+    dated_paths_by_lot = mpp.get_dated_schedule_paths_by_lot(mpp_dir, extensions)
+    for lot in history.lots:
+        if lot not in dated_paths_by_lot:
+            history.remove_lot(lot)
+    new_dated_paths = []
+    for lot, dated_paths in dated_paths_by_lot.items():
+        file_names = {path.name for iso_date, path in dated_paths}
+        lot_new_dated_paths = [
+            (iso_date, path) for iso_date, path in dated_paths if path.name not in history.signature_by_file_name
+        ]
+        latest_ingest_key = history.get_latest_ingest_key(lot)
+        rebuild = any(
+            name not in file_names or signature[1:] != list(mpp.get_file_signature(os.path.join(str(mpp_dir), name)))
+            for name, signature in history.signature_by_file_name.items() if mpp.get_schedule_lot(name) == lot
+        ) or any((iso_date, path.name) < latest_ingest_key for iso_date, path in lot_new_dated_paths)
+        if rebuild:
+            print("INFO: rebuilding schedule history of lot '{}' from {} files".format(lot, len(dated_paths)))
+            history.remove_lot(lot)
+            lot_new_dated_paths = dated_paths
+        new_dated_paths.extend(lot_new_dated_paths)
+    if not new_dated_paths:
+        return history
+    new_dated_paths.sort(key=lambda dated_path: (dated_path[0], dated_path[1].name))
+    for ingest in mpp.iter_schedule_ingests(new_dated_paths, max_workers, backend, use_sidecar_cache=True):
+        history.add_schedule(ingest.iso_date, ingest.tasks, ingest.mpp_path)
+    mpp.write_json_atomically(get_schedule_history_path(mpp_dir), history.to_json())
+    return history
@@ -1,15 +1,57 @@
 # -*- coding: utf-8 -*-
+import array
+import bisect
 import collections
+import hashlib
+import json
+import operator
+import os
+import pathlib
+import re
+import socket
 import sys
+import tempfile
+import threading
+import timeit
+import unicodedata
+import uuid
+
+from vrph import background, mspdi, tabular
 
 MPXJ_DOT_NET_LIB_PATH = r"C:\ProgramData\baho_pyrevit_extension\mpxj_dot_net.lib\src.net\lib\net45"
-if MPXJ_DOT_NET_LIB_PATH not in sys.path:
-    sys.path.append(MPXJ_DOT_NET_LIB_PATH)
 # ^^ using mpxj version: 12.7.0
-import clr
-clr.AddReference("rtfparserkit-1.16.0")
-clr.AddReference("mpxj")
-from net.sf import mpxj
+# the .net / java side is only loaded on first read, see MpxjBackend
+
+# reader backend used when none is specified per call:
+# "auto" reads every file with the schedule source registered for its extension,
+# e.g. .xml files with "mspdi", unknown extensions with "mpxj"
+MPP_BACKEND = os.environ.get("VRPH_MPP_BACKEND", "auto")
+
+# bump on any change of the Task conversion, so existing sidecars get rebuilt
+SIDECAR_CACHE_VERSION = 4
+SIDECAR_CACHE_SUFFIX = ".vrph_tasks.json"
+
+SCHEDULE_CACHE_KEY = "VRPH_MPP_SCHEDULE_CACHE"
+SCHEDULE_CACHE_MAX_ENTRIES = 4
+SCHEDULE_CACHE_MAX_ROWS = 400000
+
+MPXJ_WARMUP_KEY = "VRPH_MPP_MPXJ_WARMUP"
+SCHEDULE_PREFETCHES_KEY = "VRPH_MPP_SCHEDULE_PREFETCHES"
+
+HISTORY_MAX_WORKERS = min(4, os.cpu_count() or 1)
+# lot token in a dated schedule file name, e.g. 20240101_LOT2.mpp
+SCHEDULE_LOT_PATTERN = re.compile(r"(?i)(?:^|[^a-z0-9])(?P<lot>lot[ _-]?[a-z0-9]+)")
+MERGE_RULES = ("latest", "priority")
+MERGE_COMPARE_FIELDS = ("name", "start_date", "end_date")
+
+# wildcards in task designations, see DesignationTrie
+DESIGNATION_ANY_CHAR = "?"
+DESIGNATION_ANY_SUFFIX = "*"
+
+_optional_modules = {}
+_process_wide_by_key = {}
+_process_wide_lock = threading.Lock()
+_prefetch_lock = threading.Lock()
 
 
 SheetInfo = collections.namedtuple(
@@ -20,120 +62,2144 @@ SheetInfo = collections.namedtuple(
         "sheet_name",
         "start_date",
         "end_date",
+        "unique_id",
         "mpp_task",
     ]
 )
 
 
+# mpp custom text field number of each task field, e.g. Text1 holds the designation.
+# Task, the field getters of every schedule source and the TaskTable columns are built from it,
+# so a text field is added here only
+TASK_FIELD_NAME_BY_ID = {
+     1: "designation",
+     2: "task_type",
+     3: "checked_by",
+     4: "sheet_number",
+     5: "version_number",
+     6: "version_date",
+     7: "plan_level",
+     9: "titleblock_title",
+    11: "zone_name",
+    13: "titleblock_subtitle",
+}
+TEXT_NUMBER_BY_FIELD_NAME = {name: number for number, name in TASK_FIELD_NAME_BY_ID.items()}
+TASK_TEXT_FIELD_NAMES = tuple(TASK_FIELD_NAME_BY_ID[number] for number in sorted(TASK_FIELD_NAME_BY_ID))
+
+
 Task = collections.namedtuple(
     typename="Task",
-    field_names=[
-        "id",
-        "name",
-        "designation",
-        "start_date",
-        "end_date",
-        "sheet_number",
-        "task_type",
-        "zone_name",
-        "version_number",
-        "version_date",
-        "mpp_task",
-    ],
+    field_names=["id", "name", "start_date", "end_date"] + list(TASK_TEXT_FIELD_NAMES) + ["unique_id", "mpp_task"],
 )
 
 
-def _get_date_truncated_iso_short(task_date):
+def get_date_truncated_iso_short(task_date):
     """
     Retrieves YYMMDD date format from mpp task date.
+    A single interop call: str() of a java LocalDateTime runs its ToString() through IKVM,
+    iso8601 like mspdi dates, its conversion is memoised by the date text.
     :param task_date:
     :return:
     """
     if not task_date:
         return ""
-    day   = str(task_date.getDayOfMonth()).zfill(2)
-    month = str(task_date.getMonthValue()).zfill(2)
-    year  = str(task_date.getYear())
-    truncated = "{}{}{}".format(year[-2:], month, day)
-    # iso_short = "{}{}{}".format(year, month, day)
-    # print("{} -> {}".format(iso_short, truncated))
-    return int(truncated)
+    return mspdi.get_date_truncated_iso_short(str(task_date))
+
+
+def _get_numpy():
+    """
+    Imports numpy on first use, None if not available.
+    :return:
+    """
+    if "numpy" not in _optional_modules:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _optional_modules["numpy"] = numpy
+    return _optional_modules["numpy"]
+
+
+def convert_dates_truncated_iso_short(task_dates):
+    """
+    Converts a whole column of dates into YYMMDD ints, missing dates become 0.
+    Each distinct date is converted once, NumPy-backed when available.
+    :param task_dates: iso8601 date texts, mpp task dates or None / ""
+    :return: array('i')
+    """
+    date_texts = [
+        task_date if isinstance(task_date, str) else (str(task_date) if task_date else "")
+        for task_date in task_dates
+    ]
+    numpy = _get_numpy()
+    if numpy is not None and date_texts:
+        distinct_texts, inverse = numpy.unique(numpy.array(date_texts, dtype=object), return_inverse=True)
+        distinct_dates = numpy.array(
+            [mspdi.get_date_truncated_iso_short(text) or 0 for text in distinct_texts],
+            dtype=numpy.int32,
+        )
+        converted = array.array("i")
+        converted.frombytes(distinct_dates[inverse].astype(numpy.int32).tobytes())
+        return converted
+    get_truncated = mspdi.get_date_truncated_iso_short
+    return array.array("i", [get_truncated(text) or 0 for text in date_texts])
+
+
+
+def _get_mpxj_text_getter(text_number):
+    return lambda task: task.getText(text_number) or ""
+
+
+def _get_mspdi_text_getter(text_number):
+    return lambda task: task.texts.get(text_number, "")
+
+
+def _get_mpxj_name(task):
+    return task.getName()
+
+
+def _get_mspdi_name(task):
+    return task.name
+
+
+# fields not listed in TASK_FIELD_NAME_BY_ID, text fields are added from there
+MPXJ_FIELD_GETTERS = {
+    "id"        : lambda task: task.getID().intValue() or -1,
+    "name"      : _get_mpxj_name,
+    "sheet_name": _get_mpxj_name,
+    "start_date": lambda task: get_date_truncated_iso_short(task.getStart()),
+    "end_date"  : lambda task: get_date_truncated_iso_short(task.getFinish()),
+    "unique_id" : lambda task: task.getUniqueID().intValue(),
+    "mpp_task"  : lambda task: task,
+}
+MPXJ_FIELD_GETTERS.update(
+    {name: _get_mpxj_text_getter(number) for name, number in TEXT_NUMBER_BY_FIELD_NAME.items()}
+)
+
+# copies out every field but drops the native reference, so the ProjectFile can be garbage-collected
+DETACHED_MPXJ_FIELD_GETTERS = dict(MPXJ_FIELD_GETTERS, mpp_task=lambda task: None)
+
+MSPDI_FIELD_GETTERS = {
+    "id"        : lambda task: task.id or -1,
+    "name"      : _get_mspdi_name,
+    "sheet_name": _get_mspdi_name,
+    "start_date": lambda task: task.start,
+    "end_date"  : lambda task: task.finish,
+    "unique_id" : lambda task: task.uid,
+    "mpp_task"  : lambda task: None,
+}
+MSPDI_FIELD_GETTERS.update(
+    {name: _get_mspdi_text_getter(number) for name, number in TEXT_NUMBER_BY_FIELD_NAME.items()}
+)
+
+def _get_record_text_getter(name):
+    return lambda record: record.get(name) or ""
+
+
+def _get_record_int(record, name, default):
+    value = record.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    # spreadsheet exports write whole numbers as 12.0
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is None or not number.is_integer():
+        print("WARNING: skipped unparseable {} '{}' of task '{}'".format(name, value, record.get("name", "")))
+        return default
+    return int(number)
+
+
+def _get_record_name(record):
+    return record.get("name") or ""
+
+
+# getters for records of tabular sources, e.g. CsvSource, raw values by field name
+RECORD_FIELD_GETTERS = {
+    "id"        : lambda record: _get_record_int(record, "id", -1) or -1,
+    "name"      : _get_record_name,
+    "sheet_name": _get_record_name,
+    "start_date": lambda record: tabular.get_date_truncated_iso_short(record.get("start_date")),
+    "end_date"  : lambda record: tabular.get_date_truncated_iso_short(record.get("end_date")),
+    "unique_id" : lambda record: _get_record_int(record, "unique_id", 0),
+    "mpp_task"  : lambda record: None,
+}
+RECORD_FIELD_GETTERS.update({name: _get_record_text_getter(name) for name in TEXT_NUMBER_BY_FIELD_NAME})
 
+# source column by field name of tabular sources, columns named like the fields
+DEFAULT_COLUMN_BY_FIELD = collections.OrderedDict((name, name) for name in Task._fields[:-1])
 
-def convert_mpxj_task_to_sheet_info(task):
+# getters for already converted Task objects, e.g. served from a schedule cache
+TASK_FIELD_GETTERS = {name: operator.attrgetter(name) for name in Task._fields}
+TASK_FIELD_GETTERS["sheet_name"] = operator.attrgetter("name")
+
+_projection_types_by_fields = {}
+
+
+def get_task_projection_type(fields):
+    """
+    Retrieves the namedtuple type TaskProjection for given field names.
+    :param fields:
+    :return:
+    """
+    fields = tuple(fields)
+    projection_type = _projection_types_by_fields.get(fields)
+    if projection_type is None:
+        projection_type = collections.namedtuple("TaskProjection", fields)
+        _projection_types_by_fields[fields] = projection_type
+    return projection_type
+
+
+def project_tasks(source_tasks, fields, predicate=None, getters=None, row_type=None):
+    """
+    Lazily converts source tasks into rows holding only the requested fields.
+    The predicate is evaluated on the first field only, so non-matching tasks
+    are skipped before any of the remaining fields is fetched.
+    :param source_tasks: mpxj tasks, mspdi tasks or Task objects
+    :param fields: field names, e.g. ("designation", "name", "start_date")
+    :param predicate: callable on the first field value, e.g. lambda designation: designation == "X"
+    :param getters: field getters matching the source tasks, default MPXJ_FIELD_GETTERS
+    :param row_type: type constructed from the field values, default TaskProjection
+    :return:
+    """
+    if getters is None:
+        getters = MPXJ_FIELD_GETTERS
+    if row_type is None:
+        row_type = get_task_projection_type(fields)
+    first_getter = getters[fields[0]]
+    other_getters = [getters[name] for name in fields[1:]]
+    for task in source_tasks:
+        first = first_getter(task)
+        if predicate is not None and not predicate(first):
+            continue
+        yield row_type(first, *[getter(task) for getter in other_getters])
+
+
+def _get_distinct_getters(fields, getters):
+    """
+    Retrieves the distinct getters of the fields, aliased fields share one getter,
+    and for every field the index of its getter.
+    :param fields:
+    :param getters:
+    :return:
+    """
+    distinct_getters = []
+    index_by_getter = {}
+    getter_indexes = []
+    for name in fields:
+        getter = getters[name]
+        if getter not in index_by_getter:
+            index_by_getter[getter] = len(distinct_getters)
+            distinct_getters.append(getter)
+        getter_indexes.append(index_by_getter[getter])
+    return distinct_getters, getter_indexes
+
+
+def convert_tasks_bulk(source_tasks, fields=Task._fields, getters=None, row_type=Task):
+    """
+    Extracts the fields of all source tasks in one pass, driven by the field getters
+    built on TASK_FIELD_NAME_BY_ID. Every distinct getter is called once per task,
+    so aliased fields like name and sheet_name cost a single native call,
+    see count_native_calls for the calls a conversion makes.
+    :param source_tasks: mpxj tasks, mspdi tasks or Task objects
+    :param fields: field names, default all of Task
+    :param getters: field getters matching the source tasks, default MPXJ_FIELD_GETTERS
+    :param row_type: type constructed from the field values, default Task
+    :return: list of row_type
+    """
+    if getters is None:
+        getters = MPXJ_FIELD_GETTERS
+    distinct_getters, getter_indexes = _get_distinct_getters(fields, getters)
+    rows = []
+    append = rows.append
+    for task in source_tasks:
+        values = [getter(task) for getter in distinct_getters]
+        append(row_type(*[values[i] for i in getter_indexes]))
+    return rows
+
+
+def extract_task_columns(source_tasks, fields, getters=None):
+    """
+    Extracts the requested fields of all source tasks in one pass as columns.
+    :param source_tasks: mpxj tasks, mspdi tasks or Task objects
+    :param fields: field names, e.g. any of TASK_FIELD_NAME_BY_ID
+    :param getters: field getters matching the source tasks, default MPXJ_FIELD_GETTERS
+    :return: OrderedDict of value lists by field name
+    """
+    rows = convert_tasks_bulk(source_tasks, fields, getters, row_type=lambda *values: values)
+    if not rows:
+        return collections.OrderedDict((name, []) for name in fields)
+    return collections.OrderedDict((name, list(column)) for name, column in zip(fields, zip(*rows)))
+
+
+def _get_mpxj_field_getters(detached):
+    if detached:
+        return DETACHED_MPXJ_FIELD_GETTERS
+    return MPXJ_FIELD_GETTERS
+
+
+def convert_mpxj_task_to_sheet_info(task, detached=False):
     """
     Converts task from mpp file into a convenient namedtuple SheetInfo object.
     :param task:
+    :param detached: drop the mpp_task reference
     :return:
     """
-    return SheetInfo(
-        id=task.getID().intValue() or -1,
-        sheet_number=task.getText(4) or "",
-        sheet_name=task.getName(),
-        start_date=_get_date_truncated_iso_short(task.getStart()),
-        end_date=_get_date_truncated_iso_short(task.getFinish()),
-        mpp_task=task,
-    )
+    getters = _get_mpxj_field_getters(detached)
+    return next(project_tasks((task,), SheetInfo._fields, getters=getters, row_type=SheetInfo))
 
 
-def convert_mpxj_task_to_task(task):
+def convert_mpxj_task_to_task(task, detached=False):
     """
     Converts task from mpp file into a convenient namedtuple Task object.
     :param task:
+    :param detached: drop the mpp_task reference
+    :return:
+    """
+    getters = _get_mpxj_field_getters(detached)
+    return next(project_tasks((task,), Task._fields, getters=getters, row_type=Task))
+
+
+def convert_mspdi_task_to_sheet_info(task):
+    """
+    Converts task from mspdi xml file into a convenient namedtuple SheetInfo object.
+    :param task:
+    :return:
+    """
+    return next(project_tasks((task,), SheetInfo._fields, getters=MSPDI_FIELD_GETTERS, row_type=SheetInfo))
+
+
+def convert_mspdi_task_to_task(task):
+    """
+    Converts task from mspdi xml file into a convenient namedtuple Task object.
+    :param task:
+    :return:
+    """
+    return next(project_tasks((task,), Task._fields, getters=MSPDI_FIELD_GETTERS, row_type=Task))
+
+
+class NativeCallCounter(object):
+    """
+    Counts the method calls made on wrapped native objects,
+    including the objects returned by them, e.g. the dates of a task.
+    """
+    PLAIN_TYPES = (str, int, float, bool, type(None))
+
+    def __init__(self):
+        self.calls = 0
+
+    def wrap(self, native):
+        if isinstance(native, self.PLAIN_TYPES):
+            return native
+        return _CountedNative(native, self)
+
+
+class _CountedNative(object):
+    __slots__ = ("_native", "_counter")
+
+    def __init__(self, native, counter):
+        self._native = native
+        self._counter = counter
+
+    def __bool__(self):
+        return bool(self._native)
+
+    def __str__(self):
+        # a native ToString() call, e.g. of a date
+        self._counter.calls += 1
+        return str(self._native)
+
+    def __getattr__(self, name):
+        attr = getattr(self._native, name)
+        if not callable(attr):
+            return attr
+        counter = self._counter
+
+        def counted(*args):
+            counter.calls += 1
+            return counter.wrap(attr(*args))
+        return counted
+
+
+def count_native_calls(convert, source_tasks):
+    """
+    Runs a conversion of source tasks and counts the native calls it made.
+    :param convert: callable on a list of source tasks
+    :param source_tasks: mpxj tasks or benchmark.FakeMpxjTask
+    :return: conversion result and native calls per task
+    """
+    counter = NativeCallCounter()
+    counted_tasks = [counter.wrap(task) for task in source_tasks]
+    converted = convert(counted_tasks)
+    return converted, counter.calls / float(max(len(counted_tasks), 1))
+
+
+def get_backend_name(mpp_path, backend=None):
+    """
+    Resolves the reader backend for given schedule path:
+    per call backend, else configured MPP_BACKEND (env var VRPH_MPP_BACKEND).
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :return:
+    """
+    backend = backend or MPP_BACKEND
+    if backend == "auto":
+        source = SCHEDULE_SOURCES_BY_EXTENSION.get(os.path.splitext(str(mpp_path))[1].lower())
+        if source is None:
+            return mpxj_backend.name
+        return source.name
+    if backend not in READER_BACKENDS:
+        raise ValueError("unknown mpp backend: '{}', expected one of: {}".format(
+            backend, ("auto",) + tuple(READER_BACKENDS),
+        ))
+    return backend
+
+
+MpxjReaderOptions = collections.namedtuple(
+    typename="MpxjReaderOptions",
+    field_names=[
+        "universal",
+        "read_presentation_data",
+        "use_raw_timephased_data",
+    ],
+)
+
+# sniffs the file format and reads everything
+UNIVERSAL_MPXJ_READER_OPTIONS = MpxjReaderOptions(
+    universal=True,
+    read_presentation_data=True,
+    use_raw_timephased_data=False,
+)
+# concrete reader by extension, skipping what the buttons never use
+TRIMMED_MPXJ_READER_OPTIONS = MpxjReaderOptions(
+    universal=False,
+    read_presentation_data=False,
+    use_raw_timephased_data=True,
+)
+
+# concrete mpxj reader class below net.sf.mpxj by schedule file extension
+MPXJ_READER_NAME_BY_EXTENSION = {
+    ".mpp": ("mpp", "MPPReader"),
+    ".xml": ("mspdi", "MSPDIReader"),
+    ".mpx": ("mpx", "MPXReader"),
+}
+
+
+class ScheduleSource(object):
+    """
+    Interface of a schedule reader, registered by file extension with register_schedule_source:
+    streams the native tasks of a schedule file and provides the field getters
+    converting them into Task rows, see project_tasks.
+    """
+    name = None
+    extensions = ()
+
+    def get_source_tasks(self, mpp_path):
+        raise NotImplementedError
+
+    def get_field_getters(self, detached=False):
+        raise NotImplementedError
+
+    @property
+    def cache_key(self):
+        """
+        Identifies the tasks this source reads from a file, part of the schedule cache keys.
+        :return:
+        """
+        return self.name
+
+
+class MpxjBackend(ScheduleSource):
+    """
+    Reads schedules with the mpxj .net library. The assemblies are loaded
+    on first use, so importing vrph.mpp does not pay for the IKVM runtime.
+    By default the concrete reader for the file extension is used with
+    TRIMMED_MPXJ_READER_OPTIONS, falling back to the UniversalProjectReader.
+    """
+    name = "mpxj"
+    extensions = (".mpp", ".mpx")
+
+    def __init__(self, lib_path=MPXJ_DOT_NET_LIB_PATH, reader_options=TRIMMED_MPXJ_READER_OPTIONS):
+        self.lib_path = lib_path
+        self.reader_options = reader_options
+        self.load_seconds = None
+        self._mpxj = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self._mpxj is not None
+
+    def load(self):
+        """
+        Loads the mpxj assemblies once and retrieves the net.sf.mpxj package.
+        :return:
+        """
+        with self._lock:
+            if self._mpxj is None:
+                started = timeit.default_timer()
+                if self.lib_path not in sys.path:
+                    sys.path.append(self.lib_path)
+                try:
+                    import clr
+                except ImportError:
+                    raise ImportError("mpxj backend requires clr and the mpxj library, use the mspdi backend for .xml")
+                clr.AddReference("rtfparserkit-1.16.0")
+                clr.AddReference("mpxj")
+                from net.sf import mpxj
+                self._mpxj = mpxj
+                self.load_seconds = timeit.default_timer() - started
+        return self._mpxj
+
+    def get_reader(self, mpp_path, reader_options=None):
+        """
+        Retrieves a configured mpxj reader for the schedule file.
+        Options a reader does not support are skipped.
+        :param mpp_path:
+        :param reader_options: MpxjReaderOptions, default of this backend
+        :return:
+        """
+        mpxj = self.load()
+        reader_options = reader_options or self.reader_options
+        reader_name = MPXJ_READER_NAME_BY_EXTENSION.get(os.path.splitext(str(mpp_path))[1].lower())
+        if reader_options.universal or not reader_name:
+            return mpxj.reader.UniversalProjectReader()
+        package_name, class_name = reader_name
+        reader = getattr(getattr(mpxj, package_name), class_name)()
+        if hasattr(reader, "setReadPresentationData"):
+            reader.setReadPresentationData(reader_options.read_presentation_data)
+        if hasattr(reader, "setUseRawTimephasedData"):
+            reader.setUseRawTimephasedData(reader_options.use_raw_timephased_data)
+        return reader
+
+    def read_project(self, mpp_path, reader_options=None):
+        reader_options = reader_options or self.reader_options
+        reader = self.get_reader(mpp_path, reader_options)
+        try:
+            return reader.read(str(mpp_path))
+        except Exception as error:
+            if reader_options.universal:
+                raise
+            project = self.read_project(mpp_path, UNIVERSAL_MPXJ_READER_OPTIONS)
+            print("WARNING: {} failed on {}, read with UniversalProjectReader instead: {}".format(
+                type(reader).__name__, mpp_path, error,
+            ))
+            return project
+
+    def get_source_tasks(self, mpp_path):
+        return self.read_project(mpp_path).getTasks()
+
+    def get_field_getters(self, detached=False):
+        return _get_mpxj_field_getters(detached)
+
+
+class MspdiBackend(ScheduleSource):
+    """
+    Reads MS Project XML exports with the pure python streaming reader of vrph.mspdi.
+    """
+    name = "mspdi"
+    extensions = (".xml",)
+
+    def get_source_tasks(self, mpp_path):
+        return mspdi.iter_mspdi_tasks(mpp_path)
+
+    def get_field_getters(self, detached=False):
+        return MSPDI_FIELD_GETTERS
+
+
+class CsvSource(ScheduleSource):
+    """
+    Streams task lists of csv files with header, e.g. Excel exports of planners.
+    """
+    name = "csv"
+    extensions = (".csv",)
+
+    def __init__(self, column_by_field=None, delimiter=None, encoding="utf-8-sig"):
+        """
+        :param column_by_field: csv column header by Task field name, default DEFAULT_COLUMN_BY_FIELD
+        :param delimiter: sniffed if None
+        :param encoding:
+        """
+        self.column_by_field = column_by_field or DEFAULT_COLUMN_BY_FIELD
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    def get_source_tasks(self, mpp_path):
+        return tabular.iter_csv_records(mpp_path, self.column_by_field, self.delimiter, self.encoding)
+
+    def get_field_getters(self, detached=False):
+        return RECORD_FIELD_GETTERS
+
+    @property
+    def cache_key(self):
+        # another column mapping reads other tasks from the same file
+        return "{}:{}:{}:{}".format(
+            self.name, json.dumps(list(self.column_by_field.items())), self.delimiter, self.encoding,
+        )
+
+
+class JsonLinesSource(ScheduleSource):
+    """
+    Streams task lists of JSON-lines files, one task object per line, e.g. of the scheduling dashboard.
+    """
+    name = "jsonl"
+    extensions = (".jsonl",)
+
+    def __init__(self, column_by_field=None, encoding="utf-8"):
+        """
+        :param column_by_field: object key by Task field name, default DEFAULT_COLUMN_BY_FIELD
+        :param encoding:
+        """
+        self.column_by_field = column_by_field or DEFAULT_COLUMN_BY_FIELD
+        self.encoding = encoding
+
+    def get_source_tasks(self, mpp_path):
+        return tabular.iter_jsonl_records(mpp_path, self.column_by_field, self.encoding)
+
+    def get_field_getters(self, detached=False):
+        return RECORD_FIELD_GETTERS
+
+    @property
+    def cache_key(self):
+        return "{}:{}:{}".format(self.name, json.dumps(list(self.column_by_field.items())), self.encoding)
+
+
+# schedule sources by name and by file extension, see register_schedule_source
+READER_BACKENDS = {}
+SCHEDULE_SOURCES_BY_EXTENSION = collections.OrderedDict()
+
+
+def register_schedule_source(source, extensions=None):
+    """
+    Registers a ScheduleSource under its name, e.g. as per call backend,
+    and as the "auto" backend of its file extensions. Re-registering a name,
+    e.g. a CsvSource with another column mapping, replaces the previous one.
+    :param source:
+    :param extensions: default the extensions of the source
+    :return:
+    """
+    READER_BACKENDS[source.name] = source
+    for extension in extensions or source.extensions:
+        SCHEDULE_SOURCES_BY_EXTENSION[extension.lower()] = source
+
+
+def get_schedule_extensions():
+    """
+    Retrieves the file extensions of all registered schedule sources.
+    :return:
+    """
+    return tuple(SCHEDULE_SOURCES_BY_EXTENSION)
+
+
+mpxj_backend = MpxjBackend()
+register_schedule_source(mpxj_backend)
+register_schedule_source(MspdiBackend())
+register_schedule_source(CsvSource())
+register_schedule_source(JsonLinesSource())
+
+
+def get_source_tasks_and_getters(mpp_path, backend=None, detached=False):
+    """
+    Reads the native tasks of a schedule file with the resolved backend.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param detached: getters drop the mpp_task reference
+    :return: native tasks and their matching field getters
+    """
+    reader_backend = READER_BACKENDS[get_backend_name(mpp_path, backend)]
+    return reader_backend.get_source_tasks(mpp_path), reader_backend.get_field_getters(detached)
+
+
+def get_reader_key(mpp_path, backend=None):
+    """
+    Retrieves the cache key of the schedule source resolved for the file,
+    so cached tasks of another backend or column mapping are never served.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :return:
+    """
+    return READER_BACKENDS[get_backend_name(mpp_path, backend)].cache_key
+
+
+def iter_tasks(mpp_path, backend=None, detached=False):
+    """
+    Streams all tasks of a schedule file as Task objects,
+    read with the resolved backend.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param detached: drop the mpp_task reference, see NativeTaskResolver
+    :return:
+    """
+    source_tasks, getters = get_source_tasks_and_getters(mpp_path, backend, detached)
+    return project_tasks(source_tasks, Task._fields, getters=getters, row_type=Task)
+
+
+def iter_sheet_infos(mpp_path, backend=None, detached=False):
+    """
+    Streams all tasks of a schedule file as SheetInfo objects,
+    read with the resolved backend.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param detached: drop the mpp_task reference, see NativeTaskResolver
+    :return:
+    """
+    source_tasks, getters = get_source_tasks_and_getters(mpp_path, backend, detached)
+    return project_tasks(source_tasks, SheetInfo._fields, getters=getters, row_type=SheetInfo)
+
+
+def convert_task_to_sheet_info(task):
+    """
+    Converts an already converted Task into a SheetInfo object.
+    :param task:
     :return:
     """
-    return Task(
-        id=task.getID().intValue() or -1,
-        name=task.getName(),
-        designation=task.getText(1) or "",
-        start_date=_get_date_truncated_iso_short(task.getStart()),
-        end_date=_get_date_truncated_iso_short(task.getFinish()),
-        sheet_number=task.getText(4) or "",
-        task_type=task.getText(2) or "",
-        zone_name=task.getText(11) or "",
-        version_number=task.getText(5) or "",
-        version_date=task.getText(6) or "",
-        mpp_task=task,
+    return SheetInfo(
+        id=task.id,
+        sheet_number=task.sheet_number,
+        sheet_name=task.name,
+        start_date=task.start_date,
+        end_date=task.end_date,
+        unique_id=task.unique_id,
+        mpp_task=task.mpp_task,
     )
 
 
-def get_mpp_overview(mpp_path):
+def get_sidecar_cache_path(mpp_path):
     """
-    Iterates enumerated over all tasks in a mpp file and returns them.
+    Retrieves the path of the parsed-schedule sidecar cache next to the schedule file.
     :param mpp_path:
     :return:
     """
-    if not mpp_path.exists():
-        print("mpp not found: ", mpp_path)
-    task_list = []
-    tasks = get_tasks_from_mpp(mpp_path)
-    for i, task in enumerate(tasks):
-        project_task = convert_mpxj_task_to_sheet_info(task)
-        task_list.append(project_task)
-        print(i, project_task)
-    return task_list
+    return "{}{}".format(mpp_path, SIDECAR_CACHE_SUFFIX)
 
 
-def get_tasks_from_mpp(mpp_path):
+def get_file_content_hash(file_path, chunk_size=1024 * 1024):
     """
-    Retrieve tasks from mpp file.
+    Retrieves the sha1 hex digest of the file content.
+    :param file_path:
+    :param chunk_size:
+    :return:
+    """
+    sha1 = hashlib.sha1()
+    with open(str(file_path), "rb") as source:
+        chunk = source.read(chunk_size)
+        while chunk:
+            sha1.update(chunk)
+            chunk = source.read(chunk_size)
+    return sha1.hexdigest()
+
+
+def get_file_signature(file_path):
+    stat = os.stat(str(file_path))
+    return stat.st_size, stat.st_mtime
+
+
+def read_sidecar_cache(mpp_path, verbose=True, backend=None):
+    """
+    Reads the Task rows from the sidecar cache of the schedule file.
+    Returns None if there is no sidecar or it is stale or corrupt:
+    it has to be written by the same schedule source, size and mtime have to
+    match the schedule file, on mtime mismatch only (e.g. file copied to share)
+    the content hash decides.
     :param mpp_path:
+    :param verbose: print a warning on a corrupt cache
+    :param backend: "auto", "mpxj" or "mspdi"
     :return:
     """
-    reader = mpxj.reader.UniversalProjectReader()
-    project = reader.read(str(mpp_path))
-    return project.getTasks()
+    cache_path = get_sidecar_cache_path(mpp_path)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        size, mtime = get_file_signature(mpp_path)
+    except OSError:
+        # schedule deleted or moved with its sidecar left behind, reading the schedule reports it
+        return None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+        if cache["version"] != SIDECAR_CACHE_VERSION:
+            return None
+        if cache["reader"] != get_reader_key(mpp_path, backend):
+            return None
+        if cache["fields"] != list(Task._fields[:-1]):
+            return None
+        if cache["size"] != size:
+            return None
+        if cache["mtime"] != mtime:
+            if cache["sha1"] != get_file_content_hash(mpp_path):
+                return None
+        rows = cache["rows"]
+        if len(rows) != cache["row_count"]:
+            return None
+        return [Task(*(row + [None])) for row in rows]
+    except (ValueError, KeyError, TypeError, OSError) as error:
+        if verbose:
+            print("WARNING: ignoring corrupt schedule cache {}: {}".format(cache_path, error))
+        return None
 
 
-TASK_FIELD_NAME_BY_ID = {
-     1: "designation",
-     2: "task_type",
-     3: "checked_by",
-     4: "sheet_number",
-     5: "version_number",
-     6: "version_date",
-     7: "plan_level",
-     9: "titleblock_title",
-    11: "zone_name",
-    13: "titleblock_subtitle",
-}
+def write_sidecar_cache(mpp_path, tasks, signature, verbose=True, backend=None):
+    """
+    Atomically writes the Task rows into the sidecar cache of the schedule file.
+    The cache is skipped if the schedule changed since the given signature was taken.
+    :param mpp_path:
+    :param tasks:
+    :param signature: (size, mtime) of the schedule file before it was read
+    :param verbose: print why the cache was not written
+    :param backend: "auto", "mpxj" or "mspdi" the tasks were read with
+    :return: True if the cache was written
+    """
+    cache_path = get_sidecar_cache_path(mpp_path)
+    try:
+        content_hash = get_file_content_hash(mpp_path)
+        if get_file_signature(mpp_path) != signature:
+            if verbose:
+                print("INFO: schedule changed while reading, skipped writing cache: {}".format(cache_path))
+            return False
+        cache = {
+            "version": SIDECAR_CACHE_VERSION,
+            "source_name": os.path.basename(str(mpp_path)),
+            "size": signature[0],
+            "mtime": signature[1],
+            "sha1": content_hash,
+            "reader": get_reader_key(mpp_path, backend),
+            "fields": list(Task._fields[:-1]),
+            "row_count": len(tasks),
+            "rows": [list(task[:-1]) for task in tasks],
+        }
+    except OSError as error:
+        if verbose:
+            print("WARNING: unable to write schedule cache {}: {}".format(cache_path, error))
+        return False
+    return write_json_atomically(cache_path, cache, verbose)
+
+
+def write_json_atomically(json_path, content, verbose=True):
+    """
+    Writes content as json into its own temp file and renames it into place,
+    so concurrent writers from several workstations never leave a partial file.
+    :param json_path:
+    :param content:
+    :param verbose: print a warning if not written
+    :return: True if written
+    """
+    temp_path = "{}.{}.{}.tmp".format(json_path, socket.gethostname(), uuid.uuid4().hex)
+    try:
+        with open(temp_path, "w", encoding="utf-8") as json_file:
+            json.dump(content, json_file, separators=(",", ":"))
+        os.replace(temp_path, json_path)
+        return True
+    except OSError as error:
+        # read-only share or file locked by another workstation: caches are best effort
+        if verbose:
+            print("WARNING: unable to write {}: {}".format(json_path, error))
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+
+ScheduleCacheStats = collections.namedtuple(
+    typename="ScheduleCacheStats",
+    field_names=[
+        "hits",
+        "misses",
+        "evictions",
+        "invalidations",
+        "entries",
+        "rows",
+    ],
+)
+
+
+class ScheduleCache(object):
+    """
+    Process level LRU cache of parsed schedules, keyed by path, schedule source, size and mtime.
+    Bounded by count of schedules and by total count of task rows.
+    """
+    def __init__(self, max_entries=SCHEDULE_CACHE_MAX_ENTRIES, max_rows=SCHEDULE_CACHE_MAX_ROWS):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._tasks_by_key = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def get_key(mpp_path, backend=None):
+        size, mtime = get_file_signature(mpp_path)
+        return _get_path_key(mpp_path), get_reader_key(mpp_path, backend), size, mtime
+
+    @property
+    def rows(self):
+        return sum(len(tasks) for tasks in self._tasks_by_key.values())
+
+    @property
+    def stats(self):
+        with self._lock:
+            return ScheduleCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                invalidations=self.invalidations,
+                entries=len(self._tasks_by_key),
+                rows=self.rows,
+            )
+
+    def get(self, key):
+        """
+        Retrieves a copy of the cached task list for the key or None.
+        :param key:
+        :return:
+        """
+        with self._lock:
+            tasks = self._tasks_by_key.get(key)
+            if tasks is None:
+                self.misses += 1
+                return None
+            self._tasks_by_key.move_to_end(key)
+            self.hits += 1
+            return list(tasks)
+
+    def put(self, key, tasks):
+        """
+        Stores the task list for the key and evicts least recently used schedules
+        until the entry and row bounds are met again.
+        :param key:
+        :param tasks:
+        :return:
+        """
+        with self._lock:
+            # other versions of the same schedule file are outdated
+            for cached_key in [k for k in self._tasks_by_key if k[:2] == key[:2] and k != key]:
+                del self._tasks_by_key[cached_key]
+                self.evictions += 1
+            self._tasks_by_key[key] = list(tasks)
+            self._tasks_by_key.move_to_end(key)
+            while len(self._tasks_by_key) > 1 and (
+                    len(self._tasks_by_key) > self.max_entries or self.rows > self.max_rows):
+                self._tasks_by_key.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, mpp_path=None):
+        """
+        Drops the cached versions of given schedule file or all schedules.
+        :param mpp_path:
+        :return:
+        """
+        with self._lock:
+            if mpp_path is None:
+                cached_keys = list(self._tasks_by_key)
+            else:
+                path_key = _get_path_key(mpp_path)
+                cached_keys = [k for k in self._tasks_by_key if k[0] == path_key]
+            for cached_key in cached_keys:
+                del self._tasks_by_key[cached_key]
+            self.invalidations += len(cached_keys)
+
+
+def _get_process_wide(key, factory=None):
+    """
+    Retrieves a process wide object by key, created by factory if missing and given.
+    Within Revit it is stored in the AppDomain, so it survives between button clicks,
+    otherwise in this module.
+    :param key:
+    :param factory:
+    :return:
+    """
+    try:
+        from System import AppDomain
+    except ImportError:
+        AppDomain = None
+    with _process_wide_lock:
+        if AppDomain is None:
+            found = _process_wide_by_key.get(key)
+        else:
+            found = AppDomain.CurrentDomain.GetData(key)
+        if found is None and factory is not None:
+            found = factory()
+            if AppDomain is None:
+                _process_wide_by_key[key] = found
+            else:
+                AppDomain.CurrentDomain.SetData(key, found)
+    return found
+
+
+def get_schedule_cache():
+    """
+    Retrieves the process wide ScheduleCache.
+    :return:
+    """
+    return _get_process_wide(SCHEDULE_CACHE_KEY, ScheduleCache)
+
+
+def invalidate_schedule_cache(mpp_path=None):
+    """
+    Drops given schedule file or all schedules from the in-session schedule cache.
+    :param mpp_path:
+    :return:
+    """
+    get_schedule_cache().invalidate(mpp_path)
+
+
+class SchedulePrefetch(background.BackgroundCall):
+    """
+    Reads a schedule file into the in-session schedule cache on a worker thread.
+    The button reading the schedule reports a problem, the prefetch keeps it as error.
+    """
+    def __init__(self, mpp_path, backend=None):
+        background.BackgroundCall.__init__(self, "mpp_prefetch", self._prefetch)
+        self.mpp_path = mpp_path
+        self.backend = backend
+
+    @property
+    def is_finished(self):
+        return self.done
+
+    def _prefetch(self):
+        try:
+            read_tasks(self.mpp_path, self.backend, verbose=False)
+        finally:
+            prefetches = _get_process_wide(SCHEDULE_PREFETCHES_KEY, dict)
+            with _prefetch_lock:
+                if prefetches.get(_get_path_key(self.mpp_path)) is self:
+                    del prefetches[_get_path_key(self.mpp_path)]
+
+
+def _get_path_key(mpp_path):
+    return os.path.normcase(os.path.abspath(str(mpp_path)))
+
+
+def prefetch_tasks(mpp_path, backend=None, verbose=False):
+    """
+    Starts reading a schedule file into the in-session schedule cache on a worker thread,
+    unless a prefetch of it is already in flight. Never blocks.
+    The worker thread prints nothing, its outcome is kept on the SchedulePrefetch.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param verbose: print that the prefetch started
+    :return: the SchedulePrefetch
+    """
+    prefetches = _get_process_wide(SCHEDULE_PREFETCHES_KEY, dict)
+    path_key = _get_path_key(mpp_path)
+    with _prefetch_lock:
+        prefetch = prefetches.get(path_key)
+        if prefetch is None:
+            prefetch = prefetches[path_key] = SchedulePrefetch(mpp_path, backend).start()
+    if verbose:
+        print("INFO: prefetching schedule: {}".format(mpp_path))
+    return prefetch
+
+
+def wait_for_prefetch(mpp_path, timeout=None):
+    """
+    Waits for an in-flight prefetch of the schedule file, if any.
+    :param mpp_path:
+    :param timeout: seconds
+    :return: the SchedulePrefetch or None
+    """
+    prefetches = _get_process_wide(SCHEDULE_PREFETCHES_KEY, dict)
+    prefetch = prefetches.get(_get_path_key(mpp_path))
+    if prefetch is None or prefetch.thread is threading.current_thread():
+        return None
+    if not prefetch.is_finished:
+        print("INFO: waiting for schedule prefetch: {}".format(mpp_path))
+    prefetch.wait(timeout)
+    return prefetch
+
+
+def get_cached_tasks(mpp_path, backend=None, use_sidecar_cache=True, use_session_cache=True, verbose=True):
+    """
+    Retrieves the tasks of a schedule file from the in-session schedule cache
+    or the sidecar cache, without parsing the schedule. None if not cached.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param use_sidecar_cache:
+    :param use_session_cache:
+    :param verbose: print which cache was used
+    :return:
+    """
+    tasks = None
+    session_cache = get_schedule_cache() if use_session_cache else None
+    if session_cache is not None:
+        wait_for_prefetch(mpp_path)
+    if session_cache is not None:
+        cache_key = session_cache.get_key(mpp_path, backend)
+        tasks = session_cache.get(cache_key)
+        if tasks is not None:
+            if verbose:
+                print("INFO: using in-session schedule cache: {}".format(session_cache.stats))
+            return tasks
+    if use_sidecar_cache:
+        tasks = read_sidecar_cache(mpp_path, verbose, backend)
+        if tasks is not None:
+            if verbose:
+                print("INFO: using schedule cache: {}".format(get_sidecar_cache_path(mpp_path)))
+            if session_cache is not None:
+                session_cache.put(cache_key, tasks)
+    return tasks
+
+
+def read_tasks(mpp_path, backend=None, use_sidecar_cache=True, use_session_cache=True, verbose=True):
+    """
+    Retrieves all tasks of a schedule file as list of detached Task objects.
+    Served from the in-session schedule cache or the sidecar cache next to the
+    schedule file if still valid, otherwise parsed with the resolved backend
+    and both caches (re)built. Tasks carry no mpp_task, use NativeTaskResolver.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param use_sidecar_cache:
+    :param use_session_cache:
+    :param verbose: print cache usage and problems
+    :return:
+    """
+    tasks = get_cached_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache, verbose)
+    if tasks is not None:
+        return tasks
+    return _parse_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache, verbose)
+
+
+def _parse_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache, verbose=True):
+    """
+    Parses the tasks of a schedule file and (re)builds the enabled caches.
+    :param mpp_path:
+    :param backend:
+    :param use_sidecar_cache:
+    :param use_session_cache:
+    :param verbose:
+    :return:
+    """
+    signature = get_file_signature(mpp_path)
+    source_tasks, getters = get_source_tasks_and_getters(mpp_path, backend, detached=True)
+    tasks = convert_tasks_bulk(source_tasks, getters=getters)
+    if use_sidecar_cache:
+        write_sidecar_cache(mpp_path, tasks, signature, verbose, backend)
+    if use_session_cache:
+        session_cache = get_schedule_cache()
+        session_cache.put(session_cache.get_key(mpp_path, backend), tasks)
+    return tasks
+
+
+def iter_task_projection(mpp_path, fields, predicate=None, backend=None,
+                         use_sidecar_cache=True, use_session_cache=True):
+    """
+    Streams TaskProjection rows with only the requested fields of a schedule file.
+    The predicate is evaluated on the first field, e.g. to keep only one designation,
+    before the remaining fields are fetched. Projected from the cached tasks
+    if available, otherwise pushed down into the backend read.
+    :param mpp_path:
+    :param fields: field names of Task, plus "sheet_name" as alias of "name"
+    :param predicate: callable on the first field value
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param use_sidecar_cache:
+    :param use_session_cache:
+    :return:
+    """
+    tasks = get_cached_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache)
+    if tasks is not None:
+        return project_tasks(tasks, fields, predicate, getters=TASK_FIELD_GETTERS)
+    source_tasks, getters = get_source_tasks_and_getters(mpp_path, backend)
+    return project_tasks(source_tasks, fields, predicate, getters=getters)
+
+
+def read_sheet_infos(mpp_path, backend=None, use_sidecar_cache=True, use_session_cache=True):
+    """
+    Retrieves all tasks of a schedule file as list of SheetInfo objects.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param use_sidecar_cache:
+    :param use_session_cache:
+    :return:
+    """
+    tasks = read_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache)
+    return [convert_task_to_sheet_info(task) for task in tasks]
+
+
+ScheduleIngest = collections.namedtuple(
+    typename="ScheduleIngest",
+    field_names=[
+        "iso_date",
+        "mpp_path",
+        "tasks",
+        "seconds",
+        "cached",
+    ],
+)
+
+
+def get_dated_schedule_paths(mpp_dir, extensions=None):
+    """
+    Retrieves the dated schedule files of a directory, i.e. with iso short YYYYMMDD
+    file name start, sorted by date.
+    :param mpp_dir:
+    :param extensions: default all registered schedule source extensions
+    :return: list of (iso_date, path)
+    """
+    from vrph import utils
+    dated_paths = []
+    for extension in extensions or get_schedule_extensions():
+        dated_paths.extend(utils.get_dated_files_in_dir_by_extension(pathlib.Path(mpp_dir), extension))
+    return sorted(dated_paths, key=lambda dated_path: (dated_path[0], dated_path[1].name))
+
+
+def _ingest_schedule(mpp_path, backend, use_sidecar_cache, use_session_cache):
+    """
+    Reads the tasks of one schedule file of an ingestion, runs in a pool worker.
+    :param mpp_path:
+    :param backend:
+    :param use_sidecar_cache:
+    :param use_session_cache:
+    :return: tasks, seconds, served from a cache
+    """
+    started = timeit.default_timer()
+    tasks = get_cached_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache)
+    cached = tasks is not None
+    if not cached:
+        tasks = _parse_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache)
+    return tasks, timeit.default_timer() - started, cached
+
+
+def _get_history_executor(max_workers):
+    """
+    Retrieves a process pool on CPython, a thread pool elsewhere,
+    e.g. IronPython where the mpxj runtime lives in the Revit process.
+    :param max_workers:
+    :return: executor and whether the workers share this process
+    """
+    from concurrent import futures
+    if sys.implementation.name == "cpython":
+        return futures.ProcessPoolExecutor(max_workers=max_workers), False
+    return futures.ThreadPoolExecutor(max_workers=max_workers), True
+
+
+def iter_schedule_history(mpp_dir, extensions=None, max_workers=HISTORY_MAX_WORKERS,
+                          backend=None, use_sidecar_cache=True):
+    """
+    Ingests every dated schedule file of a directory concurrently with a bounded worker pool
+    and streams them back in date order as ScheduleIngest, at most max_workers files ahead.
+    Served from the parsed-schedule caches where valid, parsed files (re)build the sidecar cache.
+    :param mpp_dir: e.g. the pyrevit_config_mpp_dir directory
+    :param extensions:
+    :param max_workers:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param use_sidecar_cache:
+    :return:
+    """
+    return iter_schedule_ingests(
+        get_dated_schedule_paths(mpp_dir, extensions), max_workers, backend, use_sidecar_cache,
+    )
+
+
+def iter_schedule_ingests(dated_paths, max_workers, backend, use_sidecar_cache):
+    """
+    Streams the ScheduleIngest of given (iso_date, path) in their order, see iter_schedule_history.
+    :param dated_paths:
+    :param max_workers:
+    :param backend:
+    :param use_sidecar_cache:
+    :return:
+    """
+    if not dated_paths:
+        return
+    executor, in_process = _get_history_executor(min(max_workers, len(dated_paths)))
+    pending = collections.deque()
+    dated_paths = iter(dated_paths)
+    with executor:
+        for iso_date, mpp_path in dated_paths:
+            pending.append((iso_date, mpp_path, executor.submit(
+                _ingest_schedule, mpp_path, backend, use_sidecar_cache, in_process,
+            )))
+            if len(pending) >= max_workers:
+                break
+        while pending:
+            iso_date, mpp_path, future = pending.popleft()
+            tasks, seconds, cached = future.result()
+            for next_iso_date, next_mpp_path in dated_paths:
+                pending.append((next_iso_date, next_mpp_path, executor.submit(
+                    _ingest_schedule, next_mpp_path, backend, use_sidecar_cache, in_process,
+                )))
+                break
+            print("INFO: ingested {} tasks in {:.3f}s{}: {}".format(
+                len(tasks), seconds, " from cache" if cached else "", mpp_path,
+            ))
+            yield ScheduleIngest(iso_date, mpp_path, tasks, seconds, cached)
+
+
+def get_memory_footprint(tasks):
+    """
+    Estimates the bytes held by a list of Task / SheetInfo namedtuples,
+    counting the list, the tuples and every distinct contained object once.
+    :param tasks:
+    :return:
+    """
+    seen_ids = set()
+    total = sys.getsizeof(tasks)
+    for task in tasks:
+        total += sys.getsizeof(task)
+        for value in task:
+            if id(value) in seen_ids:
+                continue
+            seen_ids.add(id(value))
+            total += sys.getsizeof(value)
+    return total
+
+
+class StringTable(object):
+    """
+    Interns strings into small integer codes, shareable between TaskTables.
+    Code 0 is the empty string, code -1 is None.
+    """
+    def __init__(self):
+        self.strings = [""]
+        self.code_by_string = {"": 0}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def get_code(self, text):
+        if text is None:
+            return -1
+        code = self.code_by_string.get(text)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(text)
+            self.code_by_string[text] = code
+        return code
+
+    def get_string(self, code):
+        if code < 0:
+            return None
+        return self.strings[code]
+
+    def get_memory_footprint(self):
+        return (
+            sys.getsizeof(self.strings)
+            + sys.getsizeof(self.code_by_string)
+            + sum(sys.getsizeof(text) for text in self.strings)
+        )
+
+
+class TaskRow(object):
+    """
+    Lightweight view on one row of a TaskTable, offering the Task field names as attributes.
+    """
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getattr__(self, name):
+        return self.table.get_value(self.index, name)
+
+    def __repr__(self):
+        return "TaskRow({})".format(", ".join(
+            "{}={!r}".format(name, self.table.get_value(self.index, name)) for name in TaskTable.FIELDS
+        ))
+
+    def to_task(self):
+        return self.table.get_task(self.index)
+
+
+class TaskTable(object):
+    """
+    Columnar storage of converted tasks: ids and YYMMDD dates in array('i') columns,
+    text fields as codes into a shared StringTable. Missing dates are stored as 0.
+    Holds no mpp_task references.
+    """
+    INT_FIELDS = ("id", "start_date", "end_date", "unique_id")
+    DATE_FIELDS = ("start_date", "end_date")
+    STRING_FIELDS = ("name",) + TASK_TEXT_FIELD_NAMES
+    FIELDS = tuple(name for name in Task._fields if name != "mpp_task")
+
+    def __init__(self, strings=None):
+        self.strings = strings if strings is not None else StringTable()
+        self.columns = {name: array.array("i") for name in self.INT_FIELDS + self.STRING_FIELDS}
+
+    @classmethod
+    def from_tasks(cls, tasks, strings=None):
+        """
+        Builds a TaskTable from an iterable of Task like objects.
+        :param tasks:
+        :param strings: StringTable to share with other tables
+        :return:
+        """
+        table = cls(strings)
+        for task in tasks:
+            table.append(task)
+        return table
+
+    def append(self, task):
+        columns = self.columns
+        for name in self.INT_FIELDS:
+            columns[name].append(getattr(task, name) or 0)
+        get_code = self.strings.get_code
+        for name in self.STRING_FIELDS:
+            columns[name].append(get_code(getattr(task, name)))
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TaskRow(self, index)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            sliced = TaskTable(self.strings)
+            sliced.columns = {name: column[item] for name, column in self.columns.items()}
+            return sliced
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("TaskTable index out of range")
+        return TaskRow(self, item)
+
+    def get_value(self, index, name):
+        if name in self.STRING_FIELDS:
+            return self.strings.get_string(self.columns[name][index])
+        if name in self.DATE_FIELDS:
+            return self.columns[name][index] or ""
+        if name in self.INT_FIELDS:
+            return self.columns[name][index]
+        if name == "mpp_task":
+            return None
+        raise AttributeError("TaskTable has no field: '{}'".format(name))
+
+    def get_task(self, index):
+        """
+        Materializes a row as Task namedtuple.
+        :param index:
+        :return:
+        """
+        return Task(*([self.get_value(index, name) for name in self.FIELDS] + [None]))
+
+    def to_tasks(self):
+        return [self.get_task(index) for index in range(len(self))]
+
+    def codes(self, name):
+        """
+        Retrieves the raw column array: values for id and dates, string codes for text fields.
+        :param name:
+        :return:
+        """
+        return self.columns[name]
+
+    def column(self, name):
+        """
+        Retrieves the decoded values of a column for bulk processing.
+        :param name:
+        :return:
+        """
+        column = self.columns[name]
+        if name in self.STRING_FIELDS:
+            strings = self.strings.strings
+            return [strings[code] if code >= 0 else None for code in column]
+        if name in self.DATE_FIELDS:
+            return [value or "" for value in column]
+        return list(column)
+
+    def get_memory_footprint(self, include_strings=True):
+        """
+        Retrieves the bytes held by the columns and optionally the shared string table.
+        :param include_strings:
+        :return:
+        """
+        total = sys.getsizeof(self) + sys.getsizeof(self.columns)
+        total += sum(sys.getsizeof(column) for column in self.columns.values())
+        if include_strings:
+            total += self.strings.get_memory_footprint()
+        return total
+
+
+def read_task_table(mpp_path, backend=None, strings=None, use_sidecar_cache=True, use_session_cache=True):
+    """
+    Retrieves all tasks of a schedule file as columnar TaskTable.
+    Uncached schedules are streamed into the table without an intermediate Task list.
+    :param mpp_path:
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param strings: StringTable to share with other tables
+    :param use_sidecar_cache:
+    :param use_session_cache:
+    :return:
+    """
+    tasks = get_cached_tasks(mpp_path, backend, use_sidecar_cache, use_session_cache)
+    if tasks is None:
+        tasks = iter_tasks(mpp_path, backend, detached=True)
+    return TaskTable.from_tasks(tasks, strings)
+
+
+class NativeTaskResolver(object):
+    """
+    Re-resolves the native task of detached Task objects by unique id.
+    The schedule file is only read on the first resolve and kept until release.
+    """
+    def __init__(self, mpp_path, backend=None):
+        self.mpp_path = mpp_path
+        self.backend = backend
+        self._task_by_unique_id = None
+
+    def resolve(self, unique_id):
+        """
+        Retrieves the native task (mpxj Task or MspdiTask) with unique_id or None.
+        :param unique_id: unique id or detached Task / SheetInfo object
+        :return:
+        """
+        unique_id = getattr(unique_id, "unique_id", unique_id)
+        if self._task_by_unique_id is None:
+            source_tasks, getters = get_source_tasks_and_getters(self.mpp_path, self.backend)
+            get_unique_id = getters["unique_id"]
+            self._task_by_unique_id = {get_unique_id(task): task for task in source_tasks}
+        return self._task_by_unique_id.get(unique_id)
+
+    def release(self):
+        """
+        Drops the native tasks, so the ProjectFile can be garbage-collected.
+        :return:
+        """
+        self._task_by_unique_id = None
+
+
+def get_normalized_task_type(task_type):
+    """
+    Folds accents and case of a task type, e.g. "Dèmolition" -> "demolition".
+    :param task_type:
+    :return:
+    """
+    if not task_type:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", task_type)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).strip().casefold()
+
+
+def is_designation_pattern(designation):
+    """
+    Checks whether a task designation matches several element designations,
+    e.g. "GLS-Z1*" or "GLS-Z1-?01".
+    :param designation:
+    :return:
+    """
+    return DESIGNATION_ANY_CHAR in designation or designation.endswith(DESIGNATION_ANY_SUFFIX)
+
+
+class _DesignationTrieNode(object):
+    __slots__ = ("children", "value", "suffix_value")
+
+    def __init__(self):
+        self.children = {}
+        self.value = None
+        self.suffix_value = None
+
+
+class DesignationTrie(object):
+    """
+    Trie over task designation patterns: "?" matches exactly one character,
+    a trailing "*" any suffix, including the empty one, a "*" elsewhere is a literal.
+    Lookups backtrack through the literal and the "?" child of every node on the way,
+    each trie node at most once: patterns without "?" cost one path of the designation length,
+    in the worst case, "?" at every position, the lookup visits every pattern prefix
+    up to the designation length, at most 2 ** len(designation) nodes.
+    Patterns diverging from the designation at a literal are never visited.
+    Most specific match wins: at the first position where two matching patterns differ,
+    a literal character beats "?", which beats the "*" suffix.
+    An exact designation therefore beats every pattern, "D0*" beats "D?01"
+    and "D00?" beats "D00*".
+    """
+    def __init__(self, patterns=()):
+        self.root = _DesignationTrieNode()
+        self.size = 0
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, pattern, value):
+        """
+        Adds a pattern, replacing the value of an equal pattern.
+        :param pattern:
+        :param value: returned by match, must not be None
+        :return:
+        """
+        is_suffix = pattern.endswith(DESIGNATION_ANY_SUFFIX)
+        node = self.root
+        for char in pattern[:-1] if is_suffix else pattern:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _DesignationTrieNode()
+            node = child
+        if is_suffix:
+            self.size += node.suffix_value is None
+            node.suffix_value = (pattern, value)
+        else:
+            self.size += node.value is None
+            node.value = (pattern, value)
+
+    def match(self, designation):
+        """
+        Retrieves the most specific pattern matching a designation.
+        :param designation:
+        :return: (pattern, value) or None
+        """
+        # depth first, the most specific branch is pushed last and so tried first,
+        # a "*" suffix passed on the way is pushed as result, with position None
+        stack = [(self.root, 0)]
+        while stack:
+            node, position = stack.pop()
+            if position is None:
+                return node
+            if position == len(designation):
+                if node.value is not None:
+                    return node.value
+                if node.suffix_value is not None:
+                    return node.suffix_value
+                continue
+            if node.suffix_value is not None:
+                stack.append((node.suffix_value, None))
+            for char in (DESIGNATION_ANY_CHAR, designation[position]):
+                child = node.children.get(char)
+                if child is not None:
+                    stack.append((child, position + 1))
+        return None
+
+
+DuplicateKey = collections.namedtuple(
+    typename="DuplicateKey",
+    field_names=[
+        "key_type",
+        "key",
+        "tasks",
+    ],
+)
+
+
+class TaskIndex(object):
+    """
+    Lookups of tasks by designation, sheet number, (task_type, designation) and zone name,
+    built in one pass. Task types are accent and case folded.
+    Unique keys keep the last task, as reading into a dict would, but duplicates are recorded.
+    Tasks with empty keys are not indexed.
+    match_task also resolves designation patterns, see DesignationTrie,
+    the tries are built on the first match after tasks were added.
+    """
+    def __init__(self, tasks=()):
+        self.tasks_by_designation = collections.defaultdict(list)
+        self.tasks_by_zone_name = collections.defaultdict(list)
+        self.task_by_sheet_number = {}
+        self.task_by_task_type_designation = {}
+        self._duplicate_tasks_by_key = collections.OrderedDict()
+        self._designation_trie_by_task_type = None
+        for task in tasks:
+            self.add(task)
+
+    def _add_unique(self, task_by_key, key_type, key, task):
+        existing = task_by_key.get(key)
+        if existing is not None:
+            duplicate_tasks = self._duplicate_tasks_by_key.setdefault((key_type, key), [existing])
+            duplicate_tasks.append(task)
+        task_by_key[key] = task
+
+    def add(self, task):
+        designation = getattr(task, "designation", "")
+        sheet_number = getattr(task, "sheet_number", "")
+        zone_name = getattr(task, "zone_name", "")
+        task_type = get_normalized_task_type(getattr(task, "task_type", ""))
+        if designation:
+            self.tasks_by_designation[designation].append(task)
+            if task_type and is_designation_pattern(designation):
+                self._designation_trie_by_task_type = None
+            if task_type:
+                self._add_unique(
+                    self.task_by_task_type_designation, "task_type_designation", (task_type, designation), task,
+                )
+        if sheet_number:
+            self._add_unique(self.task_by_sheet_number, "sheet_number", sheet_number, task)
+        if zone_name:
+            self.tasks_by_zone_name[zone_name].append(task)
+
+    @property
+    def designations(self):
+        return sorted(self.tasks_by_designation)
+
+    @property
+    def duplicates(self):
+        return [
+            DuplicateKey(key_type=key_type, key=key, tasks=tasks)
+            for (key_type, key), tasks in self._duplicate_tasks_by_key.items()
+        ]
+
+    def get_tasks_by_designation(self, designation):
+        return self.tasks_by_designation.get(designation, [])
+
+    def get_tasks_by_zone_name(self, zone_name):
+        return self.tasks_by_zone_name.get(zone_name, [])
+
+    def get_task_by_sheet_number(self, sheet_number):
+        return self.task_by_sheet_number.get(sheet_number)
+
+    def get_task(self, task_type, designation):
+        """
+        Retrieves the task of a task type for a designation, e.g. ("démolition", "D001").
+        :param task_type: normalized before lookup
+        :param designation:
+        :return:
+        """
+        return self.task_by_task_type_designation.get((get_normalized_task_type(task_type), designation))
+
+    def get_designation_trie(self, task_type):
+        """
+        Retrieves the trie over the designation patterns of a task type.
+        :param task_type: normalized before lookup
+        :return:
+        """
+        if self._designation_trie_by_task_type is None:
+            trie_by_task_type = collections.defaultdict(DesignationTrie)
+            for (pattern_task_type, designation), task in self.task_by_task_type_designation.items():
+                if is_designation_pattern(designation):
+                    trie_by_task_type[pattern_task_type].add(designation, task)
+            self._designation_trie_by_task_type = dict(trie_by_task_type)
+        return self._designation_trie_by_task_type.get(get_normalized_task_type(task_type))
+
+    def match_task(self, task_type, designation):
+        """
+        Retrieves the task of a task type for an element designation, the exact designation
+        or else the most specific designation pattern, e.g. ("démolition", "GLS-Z1-101") -> "GLS-Z1*".
+        :param task_type: normalized before lookup
+        :param designation:
+        :return:
+        """
+        task = self.get_task(task_type, designation)
+        if task is not None:
+            return task
+        trie = self.get_designation_trie(task_type)
+        if trie is None:
+            return None
+        matched = trie.match(designation)
+        if matched is None:
+            return None
+        return matched[1]
+
+    def print_duplicates(self):
+        for duplicate in self.duplicates:
+            print("WARNING: {} tasks share {} {}, using the last one: {}".format(
+                len(duplicate.tasks),
+                duplicate.key_type,
+                duplicate.key,
+                ", ".join(str(getattr(task, "id", "?")) for task in duplicate.tasks),
+            ))
+
+
+MergeConflict = collections.namedtuple(
+    typename="MergeConflict",
+    field_names=[
+        "key_type",
+        "key",
+        "kept_lot",
+        "kept_task",
+        "dropped_lot",
+        "dropped_task",
+    ],
+)
+
+
+class MergedTaskIndex(TaskIndex):
+    """
+    TaskIndex over the schedules of several lots, added lot by lot in ascending precedence:
+    on a unique key shared by lots the task of the lot added last wins.
+    Differing dates or names of such a task are recorded as MergeConflict,
+    identical ones are not, duplicates within one lot are recorded as in TaskIndex.
+    """
+    def __init__(self):
+        TaskIndex.__init__(self)
+        self.lots = []
+        self.conflicts = []
+        self._lot_by_key = {}
+        self._lot = None
+
+    def add_lot(self, lot, tasks):
+        self.lots.append(lot)
+        self._lot = lot
+        for task in tasks:
+            self.add(task)
+
+    def _add_unique(self, task_by_key, key_type, key, task):
+        existing_lot = self._lot_by_key.get((key_type, key), self._lot)
+        self._lot_by_key[(key_type, key)] = self._lot
+        if existing_lot == self._lot:
+            TaskIndex._add_unique(self, task_by_key, key_type, key, task)
+            return
+        existing = task_by_key[key]
+        if any(getattr(existing, name, None) != getattr(task, name, None) for name in MERGE_COMPARE_FIELDS):
+            self.conflicts.append(MergeConflict(key_type, key, self._lot, task, existing_lot, existing))
+        task_by_key[key] = task
+
+    def print_conflicts(self):
+        for conflict in self.conflicts:
+            print("WARNING: lots {} and {} differ on {} {}, using {}: {} - {} '{}', dropped: {} - {} '{}'".format(
+                conflict.kept_lot or "<main>",
+                conflict.dropped_lot or "<main>",
+                conflict.key_type,
+                conflict.key,
+                conflict.kept_lot or "<main>",
+                conflict.kept_task.start_date,
+                conflict.kept_task.end_date,
+                conflict.kept_task.name,
+                conflict.dropped_task.start_date,
+                conflict.dropped_task.end_date,
+                conflict.dropped_task.name,
+            ))
+
+
+def get_schedule_lot(mpp_path):
+    """
+    Retrieves the lot of a schedule file name, e.g. "20240101_LOT2.mpp" -> "LOT2",
+    "" for schedules without lot.
+    :param mpp_path:
+    :return:
+    """
+    found = SCHEDULE_LOT_PATTERN.search(os.path.splitext(os.path.basename(str(mpp_path)))[0][8:])
+    if not found:
+        return ""
+    return found.group("lot").upper()
+
+
+def get_dated_schedule_paths_by_lot(mpp_dir, extensions=None):
+    """
+    Retrieves the dated schedule files of a directory by their lot.
+    :param mpp_dir:
+    :param extensions:
+    :return: OrderedDict of date ordered lists of (iso_date, path) by lot
+    """
+    dated_paths_by_lot = collections.OrderedDict()
+    for iso_date, mpp_path in get_dated_schedule_paths(mpp_dir, extensions):
+        dated_paths_by_lot.setdefault(get_schedule_lot(mpp_path), []).append((iso_date, mpp_path))
+    return dated_paths_by_lot
+
+
+def order_lots_by_precedence(latest_dated_path_by_lot, rule="latest", lot_priority=()):
+    """
+    Orders the latest schedule of every lot by ascending precedence.
+    rule "latest": the newer schedule wins, on equal date the lot_priority.
+    rule "priority": the lot listed first in lot_priority wins, unlisted lots lose by date.
+    :param latest_dated_path_by_lot: (iso_date, path) by lot
+    :param rule: "latest" or "priority"
+    :param lot_priority: lots, highest priority first
+    :return: list of (lot, iso_date, path)
+    """
+    if rule not in MERGE_RULES:
+        raise ValueError("unknown merge rule: '{}', expected one of: {}".format(rule, MERGE_RULES))
+    lot_priority = [lot.upper() for lot in lot_priority]
+
+    def get_priority(lot):
+        if lot in lot_priority:
+            return len(lot_priority) - lot_priority.index(lot)
+        return 0
+
+    def get_precedence(lot):
+        iso_date = latest_dated_path_by_lot[lot][0]
+        if rule == "latest":
+            return iso_date, get_priority(lot), lot
+        return get_priority(lot), iso_date, lot
+
+    return [
+        (lot,) + tuple(latest_dated_path_by_lot[lot])
+        for lot in sorted(latest_dated_path_by_lot, key=get_precedence)
+    ]
+
+
+def read_merged_task_index(mpp_dir, extensions=None, rule="latest", lot_priority=(), backend=None,
+                           max_workers=HISTORY_MAX_WORKERS):
+    """
+    Reads the latest schedule of every lot of a directory, concurrently, and merges them
+    in a single pass into one MergedTaskIndex, see order_lots_by_precedence for the rules.
+    :param mpp_dir:
+    :param extensions:
+    :param rule: "latest" or "priority"
+    :param lot_priority: lots, highest priority first
+    :param backend: "auto", "mpxj" or "mspdi"
+    :param max_workers:
+    :return:
+    """
+    latest_dated_path_by_lot = collections.OrderedDict(
+        (lot, dated_paths[-1]) for lot, dated_paths in get_dated_schedule_paths_by_lot(mpp_dir, extensions).items()
+    )
+    ordered_lots = order_lots_by_precedence(latest_dated_path_by_lot, rule, lot_priority)
+    task_index = MergedTaskIndex()
+    ingests = iter_schedule_ingests(
+        [(iso_date, mpp_path) for lot, iso_date, mpp_path in ordered_lots], max_workers, backend, True,
+    )
+    for (lot, iso_date, mpp_path), ingest in zip(ordered_lots, ingests):
+        print("INFO: merging lot {}: {}".format(lot or "<main>", mpp_path))
+        task_index.add_lot(lot, ingest.tasks)
+    return task_index
+
+
+class _IntervalNode(object):
+    """
+    Node of a centered interval tree: holds the intervals containing its center,
+    sorted by start and by end, with the starts and ends for bisection.
+    """
+    __slots__ = ("center", "by_start", "starts", "by_end", "ends", "left", "right")
+
+    def __init__(self, intervals):
+        endpoints = sorted(endpoint for interval in intervals for endpoint in interval[:2])
+        self.center = center = endpoints[len(endpoints) // 2]
+        left = [interval for interval in intervals if interval[1] < center]
+        right = [interval for interval in intervals if interval[0] > center]
+        here = [interval for interval in intervals if interval[0] <= center <= interval[1]]
+        self.by_start = sorted(here, key=operator.itemgetter(0))
+        self.starts = [interval[0] for interval in self.by_start]
+        self.by_end = sorted(here, key=operator.itemgetter(1))
+        self.ends = [interval[1] for interval in self.by_end]
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+
+class TaskIntervalIndex(object):
+    """
+    Centered interval tree over the YYMMDD start_date / end_date range of tasks.
+    Overlap and point queries run in O(log n + k). Tasks without both dates are not indexed.
+    """
+    def __init__(self, tasks, start_field="start_date", end_field="end_date"):
+        get_start = operator.attrgetter(start_field)
+        get_end = operator.attrgetter(end_field)
+        intervals = []
+        for task in tasks:
+            start = get_start(task)
+            end = get_end(task)
+            if start == "" or end == "":
+                continue
+            intervals.append((min(start, end), max(start, end), task))
+        self.root = _IntervalNode(intervals) if intervals else None
+        self._by_end = sorted(intervals, key=operator.itemgetter(1))
+        self._ends = [interval[1] for interval in self._by_end]
+        self._by_start = sorted(intervals, key=operator.itemgetter(0))
+        self._starts = [interval[0] for interval in self._by_start]
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlapping(self, window_start, window_end):
+        """
+        Retrieves the tasks whose date range overlaps the window [window_start, window_end].
+        :param window_start: YYMMDD
+        :param window_end: YYMMDD
+        :return:
+        """
+        found = []
+        nodes = [self.root] if self.root else []
+        while nodes:
+            node = nodes.pop()
+            if window_end < node.center:
+                # every interval here reaches the center, so it overlaps if it starts early enough
+                found.extend(interval[2] for interval in node.by_start[:bisect.bisect_right(node.starts, window_end)])
+                if node.left:
+                    nodes.append(node.left)
+            elif window_start > node.center:
+                found.extend(interval[2] for interval in node.by_end[bisect.bisect_left(node.ends, window_start):])
+                if node.right:
+                    nodes.append(node.right)
+            else:
+                found.extend(interval[2] for interval in node.by_start)
+                if node.left:
+                    nodes.append(node.left)
+                if node.right:
+                    nodes.append(node.right)
+        return found
+
+    def active_on(self, date):
+        """
+        Retrieves the tasks active on date, start and end date inclusive.
+        :param date: YYMMDD
+        :return:
+        """
+        return self.overlapping(date, date)
+
+    def ended_before(self, date):
+        """
+        Retrieves the tasks ending before date.
+        :param date: YYMMDD
+        :return:
+        """
+        return [interval[2] for interval in self._by_end[:bisect.bisect_left(self._ends, date)]]
+
+    def starting_after(self, date):
+        """
+        Retrieves the tasks starting after date.
+        :param date: YYMMDD
+        :return:
+        """
+        return [interval[2] for interval in self._by_start[bisect.bisect_right(self._starts, date):]]
+
+
+# construction states per designation in the filter override naming of Set_Sheets_Views_Filter_Overrides,
+# by rising precedence: a later demolition state wins over a construction state
+DESIGNATION_STATES = (
+    "not_yet_constructed",
+    "under_construction",
+    "already_constructed",
+    "existing",
+    "being_demolished",
+    "already_demolished",
+)
+
+
+def preview_designation_states(interval_index, sheet_start, sheet_end, project_start=0):
+    """
+    Retrieves the construction state of every scheduled designation for a sheet window,
+    using only interval index queries instead of a scan over all tasks.
+    :param interval_index: TaskIntervalIndex over construction and demolition tasks
+    :param sheet_start: YYMMDD
+    :param sheet_end: YYMMDD
+    :param project_start: YYMMDD, construction ended before counts as existing
+    :return: dict of state name by designation
+    """
+    state_rank_by_designation = {}
+
+    def set_state(task, state):
+        rank = DESIGNATION_STATES.index(state)
+        if rank > state_rank_by_designation.get(task.designation, -1):
+            state_rank_by_designation[task.designation] = rank
+
+    for task in interval_index.starting_after(sheet_end):
+        if get_normalized_task_type(task.task_type) == "construction":
+            set_state(task, "not_yet_constructed")
+    for task in interval_index.overlapping(sheet_start, sheet_end):
+        task_type = get_normalized_task_type(task.task_type)
+        if task_type == "construction":
+            set_state(task, "under_construction")
+        elif task_type == "demolition":
+            set_state(task, "being_demolished")
+    for task in interval_index.ended_before(sheet_start):
+        task_type = get_normalized_task_type(task.task_type)
+        if task_type == "construction":
+            set_state(task, "existing" if task.end_date < project_start else "already_constructed")
+        elif task_type == "demolition":
+            set_state(task, "already_demolished")
+    state_rank_by_designation.pop("", None)
+    return {designation: DESIGNATION_STATES[rank] for designation, rank in state_rank_by_designation.items()}
+
+
+class MpxjWarmUp(background.BackgroundCall):
+    """
+    Loads the mpxj assemblies, builds the reader real reads of warm_up_extension resolve to
+    and reads a one task schedule written by mpxj into a temp file on a background thread,
+    so the first real schedule read hits an initialised IKVM runtime and reader.
+    Cancelling takes effect between the warm-up steps. The thread prints nothing,
+    elapsed (seconds, timed with the utils script timer) and error tell the outcome.
+    """
+    warm_up_extension = ".mpp"
+
+    def __init__(self, backend=None):
+        background.BackgroundCall.__init__(self, "mpxj_warmup", self._warm_up)
+        self.backend = backend or mpxj_backend
+        self.elapsed = None
+        self._cancelled = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def is_finished(self):
+        return self.done
+
+    def start(self):
+        """
+        Starts the warm-up thread, at most once.
+        :return:
+        """
+        with self._start_lock:
+            if self.thread.ident is None:
+                self.thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _warm_up(self):
+        from vrph import utils
+        stopwatch = utils.start_script_timer()
+        try:
+            if self.is_cancelled:
+                return
+            mpxj = self.backend.load()
+            if self.is_cancelled:
+                return
+            self.backend.get_reader("warmup" + self.warm_up_extension)
+            if self.is_cancelled:
+                return
+            self._read_dummy_schedule(mpxj)
+        finally:
+            stopwatch.Stop()
+            self.elapsed = stopwatch.Elapsed.TotalSeconds
+
+    def _read_dummy_schedule(self, mpxj):
+        project = mpxj.ProjectFile()
+        project.addTask().setName("warm-up")
+        dummy_path = os.path.join(tempfile.gettempdir(), "vrph_mpxj_warmup_{}.xml".format(uuid.uuid4().hex))
+        try:
+            mpxj.mspdi.MSPDIWriter().write(project, dummy_path)
+            if self.is_cancelled:
+                return
+            for task in self.backend.read_project(dummy_path).getTasks():
+                convert_mpxj_task_to_task(task, detached=True)
+        finally:
+            if os.path.exists(dummy_path):
+                os.remove(dummy_path)
+
+
+def start_mpxj_warmup():
+    """
+    Starts the process wide MpxjWarmUp unless it already runs or ran, never blocks.
+    :return: the MpxjWarmUp
+    """
+    return _get_process_wide(MPXJ_WARMUP_KEY, MpxjWarmUp).start()
+
+
+def cancel_mpxj_warmup():
+    """
+    Cancels a running process wide MpxjWarmUp, called by buttons before their own read,
+    so the remaining warm-up steps do not compete with it.
+    :return:
+    """
+    warmup = _get_process_wide(MPXJ_WARMUP_KEY)
+    if warmup is not None:
+        warmup.cancel()
+
+
+def get_mpp_overview(mpp_path):
+    """
+    Iterates enumerated over all tasks in a mpp file and returns them.
+    :param mpp_path:
+    :return:
+    """
+    if not mpp_path.exists():
+        print("mpp not found: ", mpp_path)
+    task_list = []
+    for i, project_task in enumerate(iter_sheet_infos(mpp_path)):
+        task_list.append(project_task)
+        print(i, project_task)
+    return task_list
+
+
+def get_tasks_from_mpp(mpp_path):
+    """
+    Retrieve tasks from mpp file.
+    :param mpp_path:
+    :return:
+    """
+    return mpxj_backend.get_source_tasks(mpp_path)
+
+
+if __name__ == "__main__":
+    # the command line lives in vrph.cli, python -m vrph.mpp runs it as well
+    from vrph import cli
+    sys.exit(cli.main())
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Pure python streaming reader for MS Project XML (MSPDI) exports.
+Does neither require clr nor the mpxj library, so it also runs on plain CPython.
+"""
+import collections
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+
+MSPDI_NAMESPACE = "http://schemas.microsoft.com/project"
+
+# MS Project field ids of the task custom text fields Text1 .. Text30
+TEXT_NUMBER_BY_FIELD_ID = {
+    188743731:  1,
+    188743734:  2,
+    188743737:  3,
+    188743740:  4,
+    188743743:  5,
+    188743746:  6,
+    188743747:  7,
+    188743748:  8,
+    188743749:  9,
+    188743750: 10,
+}
+TEXT_NUMBER_BY_FIELD_ID.update({188743997 + i: 11 + i for i in range(20)})
+FIELD_ID_BY_TEXT_NUMBER = {v: k for k, v in TEXT_NUMBER_BY_FIELD_ID.items()}
+
+DATE_MEMO_MAX_SIZE = 100000
+_truncated_iso_short_by_date_text = {}
+
+
+MspdiTask = collections.namedtuple(
+    typename="MspdiTask",
+    field_names=[
+        "uid",
+        "id",
+        "name",
+        "start",
+        "finish",
+        "texts",
+    ],
+)
+
+
+def _local_name(tag):
+    """
+    Strips the xml namespace from an element tag.
+    :param tag:
+    :return:
+    """
+    if tag[0] == "{":
+        return tag.rsplit("}", 1)[1]
+    return tag
+
+
+def get_date_truncated_iso_short(date_text):
+    """
+    Retrieves YYMMDD date format from iso8601 date text, e.g. 2023-12-31T08:00:00 -> 231231
+    Memoised, schedules have thousands of tasks but only a few hundred distinct dates.
+    An unparseable date text is reported once and read as missing date.
+    :param date_text:
+    :return:
+    """
+    if not date_text:
+        return ""
+    truncated = _truncated_iso_short_by_date_text.get(date_text)
+    if truncated is None:
+        if len(_truncated_iso_short_by_date_text) >= DATE_MEMO_MAX_SIZE:
+            _truncated_iso_short_by_date_text.clear()
+        try:
+            if date_text[4:5] != "-" or date_text[7:8] != "-":
+                raise ValueError("not an iso8601 date")
+            truncated = get_truncated_iso_short(date_text[0:4], date_text[5:7], date_text[8:10])
+        except ValueError:
+            # memoised as well, so a bad date text is reported once, not for every task
+            print("WARNING: skipped unparseable date: '{}'".format(date_text))
+            truncated = ""
+        _truncated_iso_short_by_date_text[date_text] = truncated
+    return truncated
+
+
+def get_truncated_iso_short(year, month, day):
+    """
+    Retrieves YYMMDD date format from date part texts, e.g. ("2023", "12", "31") -> 231231
+    :param year:
+    :param month:
+    :param day:
+    :return:
+    :raises ValueError: on a non numeric or out of range part
+    """
+    year, month, day = int(year), int(month), int(day)
+    if not 1 <= month <= 12 or not 1 <= day <= 31:
+        raise ValueError("month or day out of range")
+    return year % 100 * 10000 + month * 100 + day
+
+
+def _parse_int(text, default=0):
+    if not text:
+        return default
+    return int(text)
+
+
+def _parse_task_element(task_elem):
+    """
+    Converts a fully read <Task> element into a MspdiTask.
+    :param task_elem:
+    :return:
+    """
+    values = {}
+    texts = {}
+    for child in task_elem:
+        name = _local_name(child.tag)
+        if name == "ExtendedAttribute":
+            field_id = None
+            value = None
+            for attr_child in child:
+                attr_name = _local_name(attr_child.tag)
+                if attr_name == "FieldID":
+                    field_id = _parse_int(attr_child.text, None)
+                elif attr_name == "Value":
+                    value = attr_child.text
+            text_number = TEXT_NUMBER_BY_FIELD_ID.get(field_id)
+            if text_number and value:
+                texts[text_number] = value
+        else:
+            values[name] = child.text
+    return MspdiTask(
+        uid=_parse_int(values.get("UID")),
+        id=_parse_int(values.get("ID")),
+        name=values.get("Name"),
+        start=get_date_truncated_iso_short(values.get("Start")),
+        finish=get_date_truncated_iso_short(values.get("Finish")),
+        texts=texts,
+    )
+
+
+def iter_mspdi_tasks(xml_path):
+    """
+    Streams all tasks of a mspdi xml file as MspdiTask records.
+    Every element is discarded as soon as it was read, so memory
+    stays flat regardless of the schedule size.
+    :param xml_path:
+    :return:
+    """
+    depth = 0
+    section = None
+    section_name = ""
+    for event, elem in ElementTree.iterparse(str(xml_path), events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2:
+                section = elem
+                section_name = _local_name(elem.tag)
+            continue
+        depth -= 1
+        if depth == 2:
+            # direct child of a project section: Task, Resource, Assignment, ..
+            if section_name == "Tasks" and _local_name(elem.tag) == "Task":
+                yield _parse_task_element(elem)
+            elem.clear()
+            section.remove(elem)
+        elif depth == 1:
+            elem.clear()
+
+
+FixtureRow = collections.namedtuple(
+    typename="FixtureRow",
+    field_names=[
+        "uid",
+        "id",
+        "name",
+        "start",
+        "finish",
+        "texts",
+    ],
+)
+
+FIXTURE_TASK_TYPES = ("Construction", "Démolition")
+
+
+def get_fixture_texts(task_index):
+    """
+    Retrieves the generated texts of a fixture task:
+    two tasks per designation, alternating task types, one sheet number each and 17 zones.
+    :param task_index:
+    :return: dict of value by text number
+    """
+    return {
+        1: "D{:05d}".format(task_index // 2),
+        2: FIXTURE_TASK_TYPES[task_index % 2],
+        4: "S{:05d}".format(task_index),
+        11: "Z{:02d}".format(task_index % 17),
+    }
+
+
+def iter_fixture_rows(task_count, texts_by_task_index=None):
+    """
+    Generates the synthetic task rows every test fixture and benchmark input is written from,
+    starting at one of 336 days over ten years and finishing one year later.
+    :param task_count:
+    :param texts_by_task_index: callable returning a {text_number: value} dict, default get_fixture_texts
+    :return: FixtureRow with dates as (year, month, day)
+    """
+    texts_by_task_index = texts_by_task_index or get_fixture_texts
+    for i in range(task_count):
+        year = 2020 + (i // 336) % 10
+        month = 1 + (i // 28) % 12
+        day = 1 + i % 28
+        yield FixtureRow(
+            uid=i + 1,
+            id=i + 1,
+            name="task {}".format(i),
+            start=(year, month, day),
+            finish=(year + 1, month, day),
+            texts=texts_by_task_index(i),
+        )
+
+
+def write_mspdi_fixture(xml_path, task_count, texts_by_task_index=None):
+    """
+    Writes a synthetic mspdi xml file with task_count tasks of iter_fixture_rows,
+    e.g. as test fixture or benchmark input.
+    :param xml_path:
+    :param task_count:
+    :param texts_by_task_index: callable returning a {text_number: value} dict, default get_fixture_texts
+    :return:
+    """
+    with open(str(xml_path), "w", encoding="utf-8") as xml:
+        xml.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n')
+        xml.write('<Project xmlns="{}">\n'.format(MSPDI_NAMESPACE))
+        xml.write("<Name>fixture</Name>\n<Tasks>\n")
+        for row in iter_fixture_rows(task_count, texts_by_task_index):
+            xml.write("<Task><UID>{uid}</UID><ID>{id}</ID><Name>{name}</Name>".format(
+                uid=row.uid,
+                id=row.id,
+                name=escape(row.name),
+            ))
+            xml.write("<Start>{:04d}-{:02d}-{:02d}T08:00:00</Start>".format(*row.start))
+            xml.write("<Finish>{:04d}-{:02d}-{:02d}T17:00:00</Finish>".format(*row.finish))
+            for text_number in sorted(row.texts):
+                xml.write("<ExtendedAttribute><FieldID>{}</FieldID><Value>{}</Value></ExtendedAttribute>".format(
+                    FIELD_ID_BY_TEXT_NUMBER[text_number],
+                    escape(row.texts[text_number]),
+                ))
+            xml.write("</Task>\n")
+        xml.write("</Tasks>\n</Project>\n")
+    return xml_path
@@ -35,22 +35,162 @@ def encode_cp1252_to_utf8(txt):
     return ""
 
 
-def get_param_binding_entries_by_category_id():
+def _get_doc_key(document):
+    return document.PathName or document.Title
+
+
+def _count_document_change(document):
+    change_count_by_doc_key = _get_param_bindings_state()["change_count_by_doc_key"]
+    doc_key = _get_doc_key(document)
+    change_count_by_doc_key[doc_key] = change_count_by_doc_key.get(doc_key, 0) + 1
+
+
+def _on_document_changed(sender, args):
+    # every transaction, undo and redo included, raises DocumentChanged, bindings only change in one
+    _count_document_change(args.GetDocument())
+
+
+def _on_document_opened(sender, args):
+    # a reopened document has new definitions under the same path
+    _count_document_change(args.Document)
+
+
+def _get_param_bindings_state(document=None):
     """
-    Retrieve an overview map of parameter bindings in the document by category id.
-    Returns: dict
+    Retrieves the process wide state of the parameter bindings cache. Within Revit it is stored
+    in the AppDomain, so it survives between button clicks, otherwise in this module.
+    Given a document, the handlers counting document changes are registered once.
+    :param document:
+    :return: dict
     """
-    param_binding_entries_by_cat_id = collections.defaultdict(dict)
-    pb_iter = doc.ParameterBindings.ForwardIterator()
+    try:
+        from System import AppDomain
+    except ImportError:
+        AppDomain = None
+    if AppDomain is None:
+        state = _param_bindings_state
+    else:
+        state = AppDomain.CurrentDomain.GetData(PARAM_BINDINGS_CACHE_KEY)
+        if state is None:
+            state = {}
+            AppDomain.CurrentDomain.SetData(PARAM_BINDINGS_CACHE_KEY, state)
+    if not state:
+        state.update(change_count_by_doc_key={}, bindings_by_doc_key={}, handler_registered=False)
+    if document is not None and not state["handler_registered"]:
+        document.Application.DocumentChanged += _on_document_changed
+        document.Application.DocumentOpened += _on_document_opened
+        state["handler_registered"] = True
+    return state
+
+
+def _read_param_bindings(document):
+    """
+    Iterates the parameter bindings of a document.
+    :param document:
+    :return: ParamBinding by definition id, ParamBinding lists by category id
+    """
+    param_binding_by_definition_id = collections.OrderedDict()
+    param_bindings_by_cat_id = collections.defaultdict(list)
+    pb_iter = document.ParameterBindings.ForwardIterator()
     pb_iter.Reset()
     while pb_iter.MoveNext():
         entry = pb_iter.Current
-        name = pb_iter.Key.Name
-        cat_ids = [c.Id.IntegerValue for c in entry.Categories]
-        for cat_id in cat_ids:
-            param_binding_entries_by_cat_id[cat_id][name] = pb_iter.Key
+        param_binding = ParamBinding(
+            name=pb_iter.Key.Name,
+            definition=pb_iter.Key,
+            is_instance=entry.GetType().Name == "InstanceBinding",
+            category_name_by_id={c.Id.IntegerValue: c.Name for c in entry.Categories},
+        )
+        param_binding_by_definition_id[pb_iter.Key.Id.IntegerValue] = param_binding
+        for cat_id in param_binding.category_name_by_id:
+            param_bindings_by_cat_id[cat_id].append(param_binding)
+    return param_binding_by_definition_id, dict(param_bindings_by_cat_id)
 
-    return param_binding_entries_by_cat_id
+
+def _get_cached_param_bindings(document=None):
+    """
+    Retrieves the parameter bindings of a document, iterated once and cached until
+    the document changes: the cache signature is the count of DocumentChanged and
+    DocumentOpened events of the document and the binding count.
+    :param document: defaults to the active document
+    :return: ParamBinding by definition id, ParamBinding lists by category id
+    """
+    document = document or doc
+    state = _get_param_bindings_state(document)
+    doc_key = _get_doc_key(document)
+    signature = state["change_count_by_doc_key"].get(doc_key, 0), document.ParameterBindings.Size
+    cached_signature, param_bindings = state["bindings_by_doc_key"].get(doc_key, (None, None))
+    if param_bindings is None or cached_signature != signature:
+        param_bindings = _read_param_bindings(document)
+        state["bindings_by_doc_key"][doc_key] = signature, param_bindings
+    return param_bindings
+
+
+def clear_param_bindings_cache():
+    _get_param_bindings_state()["bindings_by_doc_key"].clear()
+
+
+def get_param_bindings(document=None):
+    """
+    Retrieves the parameter bindings in the document by definition id,
+    parameters sharing a name keep their own binding.
+    :param document: defaults to the active document
+    :return: OrderedDict of ParamBinding
+    """
+    return _get_cached_param_bindings(document)[0]
+
+
+def get_param_bindings_by_name(document=None):
+    """
+    Retrieves the parameter bindings in the document by parameter name,
+    a list since project and shared parameters may share a name.
+    :param document: defaults to the active document
+    :return: dict of ParamBinding lists
+    """
+    param_bindings_by_name = collections.defaultdict(list)
+    for param_binding in get_param_bindings(document).values():
+        param_bindings_by_name[param_binding.name].append(param_binding)
+    return dict(param_bindings_by_name)
+
+
+def get_param_binding_entries_by_category_id(document=None):
+    """
+    Retrieve an overview map of parameter bindings in the document by category id.
+    :param document: defaults to the active document
+    :return: dict of ParamBinding lists
+    """
+    return _get_cached_param_bindings(document)[1]
+
+
+def get_categories_binding_all_params(param_names, as_instance_binding=True, document=None):
+    """
+    Retrieves the categories where all parameters are bound as instance or type parameters,
+    and why the other categories binding any of them were skipped.
+    :param param_names:
+    :param as_instance_binding:
+    :param document: defaults to the active document
+    :return: category name by id, skip reason by category name
+    """
+    binding_kind = "instance" if as_instance_binding else "type"
+    bound_category_name_by_id = {}
+    skip_reason_by_category_name = {}
+    for cat_id, param_bindings in get_param_binding_entries_by_category_id(document).items():
+        param_bindings = [param_binding for param_binding in param_bindings if param_binding.name in param_names]
+        if not param_bindings:
+            continue
+        problems = []
+        for param_name in param_names:
+            binding_kinds = {pb.is_instance for pb in param_bindings if pb.name == param_name}
+            if not binding_kinds:
+                problems.append("{} not bound".format(param_name))
+            elif as_instance_binding not in binding_kinds:
+                problems.append("{} not bound as {}".format(param_name, binding_kind))
+        cat_name = param_bindings[0].category_name_by_id[cat_id]
+        if problems:
+            skip_reason_by_category_name[cat_name] = ", ".join(problems)
+        else:
+            bound_category_name_by_id[cat_id] = cat_name
+    return bound_category_name_by_id, skip_reason_by_category_name
 
 
 def get_param_binding_entries_by_type_inst():
@@ -84,25 +224,10 @@ def parameter_binding_exists(param_name, as_instance_binding, category_id):
     :param category_id:
     :return:
     """
-    param_binding_iter = doc.ParameterBindings.ForwardIterator()
-    param_binding_iter.Reset()
-    while param_binding_iter.MoveNext():
-        skip = True
-        item = param_binding_iter.Current
-        type_inst = item.GetType().Name
-        if   type_inst == "InstanceBinding" and as_instance_binding is True:
-            skip = False
-        elif type_inst == "TypeBinding"     and as_instance_binding is False:
-            skip = False
-        if skip:
-            continue
-        binding_name = param_binding_iter.Key.Name
-        if binding_name != param_name:
-            continue
-        for category in item.Categories:
-            if category_id == category.Id.IntegerValue:
-                return True
-    return False
+    return any(
+        param_binding.is_instance is as_instance_binding and param_binding.name == param_name
+        for param_binding in get_param_binding_entries_by_category_id().get(category_id, [])
+    )
 
 
 def get_info_map(element, verbose=None, name=None, regex=None):
@@ -206,6 +331,127 @@ def set_val(elem, param_name, value, param=None, bip=False):
         print("param not found: {}".format(param_name))
 
 
+def _is_value_of_storage_type(value, dtype):
+    """
+    Checks whether a value can be set on a parameter of a storage type.
+    :param value:
+    :param dtype:
+    :return:
+    """
+    if dtype == StorageType.String:
+        return value is None or isinstance(value, str)
+    if dtype == StorageType.Integer:
+        return isinstance(value, int)
+    if dtype == StorageType.Double:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if dtype == StorageType.ElementId:
+        return isinstance(value, ElementId)
+    return False
+
+
+def _is_value_equal(current, value, dtype):
+    if dtype == StorageType.String:
+        return (current or "") == (value or "")
+    if dtype == StorageType.Double:
+        return abs(current - value) < DOUBLE_TOLERANCE
+    if dtype == StorageType.ElementId:
+        return current.IntegerValue == value.IntegerValue
+    return current == value
+
+
+class BulkParamWriter(object):
+    """
+    Writes many (element, {param_name: value}) updates, only values differing from the current ones.
+    Parameter names are resolved once to their bound definitions, which are retrieved per element
+    faster than by name, unbound names fall back to LookupParameter.
+    Writing must happen inside a transaction of the caller.
+    Counts written, unchanged, missing, type_mismatch and read_only parameters,
+    warns once per parameter name about the latter three.
+    """
+    def __init__(self, document=None):
+        self.document = document or doc
+        self.counts = collections.OrderedDict((name, 0) for name in BULK_WRITE_COUNT_NAMES)
+        self.elements_written = 0
+        self._definitions_by_name = None
+        self._warned_keys = set()
+
+    def get_param(self, element, param_name):
+        if self._definitions_by_name is None:
+            self._definitions_by_name = {
+                name: [param_binding.definition for param_binding in param_bindings]
+                for name, param_bindings in get_param_bindings_by_name(self.document).items()
+            }
+        for definition in self._definitions_by_name.get(param_name, ()):
+            param = element.get_Parameter(definition)
+            if param:
+                return param
+        return element.LookupParameter(param_name)
+
+    def write_param(self, param, value):
+        """
+        Writes a value if it differs from the current value of the parameter.
+        :param param:
+        :param value:
+        :return: count name
+        """
+        if not param:
+            return "missing"
+        dtype = param.StorageType
+        if not _is_value_of_storage_type(value, dtype):
+            return "type_mismatch"
+        # strings without value read as None, other types as 0, which could equal the new value
+        has_value = param.HasValue or dtype == StorageType.String
+        if has_value and _is_value_equal(dtype_methods[dtype](param), value, dtype):
+            return "unchanged"
+        if param.IsReadOnly:
+            return "read_only"
+        if dtype == StorageType.String:
+            value = value or ""
+        param.Set(value)
+        return "written"
+
+    def update(self, element, value_by_param_name):
+        """
+        Writes the differing parameter values of an element.
+        :param element:
+        :param value_by_param_name:
+        :return: count of written parameters
+        """
+        written_count = 0
+        for param_name, value in value_by_param_name.items():
+            count_name = self.write_param(self.get_param(element, param_name), value)
+            self.counts[count_name] += 1
+            if count_name == "written":
+                written_count += 1
+            elif count_name != "unchanged" and (count_name, param_name) not in self._warned_keys:
+                self._warned_keys.add((count_name, param_name))
+                print("WARNING: {} param {} e.g. of element {}: {}".format(
+                    count_name,
+                    param_name,
+                    element.Id.IntegerValue,
+                    value,
+                ))
+        if written_count:
+            self.elements_written += 1
+        return written_count
+
+    def update_many(self, updates):
+        """
+        Writes the differing parameter values of many elements.
+        :param updates: iterable of (element, {param_name: value})
+        :return: counts by count name
+        """
+        for element, value_by_param_name in updates:
+            self.update(element, value_by_param_name)
+        return self.counts
+
+    def print_counts(self):
+        print("params {}, elements written: {}".format(
+            ", ".join("{}: {}".format(name, count) for name, count in self.counts.items()),
+            self.elements_written,
+        ))
+
+
 def get_comments(elem):
     """
     Convenience function to get comments value from element.
@@ -301,6 +547,8 @@ dtype_conversions = {
     StorageType.Double   : Convert.ToDouble,
     StorageType.ElementId: ElementId,
 }
+DOUBLE_TOLERANCE = 1e-9
+BULK_WRITE_COUNT_NAMES = ("written", "unchanged", "missing", "type_mismatch", "read_only")
 bip_map = {
     "comments"                   : Bip.ALL_MODEL_INSTANCE_COMMENTS,
     "department"                 : Bip.ROOM_DEPARTMENT,
@@ -347,6 +595,10 @@ if RVT_MAJ_VERSION > 2022:
 
 bip_map_reverse_map = {v: k for k, v in bip_map.items()}
 
+ParamBinding = collections.namedtuple("ParamBinding", "name definition is_instance category_name_by_id")
+PARAM_BINDINGS_CACHE_KEY = "VRPH_PARAM_BINDINGS_CACHE"
+_param_bindings_state = {}
+
 ParamInfo = collections.namedtuple("ParamInfo", "type_param name value dtype has_value shared read_only param")
 TITLE_INST_PARAMS = "INSTANCE PARAMETERS" + 50 * "_"
 TITLE_TYPE_PARAMS = "TYPE PARAMETERS    " + 50 * "_"
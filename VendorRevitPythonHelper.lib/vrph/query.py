@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+Element queries pushed down to Revit: one collector over all categories with a
+multi-category filter and parameter value rules, instead of a collector per category
+and a LookupParameter per element in python.
+Queries are plain data, run by an ElementSource: RevitElementSource inside Revit,
+FakeElementSource on an in-memory document, e.g. for tests and benchmarks on plain CPython.
+"""
+import collections
+import timeit
+
+
+# parameter value rule operators, an empty rule list requires any value
+RULE_OPERATORS = ("equals", "begins_with")
+QUERY_MAX_VALUE_RULES = 200
+
+# wildcards of task designation patterns, as in mpp.DesignationTrie
+DESIGNATION_WILDCARDS = ("?", "*")
+
+
+ValueRule = collections.namedtuple(
+    typename="ValueRule",
+    field_names=[
+        "operator",
+        "value",
+    ],
+)
+
+
+ElementQuery = collections.namedtuple(
+    typename="ElementQuery",
+    field_names=[
+        "category_ids",
+        "param_name",
+        "value_rules",
+    ],
+)
+
+
+def get_designation_value_rules(designations):
+    """
+    Retrieves value rules matching at least the elements of the chosen task designations:
+    "equals" for designations, "begins_with" the literal prefix for designation patterns.
+    Rules are a superset filter, the exact designation matching stays with mpp.TaskIndex.match_task.
+    :param designations: None for any designation
+    :return: tuple of ValueRule, empty for any value
+    """
+    if designations is None:
+        return ()
+    rules = set()
+    for designation in designations:
+        wildcard_positions = [designation.find(char) for char in DESIGNATION_WILDCARDS if char in designation]
+        if not wildcard_positions:
+            rules.add(ValueRule("equals", designation))
+            continue
+        prefix = designation[:min(wildcard_positions)]
+        if not prefix:
+            return ()
+        rules.add(ValueRule("begins_with", prefix))
+    if len(rules) > QUERY_MAX_VALUE_RULES:
+        print("INFO: {} designation rules exceed {}, querying any designation".format(
+            len(rules), QUERY_MAX_VALUE_RULES,
+        ))
+        return ()
+    return tuple(sorted(rules))
+
+
+def get_designation_query(category_ids, param_name, designations=None):
+    """
+    Builds the query of the non-type elements of categories carrying a designation.
+    :param category_ids: integer category ids, e.g. -2000011 for walls
+    :param param_name: designation parameter name
+    :param designations: chosen task designations, None for any designation
+    :return: ElementQuery
+    """
+    return ElementQuery(
+        category_ids=tuple(sorted(category_ids)),
+        param_name=param_name,
+        value_rules=get_designation_value_rules(designations),
+    )
+
+
+def is_value_matching(value, value_rules):
+    """
+    Checks a parameter value against value rules, as Revit evaluates them.
+    :param value:
+    :param value_rules:
+    :return:
+    """
+    if not value:
+        return False
+    if not value_rules:
+        return True
+    for rule in value_rules:
+        if rule.operator == "equals" and value == rule.value:
+            return True
+        if rule.operator == "begins_with" and value.startswith(rule.value):
+            return True
+    return False
+
+
+class ElementSource(object):
+    """
+    Runs ElementQuery on a document.
+    """
+    name = ""
+
+    def iter_element_ids(self, query):
+        """
+        Streams the ids of the elements matching a query.
+        :param query: ElementQuery
+        :return:
+        """
+        raise NotImplementedError
+
+    def get_element(self, element_id):
+        raise NotImplementedError
+
+    def iter_elements(self, query):
+        """
+        Streams the elements matching a query, each retrieved on demand.
+        :param query: ElementQuery
+        :return:
+        """
+        for element_id in self.iter_element_ids(query):
+            yield self.get_element(element_id)
+
+
+class RevitElementSource(ElementSource):
+    """
+    Runs ElementQuery as a single FilteredElementCollector with an ElementMulticategoryFilter
+    and an ElementParameterFilter, so Revit only hands matching element ids to python.
+    """
+    name = "revit"
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._param_id_by_name = {}
+
+    def get_param_id(self, param_name):
+        """
+        Retrieves the id of a project or shared parameter from the parameter bindings.
+        :param param_name:
+        :return: None if the parameter is not bound in the document
+        """
+        if param_name not in self._param_id_by_name:
+            param_id = None
+            binding_iter = self.doc.ParameterBindings.ForwardIterator()
+            binding_iter.Reset()
+            while binding_iter.MoveNext():
+                if binding_iter.Key.Name == param_name:
+                    param_id = binding_iter.Key.Id
+                    break
+            self._param_id_by_name[param_name] = param_id
+        return self._param_id_by_name[param_name]
+
+    def get_param_filter(self, param_id, value_rules):
+        """
+        Builds the parameter filter of the value rules, OR combined.
+        :param param_id:
+        :param value_rules:
+        :return:
+        """
+        from Autodesk.Revit.DB import ElementFilter, ElementParameterFilter, LogicalOrFilter
+        from Autodesk.Revit.DB import ParameterFilterRuleFactory as Rules
+        from System.Collections.Generic import List
+
+        if not value_rules:
+            return ElementParameterFilter(Rules.CreateHasValueParameterRule(param_id))
+        create_rule_by_operator = {
+            "equals"     : Rules.CreateEqualsRule,
+            "begins_with": Rules.CreateBeginsWithRule,
+        }
+        value_filters = [
+            ElementParameterFilter(create_rule_by_operator[rule.operator](param_id, rule.value))
+            for rule in value_rules
+        ]
+        if len(value_filters) == 1:
+            return value_filters[0]
+        return LogicalOrFilter(List[ElementFilter](value_filters))
+
+    def get_collector(self, query):
+        """
+        Builds the collector of a query, before any element is retrieved.
+        :param query: ElementQuery
+        :return: None if the parameter is not bound in the document
+        """
+        from Autodesk.Revit.DB import ElementId, ElementMulticategoryFilter, FilteredElementCollector
+        from System.Collections.Generic import List
+
+        param_id = self.get_param_id(query.param_name)
+        if param_id is None:
+            print("WARNING: parameter not bound in document: {}".format(query.param_name))
+            return None
+        category_ids = List[ElementId]([ElementId(cat_id) for cat_id in query.category_ids])
+        category_filter = ElementMulticategoryFilter(category_ids)
+        return (
+            FilteredElementCollector(self.doc)
+            .WherePasses(category_filter)
+            .WhereElementIsNotElementType()
+            .WherePasses(self.get_param_filter(param_id, query.value_rules))
+        )
+
+    def iter_element_ids(self, query):
+        """
+        Streams the ids of the elements matching a query.
+        The ids are read up front, since iterating a collector while
+        the elements are modified in a transaction throws.
+        :param query: ElementQuery
+        :return:
+        """
+        collector = self.get_collector(query)
+        if collector is None:
+            return
+        for element_id in collector.ToElementIds():
+            yield element_id
+
+    def get_element(self, element_id):
+        return self.doc.GetElement(element_id)
+
+
+class FakeParameter(object):
+    """
+    In-memory stand-in for a Revit string parameter.
+    """
+    def __init__(self, element, name):
+        self.element = element
+        self.name = name
+
+    @property
+    def HasValue(self):
+        return bool(self.element.values.get(self.name))
+
+    def AsString(self):
+        self.element.doc.param_read_count += 1
+        return self.element.values.get(self.name)
+
+    def Set(self, value):
+        self.element.doc.param_write_count += 1
+        self.element.values[self.name] = value
+
+
+class FakeElement(object):
+    """
+    In-memory stand-in for a Revit element with parameter values by name.
+    """
+    def __init__(self, doc, element_id, category_id, values):
+        self.doc = doc
+        self.Id = element_id
+        self.category_id = category_id
+        self.values = values
+
+    def LookupParameter(self, name):
+        self.doc.param_lookup_count += 1
+        if name not in self.values:
+            return None
+        return FakeParameter(self, name)
+
+
+class FakeElementSource(ElementSource):
+    """
+    In-memory document, counting the elements and parameters python retrieves.
+    Queries are evaluated without a retrieval, as Revit evaluates filters natively.
+    collect_category mimics the legacy collector per category with ToElements.
+    """
+    name = "fake"
+
+    def __init__(self):
+        self.element_by_id = collections.OrderedDict()
+        self.element_ids_by_category_id = collections.defaultdict(list)
+        self.element_retrieval_count = 0
+        self.param_lookup_count = 0
+        self.param_read_count = 0
+        self.param_write_count = 0
+
+    def add_element(self, category_id, values):
+        element = FakeElement(self, len(self.element_by_id) + 1, category_id, dict(values))
+        self.element_by_id[element.Id] = element
+        self.element_ids_by_category_id[category_id].append(element.Id)
+        return element
+
+    def reset_counts(self):
+        self.element_retrieval_count = 0
+        self.param_lookup_count = 0
+        self.param_read_count = 0
+        self.param_write_count = 0
+
+    def collect_category(self, category_id):
+        element_ids = self.element_ids_by_category_id.get(category_id, [])
+        self.element_retrieval_count += len(element_ids)
+        return [self.element_by_id[element_id] for element_id in element_ids]
+
+    def iter_element_ids(self, query):
+        for category_id in query.category_ids:
+            for element_id in self.element_ids_by_category_id.get(category_id, []):
+                value = self.element_by_id[element_id].values.get(query.param_name)
+                if is_value_matching(value, query.value_rules):
+                    yield element_id
+
+    def get_element(self, element_id):
+        self.element_retrieval_count += 1
+        return self.element_by_id[element_id]
+
+
+def get_fake_element_source(element_count=200000, category_ids=tuple(range(-2000110, -2000000)),
+                            param_name="designation", designated_ratio=0.05, designation_count=500):
+    """
+    Builds a fake document, where only designated_ratio of the elements carry a designation.
+    :param element_count:
+    :param category_ids:
+    :param param_name:
+    :param designated_ratio:
+    :param designation_count:
+    :return:
+    """
+    element_source = FakeElementSource()
+    designated_every = max(1, int(round(1 / designated_ratio))) if designated_ratio else 0
+    for i in range(element_count):
+        values = {param_name: ""}
+        if designated_every and i % designated_every == 0:
+            values[param_name] = "D{:05d}".format((i // designated_every) % designation_count)
+        element_source.add_element(category_ids[i % len(category_ids)], values)
+    return element_source
+
+
+def benchmark_element_query(element_count=200000, category_count=110, designated_ratio=0.05, repeat=3):
+    """
+    Benchmark of the element selection on a fake document: legacy collector per category
+    with a LookupParameter per element versus one pushed down query,
+    for any designation and for one chosen designation.
+    The timings only show the python side of the fake, compare the retrieval and lookup counts:
+    Revit builds every element python receives, which the filters of the query avoid.
+    :param element_count:
+    :param category_count:
+    :param designated_ratio:
+    :param repeat:
+    :return: dict of (seconds, element retrievals, parameter lookups) by method
+    """
+    param_name = "designation"
+    category_ids = tuple(range(-2000000 - category_count, -2000000))
+    element_source = get_fake_element_source(element_count, category_ids, param_name, designated_ratio)
+    chosen = {"D00001"}
+
+    def legacy(designations):
+        found = []
+        for category_id in category_ids:
+            for element in element_source.collect_category(category_id):
+                designation_param = element.LookupParameter(param_name)
+                if not designation_param:
+                    continue
+                designation = designation_param.AsString()
+                if not designation or (designations is not None and designation not in designations):
+                    continue
+                found.append(element)
+        return found
+
+    def pushed_down(designations):
+        return list(element_source.iter_elements(get_designation_query(category_ids, param_name, designations)))
+
+    methods = (
+        ("legacy any", lambda: legacy(None)),
+        ("query any", lambda: pushed_down(None)),
+        ("legacy one", lambda: legacy(chosen)),
+        ("query one", lambda: pushed_down(chosen)),
+    )
+    results_by_method = {}
+    for name, method in methods:
+        element_source.reset_counts()
+        found_count = len(method())
+        retrieval_count = element_source.element_retrieval_count
+        lookup_count = element_source.param_lookup_count
+        seconds = min(timeit.repeat(method, number=1, repeat=repeat))
+        results_by_method[name] = (seconds, retrieval_count, lookup_count)
+        print("{:<11} {:8.4f}s {:7} found {:7} retrieved {:7} parameter lookups".format(
+            name, seconds, found_count, retrieval_count, lookup_count,
+        ))
+    return results_by_method
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Binary columnar task snapshots: a mpp.TaskTable written once into a file,
+memory-mapped on open instead of re-parsing the schedule.
+"""
+import array
+import collections
+import mmap
+import os
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import timeit
+import uuid
+
+from vrph import mpp, mspdi
+
+
+# binary columnar task snapshot, see write_task_snapshot
+SNAPSHOT_MAGIC = b"VRPHSNAP"
+# bump on any change of the TaskTable columns, they are not listed in the file
+SNAPSHOT_VERSION = 3
+SNAPSHOT_SUFFIX = ".vrph_snapshot"
+SNAPSHOT_HEADER = struct.Struct("<8sIIII")
+
+
+class SnapshotStringTable(object):
+    """
+    Read-only StringTable of a TaskSnapshot, decoding strings on access only.
+    The strings are stored sorted by their utf-8 bytes, so codes are looked up by bisection.
+    """
+    def __init__(self, snapshot_mmap, offsets, blob_start):
+        self._mmap = snapshot_mmap
+        self._offsets = offsets
+        self._blob_start = blob_start
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _get_encoded(self, code):
+        return self._mmap[self._blob_start + self._offsets[code]:self._blob_start + self._offsets[code + 1]]
+
+    def get_string(self, code):
+        if code < 0:
+            return None
+        return self._get_encoded(code).decode("utf-8")
+
+    def get_code(self, text):
+        """
+        Retrieves the code of a text, -1 if the snapshot does not contain it.
+        Bisects the sorted encoded string table, only the compared strings are read.
+        :param text:
+        :return:
+        """
+        if text is None:
+            return -1
+        encoded = text.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_encoded(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self._get_encoded(low) == encoded:
+            return low
+        return -1
+
+
+class _SnapshotMapping(object):
+    """
+    Memory mapping of a snapshot file with the memoryviews handed out on it,
+    released together on close, since a mapping cannot be closed while a view on it is alive.
+    """
+    def __init__(self, snapshot_path):
+        with open(str(snapshot_path), "rb") as snapshot_file:
+            self.mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+
+    def track(self, column):
+        if isinstance(column, memoryview):
+            self._views.append(column)
+        return column
+
+    def get_column(self, offset, count, typecode):
+        """
+        Retrieves a little endian 4 byte column of the file,
+        zero-copy on little endian platforms, a byteswapped copy elsewhere.
+        :param offset:
+        :param count:
+        :param typecode: "i" or "I"
+        :return: memoryview or array
+        """
+        if sys.byteorder == "little":
+            raw = self.track(memoryview(self.mmap)[offset:offset + count * 4])
+            return self.track(raw.cast(typecode))
+        column = array.array(typecode)
+        column.frombytes(self.mmap[offset:offset + count * 4])
+        column.byteswap()
+        return column
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.mmap.close()
+
+
+class TaskSnapshot(mpp.TaskTable):
+    """
+    Read-only TaskTable on a binary columnar snapshot file, see write_task_snapshot.
+    The file is memory-mapped: rows, columns and strings are decoded on access only,
+    slicing shares the mapping. Closing releases the mapping for the snapshot and all its
+    slices, their rows and codes() columns must not be used afterwards.
+    """
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self._mapping = mapping = _SnapshotMapping(snapshot_path)
+        magic, version, row_count, string_count, blob_size = SNAPSHOT_HEADER.unpack_from(mapping.mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            mapping.close()
+            raise ValueError("not a vrph task snapshot version {}: {}".format(SNAPSHOT_VERSION, snapshot_path))
+        offset = SNAPSHOT_HEADER.size
+        self.columns = {}
+        for name in self.INT_FIELDS + self.STRING_FIELDS:
+            self.columns[name] = mapping.get_column(offset, row_count, "i")
+            offset += row_count * 4
+        string_offsets = mapping.get_column(offset, string_count + 1, "I")
+        offset += (string_count + 1) * 4
+        self.strings = SnapshotStringTable(mapping.mmap, string_offsets, offset)
+
+    @property
+    def closed(self):
+        return self._mapping.mmap.closed
+
+    def close(self):
+        """
+        Releases the mapping, shared with all slices of the snapshot.
+        :return:
+        """
+        self.columns = {}
+        self.strings = None
+        if not self.closed:
+            self._mapping.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            if item.step not in (None, 1):
+                raise ValueError("TaskSnapshot slices need a step of 1")
+            sliced = object.__new__(TaskSnapshot)
+            sliced.__dict__.update(self.__dict__)
+            track = self._mapping.track
+            sliced.columns = {name: track(column[item]) for name, column in self.columns.items()}
+            return sliced
+        return mpp.TaskTable.__getitem__(self, item)
+
+    def append(self, task):
+        raise TypeError("TaskSnapshot is read-only")
+
+    def column(self, name):
+        if name in self.STRING_FIELDS:
+            get_string = self.strings.get_string
+            return [get_string(code) for code in self.columns[name]]
+        if name in self.DATE_FIELDS:
+            return [value or "" for value in self.columns[name]]
+        return self.columns[name].tolist()
+
+    def find_rows(self, name, text):
+        """
+        Retrieves the rows with given text in a text field, e.g. ("designation", "D001"),
+        comparing string codes without decoding the rows.
+        :param name:
+        :param text:
+        :return: list of TaskRow
+        """
+        code = self.strings.get_code(text)
+        if code < 0:
+            return []
+        return [mpp.TaskRow(self, index) for index, row_code in enumerate(self.columns[name]) if row_code == code]
+
+    def get_memory_footprint(self, include_strings=True):
+        # the columns and strings stay in the mapped file
+        return sys.getsizeof(self) + sys.getsizeof(self.columns)
+
+
+def write_task_snapshot(snapshot_path, tasks):
+    """
+    Atomically writes tasks into a binary columnar snapshot file, little endian:
+    a header, the id, date and string code columns as fixed width int32,
+    the uint32 string end offsets and the utf-8 string table sorted by its bytes.
+    :param snapshot_path:
+    :param tasks: Task like objects or a TaskTable
+    :return: snapshot_path
+    """
+    if isinstance(tasks, mpp.TaskTable) and not isinstance(tasks, TaskSnapshot):
+        table = tasks
+    else:
+        table = mpp.TaskTable.from_tasks(tasks)
+    encoded_strings = [text.encode("utf-8") for text in table.strings.strings]
+    # sorted for the bisection in SnapshotStringTable.get_code, "" keeps code 0
+    sorted_codes = sorted(range(len(encoded_strings)), key=encoded_strings.__getitem__)
+    snapshot_code_by_code = array.array("i", [0]) * len(sorted_codes)
+    for snapshot_code, code in enumerate(sorted_codes):
+        snapshot_code_by_code[code] = snapshot_code
+    string_offsets = array.array("I", [0])
+    for code in sorted_codes:
+        string_offsets.append(string_offsets[-1] + len(encoded_strings[code]))
+    columns = [array.array("i", table.columns[name]) for name in mpp.TaskTable.INT_FIELDS]
+    columns.extend(
+        array.array("i", [snapshot_code_by_code[code] if code >= 0 else -1 for code in table.columns[name]])
+        for name in mpp.TaskTable.STRING_FIELDS
+    )
+    columns.append(string_offsets)
+    blob_size = string_offsets[-1]
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+    temp_path = "{}.{}.{}.tmp".format(snapshot_path, socket.gethostname(), uuid.uuid4().hex)
+    try:
+        with open(temp_path, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(table), len(encoded_strings), blob_size,
+            ))
+            for column in columns:
+                snapshot_file.write(column.tobytes())
+            snapshot_file.write(b"".join(encoded_strings[code] for code in sorted_codes))
+        os.replace(temp_path, str(snapshot_path))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return snapshot_path
+
+
+def export_task_snapshot(mpp_path, snapshot_path=None, backend=None):
+    """
+    Exports the tasks of a schedule file into a snapshot file.
+    :param mpp_path:
+    :param snapshot_path: default next to the schedule file with SNAPSHOT_SUFFIX
+    :param backend: "auto", "mpxj", "mspdi", ..
+    :return: snapshot_path
+    """
+    snapshot_path = snapshot_path or "{}{}".format(mpp_path, SNAPSHOT_SUFFIX)
+    return write_task_snapshot(snapshot_path, mpp.read_task_table(mpp_path, backend))
+
+
+def is_task_snapshot(schedule_path):
+    """
+    Checks whether a file is a snapshot file.
+    :param schedule_path:
+    :return:
+    """
+    if str(schedule_path).endswith(SNAPSHOT_SUFFIX):
+        return True
+    with open(str(schedule_path), "rb") as schedule_file:
+        return schedule_file.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+
+def open_task_table(schedule_path, backend=None):
+    """
+    Opens a snapshot file as TaskSnapshot, reads any other schedule file as TaskTable.
+    Snapshots are recognised by SNAPSHOT_SUFFIX or by their magic bytes.
+    :param schedule_path:
+    :param backend: "auto", "mpxj", "mspdi", ..
+    :return:
+    """
+    if is_task_snapshot(schedule_path):
+        return TaskSnapshot(schedule_path)
+    return mpp.read_task_table(schedule_path, backend)
+
+
+def benchmark_task_snapshot(row_count=100000, fixture_dir=None):
+    """
+    Benchmarks opening and querying a snapshot against re-parsing
+    the original mspdi schedule and loading its sidecar cache.
+    :param row_count:
+    :param fixture_dir: default a temporary directory, removed afterwards
+    :return: dict of seconds by method
+    """
+    temp_dir = None
+    if fixture_dir is None:
+        fixture_dir = temp_dir = tempfile.mkdtemp(prefix="vrph_snapshot_")
+    xml_path = mspdi.write_mspdi_fixture(os.path.join(str(fixture_dir), "fixture.xml"), row_count)
+    designation = "D{:05d}".format(row_count // 4)
+    seconds_by_method = collections.OrderedDict()
+    try:
+        snapshot_path = export_task_snapshot(xml_path)
+        signature = mpp.get_file_signature(xml_path)
+        tasks = mpp.read_tasks(xml_path, use_sidecar_cache=False, use_session_cache=False)
+        mpp.write_sidecar_cache(xml_path, tasks, signature)
+
+        def read_snapshot(read):
+            with TaskSnapshot(snapshot_path) as task_snapshot:
+                return len(read(task_snapshot))
+
+        methods = (
+            ("parse xml", lambda: mpp.read_task_table(xml_path, use_sidecar_cache=False, use_session_cache=False)),
+            ("sidecar json", lambda: mpp.read_sidecar_cache(xml_path)),
+            ("snapshot open", lambda: read_snapshot(lambda table: table)),
+            ("snapshot query", lambda: read_snapshot(lambda table: table.find_rows("designation", designation))),
+            ("snapshot all", lambda: read_snapshot(lambda table: table.to_tasks())),
+        )
+        for name, method in methods:
+            started = timeit.default_timer()
+            method()
+            seconds_by_method[name] = timeit.default_timer() - started
+            print("{:<15} {:8.4f}s".format(name, seconds_by_method[name]))
+        print("snapshot {} bytes, xml {} bytes".format(os.path.getsize(snapshot_path), os.path.getsize(xml_path)))
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return seconds_by_method
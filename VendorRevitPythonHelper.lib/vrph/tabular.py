@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Pure python streaming readers for tabular task lists, e.g. CSV/Excel exports
+of planners or JSON-lines of the scheduling dashboard.
+Records are dicts of raw values by field name, mapped from the source columns.
+"""
+import csv
+import json
+
+from vrph import mspdi
+
+
+def get_date_truncated_iso_short(date_text):
+    """
+    Retrieves YYMMDD date format from iso8601 or swiss date text,
+    e.g. 2023-12-31 or 31.12.2023 -> 231231, 1.2.2024 -> 240201.
+    An unparseable date text is reported and read as missing date.
+    :param date_text:
+    :return:
+    """
+    if not date_text:
+        return ""
+    date_text = str(date_text).strip()
+    date_parts = date_text.split(" ")[0].split(".")
+    if len(date_parts) == 3:
+        # swiss dates are not always zero padded, e.g. 1.2.2024
+        day, month, year = date_parts
+        try:
+            return mspdi.get_truncated_iso_short(year, month, day)
+        except ValueError:
+            print("WARNING: skipped unparseable date: '{}'".format(date_text))
+            return ""
+    return mspdi.get_date_truncated_iso_short(date_text)
+
+
+def _get_field_by_column(column_by_field, columns, source_path):
+    """
+    Retrieves the field name of every mapped source column, warns about missing columns.
+    :param column_by_field:
+    :param columns:
+    :param source_path:
+    :return:
+    """
+    missing_columns = [column for column in column_by_field.values() if column not in columns]
+    if missing_columns:
+        print("WARNING: columns not found in {}: {}".format(source_path, ", ".join(missing_columns)))
+    return {column: field for field, column in column_by_field.items() if column in columns}
+
+
+def iter_csv_records(csv_path, column_by_field, delimiter=None, encoding="utf-8-sig"):
+    """
+    Streams the rows of a csv file with header as records of the mapped columns.
+    :param csv_path:
+    :param column_by_field: source column header by field name
+    :param delimiter: sniffed from the header line if None, Excel exports often use ";"
+    :param encoding:
+    :return:
+    """
+    with open(str(csv_path), "r", encoding=encoding, newline="") as csv_file:
+        if delimiter is None:
+            header_line = csv_file.readline()
+            delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+            csv_file.seek(0)
+        reader = csv.reader(csv_file, delimiter=delimiter)
+        columns = next(reader, [])
+        field_by_column = _get_field_by_column(column_by_field, columns, csv_path)
+        indexed_fields = [(index, field_by_column[column]) for index, column in enumerate(columns)
+                          if column in field_by_column]
+        for row in reader:
+            if not row:
+                continue
+            yield {field: row[index] for index, field in indexed_fields if index < len(row)}
+
+
+def _get_record_text(value):
+    """
+    Retrieves the text of a raw json value, as a csv cell holds it, e.g. 12 -> "12", null -> "".
+    :param value:
+    :return:
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def iter_jsonl_records(jsonl_path, column_by_field, encoding="utf-8"):
+    """
+    Streams the objects of a JSON-lines file as records of the mapped keys,
+    values as text like csv records, e.g. a designation 12 becomes "12".
+    :param jsonl_path:
+    :param column_by_field: source key by field name
+    :param encoding:
+    :return:
+    """
+    field_items = list(column_by_field.items())
+    with open(str(jsonl_path), "r", encoding=encoding) as jsonl_file:
+        for line in jsonl_file:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            yield {field: _get_record_text(obj[column]) for field, column in field_items if column in obj}
+
+
+def write_csv_fixture(csv_path, records, columns, delimiter=","):
+    """
+    Writes records into a csv file with header, e.g. as test fixture or benchmark input.
+    :param csv_path:
+    :param records: dicts by column
+    :param columns:
+    :param delimiter:
+    :return:
+    """
+    with open(str(csv_path), "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.writer(csv_file, delimiter=delimiter)
+        writer.writerow(columns)
+        for record in records:
+            writer.writerow([record.get(column, "") for column in columns])
+    return csv_path
+
+
+def write_jsonl_fixture(jsonl_path, records):
+    """
+    Writes records into a JSON-lines file, e.g. as test fixture or benchmark input.
+    :param jsonl_path:
+    :param records: dicts by key
+    :return:
+    """
+    with open(str(jsonl_path), "w", encoding="utf-8") as jsonl_file:
+        for record in records:
+            jsonl_file.write(json.dumps(record, ensure_ascii=False))
+            jsonl_file.write("\n")
+    return jsonl_path
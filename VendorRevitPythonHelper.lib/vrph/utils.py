@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import collections
 import datetime
 import inspect
 import os
@@ -7,8 +8,6 @@ import re
 import sys
 import webbrowser
 
-from System.Diagnostics import Stopwatch
-
 
 def exit_on_error(message):
     """
@@ -25,6 +24,7 @@ def start_script_timer():
     Starts a timer stopwatch and return ist
     :return:
     """
+    from System.Diagnostics import Stopwatch
     stopwatch = Stopwatch()
     stopwatch.Start()
     return stopwatch
@@ -61,25 +61,76 @@ def today_iso_short_date():
     return datetime.datetime.now().date().isoformat().replace("-", "")
 
 
-def get_latest_file_in_dir_by_iso_date_and_extension(search_dir, extension):
+def get_schedule_extensions():
+    """
+    Retrieves the file extensions of all schedule sources registered in vrph.mpp
+    in their precedence, e.g. (".mpp", ".mpx", ".xml", ".csv", ".jsonl").
+    :return:
+    """
+    from vrph import mpp
+    return mpp.get_schedule_extensions()
+
+
+def get_dated_files_in_dir_by_extension(search_dir, extension=None):
+    """
+    Retrieves all files with iso short YYYYMMDD timestamp as file name start
+    and specified extension, sorted by their timestamp and name.
+    Unlike get_files_in_dir_by_iso_date_and_extension several files may share a date.
+    :param search_dir:
+    :param extension: extension or tuple of extensions, default all schedule extensions
+    :return: list of (iso_date, path)
+    """
+    if extension is None:
+        extension = get_schedule_extensions()
+    re_mpp_file_name = re.compile(r"^(?P<iso_date>\d{8}).*")
+    dated_paths = []
+    for node in search_dir.iterdir():
+        if not node.name.lower().endswith(extension):
+            continue
+        found = re.match(re_mpp_file_name, node.name)
+        if found:
+            dated_paths.append((found.group("iso_date"), node))
+    return sorted(dated_paths, key=lambda dated_path: (dated_path[0], dated_path[1].name))
+
+
+def get_files_in_dir_by_iso_date_and_extension(search_dir, extension=None):
+    """
+    Retrieves the files with iso short YYYYMMDD timestamp as file name start
+    and specified extension, sorted by their timestamp.
+    Of several files sharing a date the one with the first extension in the tuple wins,
+    e.g. 20240101.mpp over 20240101.xml, then the last by name.
+    :param search_dir:
+    :param extension: extension or tuple of extensions in precedence, default all schedule extensions
+    :return: OrderedDict of file paths by iso short date
+    """
+    if extension is None:
+        extension = get_schedule_extensions()
+    extensions = (extension,) if isinstance(extension, str) else tuple(extension)
+
+    def get_extension_rank(path):
+        name = path.name.lower()
+        return min(rank for rank, ext in enumerate(extensions) if name.endswith(ext))
+
+    path_by_iso_date = collections.OrderedDict()
+    for iso_date, path in get_dated_files_in_dir_by_extension(search_dir, extensions):
+        found_path = path_by_iso_date.get(iso_date)
+        if found_path is None or get_extension_rank(path) <= get_extension_rank(found_path):
+            path_by_iso_date[iso_date] = path
+    return path_by_iso_date
+
+
+def get_latest_file_in_dir_by_iso_date_and_extension(search_dir, extension=None):
     """
     Attempts to retrieve the file with the latest iso short YYYYMMDD timestamp as file name start
     and specified extension. Exits on no file candidates found.
     :param search_dir:
-    :param extension:
+    :param extension: extension or tuple of extensions in precedence, default all schedule extensions
     :return:
     """
+    if extension is None:
+        extension = get_schedule_extensions()
     print("searching for latest {} in directory: {}".format(extension, search_dir))
-    re_mpp_file_name = re.compile(r"^(?P<iso_date>\d{8}).*")
-    found_paths = {}
-    for node in search_dir.iterdir():
-        if not node.name.endswith(extension):
-            continue
-        if re.match(re_mpp_file_name, node.name):
-            # print(node)
-            found = re.findall(re_mpp_file_name, node.name)
-            if found:
-                found_paths[found[0]] = node
+    found_paths = get_files_in_dir_by_iso_date_and_extension(search_dir, extension)
     if not found_paths:
         exit_on_error("no file paths found in {} matching search criteria.".format(search_dir))
     # for k,v in found_paths.items():
@@ -89,6 +140,30 @@ def get_latest_file_in_dir_by_iso_date_and_extension(search_dir, extension):
     return latest_file
 
 
+def get_previous_file_in_dir_by_iso_date_and_extension(search_dir, extension, current_path):
+    """
+    Retrieves the file of the same lot as current_path with the latest iso short YYYYMMDD
+    timestamp before the timestamp of current_path, or None if there is no earlier file.
+    e.g. 20240201_P1.mpp -> 20240101_P1.mpp, never 20240115_LOT2.mpp
+    :param search_dir:
+    :param extension:
+    :param current_path:
+    :return:
+    """
+    from vrph import mpp
+    current_iso_date = current_path.name[:8]
+    if not current_iso_date.isdigit():
+        exit_on_error("file name does not start with an iso short date: {}".format(current_path))
+    current_lot = mpp.get_schedule_lot(current_path)
+    earlier_paths = [
+        path for iso_date, path in get_dated_files_in_dir_by_extension(search_dir, extension)
+        if iso_date < current_iso_date and mpp.get_schedule_lot(path) == current_lot
+    ]
+    if not earlier_paths:
+        return None
+    return earlier_paths[-1]
+
+
 def open_in_webbrowser(url):
     """
     Opens given url in webbrowser set in env var WEBBROWSER or default webbrowser.
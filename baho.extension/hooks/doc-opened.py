@@ -0,0 +1,39 @@
+# -*- coding=utf-8 -*-
+"""
+Document opened hook, opt-in via env var VRPH_MPP_PREFETCH=1:
+resolves the mpp configured in project information parameter
+"pyrevit_config_mpp_dir", for a directory the latest mpp of every lot,
+and parses them on worker threads into the in-session schedule cache,
+so the MPP buttons find them ready.
+"""
+import os # fix for pyrevit engine 2.7.x
+import pathlib
+
+from pyrevit import EXEC_PARAMS
+
+
+def get_configured_mpp_paths(doc, param_name):
+    config_param = doc.ProjectInformation.LookupParameter(param_name)
+    if not config_param:
+        return []
+    config_txt = config_param.AsString()
+    if not config_txt:
+        return []
+    mpp_node = pathlib.Path(config_txt)
+    if mpp_node.is_file():
+        return [mpp_node]
+    if mpp_node.is_dir():
+        from vrph import mpp
+        return [
+            dated_mpp_paths[-1][1]
+            for dated_mpp_paths in mpp.get_dated_schedule_paths_by_lot(mpp_node, (".mpp",)).values()
+        ]
+    return []
+
+
+if os.environ.get("VRPH_MPP_PREFETCH") == "1":
+    from vrph import mpp
+    opened_doc = EXEC_PARAMS.event_args.Document
+    if not opened_doc.IsFamilyDocument:
+        for mpp_path in get_configured_mpp_paths(opened_doc, "pyrevit_config_mpp_dir"):
+            mpp.prefetch_tasks(mpp_path)
@@ -8,37 +8,31 @@ parameters:
 "GLS-PHA_Construction-fin"
 "GLS-PHA_Demolition-debut"
 "GLS-PHA_Demolition-fin"
+task designations may be patterns covering several element designations:
+"?" matches one character, a trailing "*" any suffix, e.g. "GLS-Z1*",
+the exact designation or else the most specific pattern wins.
+elements of every category binding the designation and all four date
+parameters as instance parameters are synced, other categories are reported.
 Note: Only for project Gare de Lausanne
 (1)
 * either specified mpp directory set in rvt project information
 parameter: "pyrevit_config_mpp_dir"
 example config: "d:\tmp\plan_4.0"
+the latest mpp of every lot in the directory is merged,
+e.g. 20240101-P1.mpp and 20240115_LOT2.mpp, the newer schedule wins
 * or this button run with shift-click, which provides an
  open file dialog.
 """
-import collections
 import os # fix for pyrevit engine 2.7.x
+import collections
 import pathlib
 
-from Autodesk.Revit.DB import BuiltInCategory, ElementId
-from Autodesk.Revit.DB import FilteredElementCollector as Fec
-
 from pyrevit import forms
 from pyrevit.revit import doc, uidoc
 from pyrevit.revit.db import transaction
 from vrph import utils
 utils.check_mpxj_lib_available()
-from vrph import mpp, param
-
-
-def get_built_in_categories_by_id():
-    bic_categories_by_id = {}
-    for attr_name in dir(BuiltInCategory):
-        if attr_name.startswith("OST_"):
-            built_in_category = getattr(BuiltInCategory, attr_name)
-            # print(built_in_category)
-            bic_categories_by_id[ElementId(built_in_category).IntegerValue] = built_in_category
-    return bic_categories_by_id
+from vrph import background, diff, mpp, param, query
 
 
 def parse_project_info_param_config(param_name):
@@ -57,7 +51,7 @@ def parse_project_info_param_config(param_name):
     if file_menu:
         config_txt = forms.pick_file(
             file_ext="mpp",
-            files_filter="MPP (*.mpp)|*.mpp",
+            files_filter="MPP (*.mpp)|*.mpp|MS Project XML (*.xml)|*.xml|CSV (*.csv)|*.csv|JSON lines (*.jsonl)|*.jsonl",
         )
     if config_txt:
         mpp_node = pathlib.Path(config_txt)
@@ -78,10 +72,76 @@ config_param_name = "pyrevit_config_mpp_dir"
 
 mpp_dir, mpp_path = parse_project_info_param_config(config_param_name)
 
-if not mpp_path:
-    mpp_path = utils.get_latest_file_in_dir_by_iso_date_and_extension(mpp_dir, ".mpp")
+# the startup warm-up must not compete with the reads of this button
+mpp.cancel_mpxj_warmup()
+
+# pairs of previous and latest mpp, to find changed designations
+compare_mpp_paths = []
+if mpp_dir:
+    print("using latest mpp of every lot in: {}".format(mpp_dir))
+    for lot, dated_mpp_paths in mpp.get_dated_schedule_paths_by_lot(mpp_dir, (".mpp",)).items():
+        if len(dated_mpp_paths) > 1:
+            compare_mpp_paths.append((dated_mpp_paths[-2][1], dated_mpp_paths[-1][1]))
+    # read while the document parameter bindings are looked up
+    task_index_call = background.run_in_background("mpp read", mpp.read_merged_task_index, mpp_dir, (".mpp",))
+else:
+    print("using mpp: {}".format(mpp_path))
+    if mpp_path.name[:8].isdigit():
+        previous_mpp_path = utils.get_previous_file_in_dir_by_iso_date_and_extension(
+            mpp_path.parent, mpp_path.suffix, mpp_path,
+        )
+        if previous_mpp_path:
+            compare_mpp_paths.append((previous_mpp_path, mpp_path))
+    # read while the document parameter bindings are looked up
+    task_index_call = background.run_in_background("mpp read", lambda: mpp.TaskIndex(mpp.read_tasks(mpp_path)))
+
+designation_param_name = "GLS-PHA_Désignation"
+
+construction_start_param_name = "GLS-PHA_Construction-début"
+construction_end_param_name   = "GLS-PHA_Construction-fin"
+demolition_start_param_name   = "GLS-PHA_Démolition-début"
+demolition_end_param_name     = "GLS-PHA_Démolition-fin"
+
+# categories never synced, even with the parameters bound
+excluded_category_name_by_ids = {
+    -2000240: "Levels",
+    -2000700: "Materials",
+    -2008077: "Nurse Call Devices",
+    -2000269: "Parts",
+    -2003101: "Project Information",
+    -2001352: "RVT Links",
+    -2000573: "Schedules",
+    -2003100: "Sheets",
+    -2000279: "Views",
+}
 
-print("using mpp: {}".format(mpp_path))
+# only categories binding the designation and all date parameters as instance parameters are scanned
+category_name_by_ids, skip_reason_by_category_name = param.get_categories_binding_all_params(
+    [
+        designation_param_name,
+        construction_start_param_name,
+        construction_end_param_name,
+        demolition_start_param_name,
+        demolition_end_param_name,
+    ],
+    as_instance_binding=True,
+)
+for cat_id, cat_name in excluded_category_name_by_ids.items():
+    if cat_id in category_name_by_ids:
+        del category_name_by_ids[cat_id]
+        skip_reason_by_category_name[cat_name] = "excluded"
+for cat_name, skip_reason in sorted(skip_reason_by_category_name.items()):
+    print("skipped category: {} - {}".format(cat_name, skip_reason))
+if not category_name_by_ids:
+    utils.exit_on_error("no category binds '{}' and the date parameters as instance parameters.".format(
+        designation_param_name,
+    ))
+print("scanning {} categories: {}".format(
+    len(category_name_by_ids), ", ".join(sorted(category_name_by_ids.values())),
+))
+
+# elements are selected by Revit in one collector, see vrph.query
+element_source = query.RevitElementSource(doc)
 
 Task = mpp.Task
 
@@ -89,37 +149,24 @@ field_name_by_id = mpp.TASK_FIELD_NAME_BY_ID
 
 # task_list = mpp.get_mpp_overview(mpp_path)
 
-tasks = mpp.get_tasks_from_mpp(mpp_path)
-task_list = []
-tasks_by_task_type_by_designation = {
-    "construction": {},
-    "demolition"  : {},
-}
-spelling_variations = {
-    "construction": ("construction"),
-    "demolition"  : ("demolition", "dèmolition", "démolition"),
-}
-tasks_by_designation = collections.defaultdict(list)
-for task in tasks:
-    # print(35 * "-")
-    # print(task)
-    project_task = mpp.convert_mpxj_task_to_task(task)
-    # print(project_task)
-    task_list.append(project_task)
-    tasks_by_designation[project_task.designation].append(project_task)
-    if   project_task.task_type.lower() in spelling_variations["construction"]:
-        tasks_by_task_type_by_designation["construction"][project_task.designation] = project_task
-    elif project_task.task_type.lower() in spelling_variations["demolition"]:
-        tasks_by_task_type_by_designation["demolition"  ][project_task.designation] = project_task
-    # for i in range(1,13):
-    #    text = task.getText(i)
-    #    if text:
-    #        print(i, field_name_by_id.get(i) or "", text)
+task_index = task_index_call.result()
+if mpp_dir and not task_index.lots:
+    utils.exit_on_error("no dated mpp found in {}.".format(mpp_dir))
+task_index.print_duplicates()
+if isinstance(task_index, mpp.MergedTaskIndex):
+    task_index.print_conflicts()
+# for task in task_index.get_tasks_by_designation(designation):
+#    for i in range(1,13):
+#        text = mpp.NativeTaskResolver(mpp_path).resolve(task).getText(i)
+#        if text:
+#            print(i, field_name_by_id.get(i) or "", text)
 
 all_chosen = "<all_of_the_below_designation>"
-designation_choices = [key for key in sorted(tasks_by_designation.keys()) if key]
+changed_chosen = "<changed_since_previous_schedule>"
+designation_choices = task_index.designations
 designation_count = len(designation_choices)
 designation_choices.insert(0, all_chosen)
+designation_choices.insert(1, changed_chosen)
 
 # print(designation_choices, type(designation_choices))
 # user_designation_choice = ui.forms.SelectFromList(
@@ -135,191 +182,95 @@ user_designation_choice = forms.SelectFromList.show(
 if not user_designation_choice:
     utils.exit_on_error("no 'designation' was chosen.")
 print("user_designation_choice: {}".format(user_designation_choice))
+user_designations = {user_designation_choice}
 if user_designation_choice == all_chosen:
-    user_designation_choice = None
+    user_designations = None
     print("all following {} 'designation':".format(designation_count))
-    for designation in designation_choices[1:]:
+    for designation in designation_choices[2:]:
+        print(designation)
+elif user_designation_choice == changed_chosen:
+    if not compare_mpp_paths:
+        utils.exit_on_error("no previous dated mpp found to compare with.")
+    # previous dated mpp are read while the latest ones come from the schedule cache
+    previous_tasks_call = background.run_in_background(
+        "previous mpp read",
+        lambda: [mpp.read_tasks(previous_mpp_path) for previous_mpp_path, latest_mpp_path in compare_mpp_paths],
+    )
+    latest_task_lists = [mpp.read_tasks(latest_mpp_path) for previous_mpp_path, latest_mpp_path in compare_mpp_paths]
+    user_designations = set()
+    for previous_tasks, latest_tasks, (previous_mpp_path, latest_mpp_path) in zip(
+            previous_tasks_call.result(), latest_task_lists, compare_mpp_paths):
+        print("comparing {} with previous mpp: {}".format(latest_mpp_path, previous_mpp_path))
+        schedule_diff = diff.diff_tasks(previous_tasks, latest_tasks)
+        schedule_diff.print_summary()
+        user_designations |= schedule_diff.affected_designations
+    if not user_designations:
+        utils.exit_on_error("no 'designation' changed since previous mpp.")
+    print("changed following {} 'designation':".format(len(user_designations)))
+    for designation in sorted(user_designations):
         print(designation)
 
 stopwatch = utils.start_script_timer()
 
-designation_param_name = "GLS-PHA_Désignation"
-
-construction_start_param_name = "GLS-PHA_Construction-début"
-construction_end_param_name   = "GLS-PHA_Construction-fin"
-demolition_start_param_name   = "GLS-PHA_Démolition-début"
-demolition_end_param_name     = "GLS-PHA_Démolition-fin"
-
-category_name_by_ids = {
-    -2008013: "Air Terminals",
-    -2009630: "Analytical Beams",
-    -2009633: "Analytical Braces",
-    -2009636: "Analytical Columns",
-    -2009639: "Analytical Floors",
-    -2009643: "Analytical Foundation Slabs",
-    -2009641: "Analytical Isolated Foundations",
-    -2009657: "Analytical Links",
-    -2009645: "Analytical Nodes",
-    -2000983: "Analytical Pipe Connections",
-    -2008185: "Analytical Spaces",
-    -2008186: "Analytical Surfaces",
-    -2009642: "Analytical Wall Foundations",
-    -2009640: "Analytical Walls",
-    -2003200: "Areas",
-    -2000267: "Assemblies",
-    -2008126: "Cable Tray Fittings",
-    -2008150: "Cable Tray Runs",
-    -2008130: "Cable Trays",
-    -2001000: "Casework",
-    -2000038: "Ceilings",
-    -2000100: "Columns",
-    -2008081: "Communication Devices",
-    -2008128: "Conduit Fittings",
-    -2008149: "Conduit Runs",
-    -2008132: "Conduits",
-    -2000170: "Curtain Panels",
-    -2000340: "Curtain Systems",
-    -2000171: "Curtain Wall Mullions",
-    -2008083: "Data Devices",
-    -2002000: "Detail Items",
-    -2000023: "Doors",
-    -2008016: "Duct Accessories",
-    -2008010: "Duct Fittings",
-    -2008123: "Duct Insulations",
-    -2008124: "Duct Linings",
-    -2008160: "Duct Placeholders",
-    -2008015: "Duct Systems",
-    -2008000: "Ducts",
-    -2008037: "Electrical Circuits",
-    -2001040: "Electrical Equipment",
-    -2001060: "Electrical Fixtures",
-    -2001370: "Entourage",
-    -2008085: "Fire Alarm Devices",
-    -2008020: "Flex Ducts",
-    -2008050: "Flex Pipes",
-    -2000032: "Floors",
-    -2000080: "Furniture",
-    -2001100: "Furniture Systems",
-    -2000151: "Generic Models",
-    -2000220: "Grids",
-    -2008107: "HVAC Zones",
-    # -2000240: "Levels",
-    -2008087: "Lighting Devices",
-    -2001120: "Lighting Fixtures",
-    -2008212: "MEP Fabrication Containment",
-    -2008193: "MEP Fabrication Ductwork",
-    -2008203: "MEP Fabrication Hangers",
-    -2008208: "MEP Fabrication Pipework",
-    -2003400: "Mass",
-    # -2000700: "Materials",
-    -2001140: "Mechanical Equipment",
-    -2000985: "Mechanical Equipment Sets",
-    -2000095: "Model Groups",
-    # -2008077: "Nurse Call Devices",
-    -2001180: "Parking",
-    # -2000269: "Parts",
-    -2008055: "Pipe Accessories",
-    -2008049: "Pipe Fittings",
-    -2008122: "Pipe Insulations",
-    -2008161: "Pipe Placeholders",
-    -2008044: "Pipes",
-    -2008043: "Piping Systems",
-    -2001360: "Planting",
-    -2001160: "Plumbing Fixtures",
-    # -2003101: "Project Information",
-    # -2001352: "RVT Links",
-    -2000126: "Railings",
-    -2000180: "Ramps",
-    -2009013: "Rebar Shape",
-    -2001220: "Roads",
-    -2000035: "Roofs",
-    -2000160: "Rooms",
-    # -2000573: "Schedules",
-    -2008079: "Security Devices",
-    -2000996: "Shaft Openings",
-    # -2003100: "Sheets",
-    -2001260: "Site",
-    -2003600: "Spaces",
-    -2001350: "Specialty Equipment",
-    -2008099: "Sprinklers",
-    -2000120: "Stairs",
-    -2009003: "Structural Area Reinforcement",
-    -2001327: "Structural Beam Systems",
-    -2001330: "Structural Columns",
-    -2009030: "Structural Connections",
-    -2009017: "Structural Fabric Areas",
-    -2009016: "Structural Fabric Reinforcement",
-    -2001300: "Structural Foundations",
-    -2001320: "Structural Framing",
-    -2009009: "Structural Path Reinforcement",
-    -2009000: "Structural Rebar",
-    -2009060: "Structural Rebar Couplers",
-    -2001354: "Structural Stiffeners",
-    -2001336: "Structural Trusses",
-    -2008101: "Switch System",
-    -2008075: "Telephone Devices",
-    -2001340: "Topography",
-    # -2000279: "Views",
-    -2000011: "Walls",
-    -2000014: "Windows",
-    -2008039: "Wires",
-}
-
-bic_categories_by_id = get_built_in_categories_by_id()
-
 params_written_total_count = 0
+element_count_by_cat_id = collections.Counter()
+params_written_count_by_cat_id = collections.Counter()
+
+element_query = query.get_designation_query(category_name_by_ids, designation_param_name, user_designations)
+# only differing values are written
+param_writer = param.BulkParamWriter(doc)
 
 with transaction.Transaction("set_mpp_element_params", doc=doc):
-    for cat_id, cat_name in category_name_by_ids.items():
-        built_in_category = bic_categories_by_id[cat_id]
-        category_elements = Fec(doc).OfCategory(built_in_category).WhereElementIsNotElementType().ToElements()
-        element_count = len(category_elements)
-        category_params_written_count = 0
-        if element_count == 0:
-            continue
-        print(45 * "-")
-        print("\ncategory: {} - element_count: {}".format(cat_name, element_count))
-
-        for element in category_elements:
-            # print(35 * "-")
-            # print(elem.Id)
-
-            element_designation_param = element.LookupParameter(designation_param_name)
-            if not element_designation_param:
+    for element in element_source.iter_elements(element_query):
+        # print(35 * "-")
+        # print(elem.Id)
+        cat_id = element.Category.Id.IntegerValue
+        element_count_by_cat_id[cat_id] += 1
+
+        element_designation = element.LookupParameter(designation_param_name).AsString()
+        # print(elem_designation)
+
+        # exact designation or most specific designation pattern, e.g. "GLS-Z1*"
+        construction_task = task_index.match_task("construction", element_designation)
+        demolition_task   = task_index.match_task("demolition"  , element_designation)
+
+        if user_designations is not None:
+            task_designations = {task.designation for task in (construction_task, demolition_task) if task}
+            if not task_designations & user_designations:
+                # print("skipped: '{}' is not user chosen designation: {}".format(
+                #     elem_designation,
+                #     user_designation_choice,
+                # ))
                 continue
-            element_designation = element_designation_param.AsString()
-            # print(elem_designation)
-            if not element_designation:
-                continue
-            if user_designation_choice:
-                if not element_designation == user_designation_choice:
-                    # print("skipped: '{}' is not user chosen designation: {}".format(
-                    #     elem_designation,
-                    #     user_designation_choice,
-                    # ))
-                    continue
-
-            construction_task = tasks_by_task_type_by_designation["construction"].get(element_designation)
-            demolition_task   = tasks_by_task_type_by_designation["demolition"  ].get(element_designation)
 
-            if construction_task or demolition_task:
-                construction_start_date = getattr(construction_task, "start_date", None) or 0
-                construction_end_date   = getattr(construction_task, "end_date"  , None) or 1
-                demolition_start_date   = getattr(demolition_task  , "start_date", None) or 999998
-                demolition_end_date     = getattr(demolition_task  , "end_date"  , None) or 999999
+        if construction_task or demolition_task:
+            construction_start_date = getattr(construction_task, "start_date", None) or 0
+            construction_end_date   = getattr(construction_task, "end_date"  , None) or 1
+            demolition_start_date   = getattr(demolition_task  , "start_date", None) or 999998
+            demolition_end_date     = getattr(demolition_task  , "end_date"  , None) or 999999
 
-                param.set_val(element, construction_start_param_name, construction_start_date)
-                param.set_val(element, construction_end_param_name  , construction_end_date)
-                param.set_val(element, demolition_start_param_name  , demolition_start_date)
-                param.set_val(element, demolition_end_param_name, demolition_end_date)
+            written_count = param_writer.update(element, {
+                construction_start_param_name: construction_start_date,
+                construction_end_param_name  : construction_end_date,
+                demolition_start_param_name  : demolition_start_date,
+                demolition_end_param_name    : demolition_end_date,
+            })
 
-                category_params_written_count += 1
+            if written_count:
+                params_written_count_by_cat_id[cat_id] += 1
 
-        print("param values written for category: {}".format(category_params_written_count))
-        params_written_total_count += category_params_written_count
+for cat_id, cat_name in sorted(category_name_by_ids.items(), key=lambda item: item[1]):
+    element_count = element_count_by_cat_id[cat_id]
+    if not element_count:
+        continue
+    print(45 * "-")
+    print("\ncategory: {} - designated element_count: {}".format(cat_name, element_count))
+    print("param values written for category: {}".format(params_written_count_by_cat_id[cat_id]))
+    params_written_total_count += params_written_count_by_cat_id[cat_id]
 
 
 print(45 * "=")
 print("params_written_total_count: {}".format(params_written_total_count))
+param_writer.print_counts()
 
 utils.end_script_timer(stopwatch, file_name=__file__)
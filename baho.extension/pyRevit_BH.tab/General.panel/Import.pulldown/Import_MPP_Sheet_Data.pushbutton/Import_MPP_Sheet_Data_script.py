@@ -26,10 +26,37 @@ from pyrevit.revit import doc, uidoc
 from pyrevit.revit.db import transaction
 from vrph import utils
 utils.check_mpxj_lib_available()
-from vrph import mpp, param
-
-
-def ensure_correct_selection():
+from vrph import background, diff, mpp, param
+
+
+def read_tasks_and_sheet_index(mpp_path):
+    tasks = mpp.read_tasks(mpp_path)
+    # only tasks with a sheet number are converted
+    sheet_infos = mpp.project_tasks(
+        tasks,
+        fields=("sheet_number", "sheet_name", "start_date", "end_date"),
+        predicate=bool,
+        getters=mpp.TASK_FIELD_GETTERS,
+    )
+    return tasks, mpp.TaskIndex(sheet_infos)
+
+
+def get_sheet_numbers_changed_since_previous_mpp(mpp_dir, mpp_path, tasks_call):
+    previous_mpp_path = utils.get_previous_file_in_dir_by_iso_date_and_extension(
+        mpp_dir or mpp_path.parent, mpp_path.suffix, mpp_path,
+    )
+    if not previous_mpp_path:
+        utils.exit_on_error("no previous dated mpp found to compare with.")
+    print("comparing with previous mpp: {}".format(previous_mpp_path))
+    previous_tasks = mpp.read_tasks(previous_mpp_path)
+    # the latest mpp is read once, by the background call
+    latest_tasks, _ = tasks_call.result()
+    schedule_diff = diff.diff_tasks(previous_tasks, latest_tasks)
+    schedule_diff.print_summary()
+    return schedule_diff.affected_sheet_numbers
+
+
+def ensure_correct_selection(mpp_dir, mpp_path, tasks_call):
     sheet_category_id = -2003100
     if doc.ActiveView.ViewType.ToString() == "ProjectBrowser":
         selection = [doc.GetElement(elem_id) for elem_id in uidoc.Selection.GetElementIds()]
@@ -38,15 +65,22 @@ def ensure_correct_selection():
             utils.exit_on_error("selection needs to contain at least one sheet element")
         print("using {} sheets from project browser selection".format(len(target_selection)))
     else:
-        message = "No sheet selection was made in project browser. Do you want to write sheet data for all sheets?"
-        confirmation = forms.alert(message, cancel=True)
+        all_sheets_chosen = "all sheets"
+        changed_sheets_chosen = "sheets changed since previous mpp"
+        message = "No sheet selection was made in project browser. Do you want to write sheet data for:"
+        confirmation = forms.CommandSwitchWindow.show([all_sheets_chosen, changed_sheets_chosen], message=message)
         if confirmation:
             all_sheets = Fec(doc).OfCategory(Bic.OST_Sheets).WhereElementIsNotElementType().ToElements()
             target_selection = all_sheets
         else:
             print("script run aborted by user.")
             sys.exit()
-        print("using {} sheets from project browser selection".format(len(target_selection)))
+        if confirmation == changed_sheets_chosen:
+            changed_sheet_numbers = get_sheet_numbers_changed_since_previous_mpp(mpp_dir, mpp_path, tasks_call)
+            target_selection = [sheet for sheet in all_sheets if sheet.SheetNumber in changed_sheet_numbers]
+            print("using {} sheets changed since previous mpp".format(len(target_selection)))
+        else:
+            print("using {} sheets from project browser selection".format(len(target_selection)))
 
     if len(target_selection) == 0:
         utils.exit_on_error("selection needs to contain at least one sheet element")
@@ -69,7 +103,7 @@ def parse_project_info_param_config(param_name):
     if file_menu:
         config_txt = forms.pick_file(
             file_ext="mpp",
-            files_filter="MPP (*.mpp)|*.mpp",
+            files_filter="MPP (*.mpp)|*.mpp|MS Project XML (*.xml)|*.xml|CSV (*.csv)|*.csv|JSON lines (*.jsonl)|*.jsonl",
         )
     if config_txt:
         mpp_node = pathlib.Path(config_txt)
@@ -101,17 +135,25 @@ print("using mpp: {}".format(mpp_path))
 
 # mpp_path = pathlib.Path(r"d:\tmp\plan_4.0\20201026-P1.mpp")
 
-tasks = [mpp.convert_mpxj_task_to_sheet_info(task) for task in mpp.get_tasks_from_mpp(str(mpp_path))]
+# the startup warm-up must not compete with the read of this button
+mpp.cancel_mpxj_warmup()
 
-# tasks = mpp.get_mpp_overview(mpp_path)
-sheet_info_by_sheet_number = {task.sheet_number:task for task in tasks if task.sheet_number}
+# read while the user validates the selection, the changed sheets diff reuses the tasks
+tasks_call = background.run_in_background("mpp read", read_tasks_and_sheet_index, mpp_path)
+
+sheets_to_process = ensure_correct_selection(mpp_dir, mpp_path, tasks_call)
 
-sheets_to_process = ensure_correct_selection()
+# tasks = mpp.get_mpp_overview(mpp_path)
+_, task_index = tasks_call.result()
+task_index.print_duplicates()
+sheet_info_by_sheet_number = task_index.task_by_sheet_number
 
 stopwatch = utils.start_script_timer()
 
 written_dates = 0
 written_names = 0
+# only differing values are written
+param_writer = param.BulkParamWriter(doc)
 
 with transaction.Transaction("Import_MPP_Sheet_Data", doc=doc):
     print(45 * "=")
@@ -125,9 +167,11 @@ with transaction.Transaction("Import_MPP_Sheet_Data", doc=doc):
 
         construction_start_date = getattr(sheet_info, "start_date", None) or 0
         construction_end_date   = getattr(sheet_info, "end_date",   None) or 1
-        param.set_val(sheet, construction_start_param_name, construction_start_date)
-        param.set_val(sheet, construction_end_param_name,   construction_end_date)
-        written_dates += 1
+        if param_writer.update(sheet, {
+            construction_start_param_name: construction_start_date,
+            construction_end_param_name  : construction_end_date,
+        }):
+            written_dates += 1
 
         sheet_name = sheet_info.sheet_name
         if len(sheet_name) < 2:
@@ -136,7 +180,7 @@ with transaction.Transaction("Import_MPP_Sheet_Data", doc=doc):
                 sheet_name
             ))
             continue
-        else:
+        elif sheet.Name != sheet_name:
             sheet.Name = sheet_name
             written_names += 1
 
@@ -144,5 +188,6 @@ with transaction.Transaction("Import_MPP_Sheet_Data", doc=doc):
 print(45 * "=")
 print("written {} sheet dates.".format(written_dates))
 print("written {} sheet names.".format(written_names))
+param_writer.print_counts()
 
 utils.end_script_timer(stopwatch, file_name=__file__)
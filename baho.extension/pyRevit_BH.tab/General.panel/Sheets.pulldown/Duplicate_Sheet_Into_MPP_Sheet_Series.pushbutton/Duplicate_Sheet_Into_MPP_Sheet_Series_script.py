@@ -29,7 +29,7 @@ from pyrevit.revit import doc, uidoc
 from pyrevit.revit.db import transaction
 from vrph import utils
 utils.check_mpxj_lib_available()
-from vrph import mpp, param
+from vrph import background, mpp, param
 
 
 def parse_project_info_param_config(param_name):
@@ -48,7 +48,7 @@ def parse_project_info_param_config(param_name):
     if file_menu:
         config_txt = forms.pick_file(
             file_ext="mpp",
-            files_filter="MPP (*.mpp)|*.mpp",
+            files_filter="MPP (*.mpp)|*.mpp|MS Project XML (*.xml)|*.xml|CSV (*.csv)|*.csv|JSON lines (*.jsonl)|*.jsonl",
         )
     if config_txt:
         mpp_node = pathlib.Path(config_txt)
@@ -92,15 +92,25 @@ if not doc.ActiveView.Category:
 if doc.ActiveView.Category.Id.IntegerValue != -2003100:
     utils.exit_on_error("active view needs to be a sheet.")
 
-all_sheets = Fec(doc).OfCategory(Bic.OST_Sheets).WhereElementIsNotElementType().ToElements()
-all_sheet_numbers = {sheet.SheetNumber for sheet in all_sheets}
-
 active_sheet = doc.ActiveView
 active_sheet_designation = param.get_val(active_sheet, designation_param_name)
 if not active_sheet_designation:
     utils.exit_on_error("active sheet has no designation set.")
 print("active sheet designation {}.".format(active_sheet_designation))
 
+# the startup warm-up must not compete with the read of this button
+mpp.cancel_mpxj_warmup()
+
+# only tasks of the active sheet designation are converted, read while the sheets are collected
+mpp_tasks_call = background.run_in_background("mpp read", lambda: list(mpp.iter_task_projection(
+    mpp_path,
+    fields=("designation", "name", "sheet_number", "start_date", "end_date"),
+    predicate=lambda designation: designation == active_sheet_designation,
+)))
+
+all_sheets = Fec(doc).OfCategory(Bic.OST_Sheets).WhereElementIsNotElementType().ToElements()
+all_sheet_numbers = {sheet.SheetNumber for sheet in all_sheets}
+
 active_sheet_number    = active_sheet.SheetNumber
 active_sheet_name      = active_sheet.Name
 active_sheet_group     = param.get_val(doc.ActiveView, sheet_grouping_param_name)
@@ -110,9 +120,11 @@ active_sheet_sorting   = param.get_val(doc.ActiveView, sheet_sorting_param_name)
 duplicate_option = SheetDuplicateOption()
 duplicate_option = duplicate_option.DuplicateSheetWithViewsAndDetailing
 
-mpp_tasks = [mpp.convert_mpxj_task_to_task(task) for task in mpp.get_tasks_from_mpp(str(mpp_path))]
+mpp_tasks = mpp_tasks_call.result()
 
 found_matching_mpp_sheets_count = 0
+# values copied along with the active sheet are not written again
+param_writer = param.BulkParamWriter(doc)
 
 with transaction.Transaction("duplicate_sheet_into_mpp_sheet_series", doc=doc):
     for task in mpp_tasks:
@@ -135,15 +147,16 @@ with transaction.Transaction("duplicate_sheet_into_mpp_sheet_series", doc=doc):
         duplicated_sheet = doc.GetElement(duplicated_sheet_id)
         duplicated_sheet.SheetNumber = task.sheet_number
         duplicated_sheet.Name = task.name
-        param.set_val(duplicated_sheet, designation_param_name, task.designation)
-
-        param.set_val(duplicated_sheet, construction_start_param_name, task.start_date)
-        param.set_val(duplicated_sheet, construction_end_param_name  , task.end_date)
-
-        param.set_val(duplicated_sheet, sheet_grouping_param_name    , active_sheet_group)
-        param.set_val(duplicated_sheet, sheet_sub_grouping_param_name, active_sheet_sub_group)
-        param.set_val(duplicated_sheet, sheet_sorting_param_name     , active_sheet_sorting)
+        param_writer.update(duplicated_sheet, {
+            designation_param_name       : task.designation,
+            construction_start_param_name: task.start_date,
+            construction_end_param_name  : task.end_date,
+            sheet_grouping_param_name    : active_sheet_group,
+            sheet_sub_grouping_param_name: active_sheet_sub_group,
+            sheet_sorting_param_name     : active_sheet_sorting,
+        })
 
 print("count of created matching mpp sheets: {}".format(found_matching_mpp_sheets_count))
+param_writer.print_counts()
 
 utils.end_script_timer(stopwatch, file_name=__file__)
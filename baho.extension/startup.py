@@ -0,0 +1,12 @@
+# -*- coding=utf-8 -*-
+"""
+Extension startup hook, opt-in via env var VRPH_MPP_WARMUP=1:
+warms up the mpxj/IKVM runtime on a background thread, so the
+first mpp button click of the session does not pay for it.
+"""
+import os # fix for pyrevit engine 2.7.x
+
+
+if os.environ.get("VRPH_MPP_WARMUP") == "1":
+    from vrph import mpp
+    mpp.start_mpxj_warmup()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import pathlib
+import sys
+
+import pytest
+
+# vrph is on the pyRevit search path inside Revit, on plain CPython the lib dir is added here
+LIB_DIR = pathlib.Path(__file__).parent.parent / "VendorRevitPythonHelper.lib"
+if str(LIB_DIR) not in sys.path:
+    sys.path.insert(0, str(LIB_DIR))
+
+
+def get_task(designation="", start_date=0, end_date=0, task_type="Construction", unique_id=1, **fields):
+    """
+    Builds a Task with empty text fields, e.g. get_task("D1", 240101, 240201, zone_name="Z1").
+    """
+    from vrph import mpp
+    values = dict.fromkeys(mpp.Task._fields, "")
+    values.update(
+        id=unique_id,
+        unique_id=unique_id,
+        mpp_task=None,
+        designation=designation,
+        start_date=start_date,
+        end_date=end_date,
+        task_type=task_type,
+    )
+    values.update(fields)
+    return mpp.Task(**values)
+
+
+@pytest.fixture
+def make_task():
+    return get_task
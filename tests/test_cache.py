@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import collections
+
+from vrph import mpp, tabular
+
+COLUMNS = ("Designation", "Type", "Start", "End")
+
+
+def write_schedule(schedule_path):
+    records = [
+        {"Designation": "D1", "Type": "Construction", "Start": "2024-01-01", "End": "2024-02-01"},
+        {"Designation": "D2", "Type": "Demolition", "Start": "2024-03-01", "End": "2024-04-01"},
+    ]
+    return tabular.write_csv_fixture(schedule_path, records, COLUMNS)
+
+
+def test_cache_key_includes_column_mapping(tmp_path):
+    schedule_path = write_schedule(tmp_path / "20240101.csv")
+    default_source = mpp.READER_BACKENDS["csv"]
+    mapped_source = mpp.CsvSource(collections.OrderedDict([
+        ("designation", "Designation"), ("task_type", "Type"), ("start_date", "Start"), ("end_date", "End"),
+    ]))
+    mpp.invalidate_schedule_cache()
+    try:
+        assert [task.designation for task in mpp.read_tasks(schedule_path)] == ["", ""]
+        mpp.register_schedule_source(mapped_source)
+        # neither the session cache nor the sidecar of the default mapping is served
+        assert mpp.get_cached_tasks(schedule_path) is None
+        assert [task.designation for task in mpp.read_tasks(schedule_path)] == ["D1", "D2"]
+        assert mpp.read_sidecar_cache(schedule_path) is not None
+    finally:
+        mpp.register_schedule_source(default_source)
+        mpp.invalidate_schedule_cache()
+    assert mpp.read_sidecar_cache(schedule_path) is None
+    assert mpp.get_schedule_cache().get_key(schedule_path, "csv") != mpp.get_schedule_cache().get_key(
+        schedule_path, "jsonl",
+    )
+
+
+def test_sidecar_of_missing_schedule(tmp_path, capsys):
+    schedule_path = write_schedule(tmp_path / "20240101.csv")
+    mpp.read_tasks(schedule_path, use_session_cache=False)
+    schedule_path.unlink()
+    assert mpp.read_sidecar_cache(schedule_path) is None
+    assert "corrupt" not in capsys.readouterr().out
+
+
+def get_key(name, mtime=1.0):
+    return name, "csv", 10, mtime
+
+
+def test_schedule_cache_evicts_least_recently_used_entry():
+    cache = mpp.ScheduleCache(max_entries=2, max_rows=100)
+    cache.put(get_key("a"), [1])
+    cache.put(get_key("b"), [2])
+    assert cache.get(get_key("a")) == [1]
+    cache.put(get_key("c"), [3])
+    assert cache.get(get_key("b")) is None
+    assert cache.get(get_key("a")) == [1]
+    assert cache.get(get_key("c")) == [3]
+    assert cache.stats == mpp.ScheduleCacheStats(
+        hits=3, misses=1, evictions=1, invalidations=0, entries=2, rows=2,
+    )
+
+
+def test_schedule_cache_evicts_by_row_count():
+    cache = mpp.ScheduleCache(max_entries=10, max_rows=5)
+    cache.put(get_key("a"), [1, 2])
+    cache.put(get_key("b"), [1, 2])
+    cache.put(get_key("c"), [1, 2])
+    assert cache.get(get_key("a")) is None
+    assert cache.stats.rows == 4
+    # a single schedule above the row bound is still kept
+    cache.put(get_key("d"), list(range(8)))
+    assert cache.stats.entries == 1
+    assert cache.get(get_key("d")) == list(range(8))
+
+
+def test_schedule_cache_evicts_older_version_of_same_file():
+    cache = mpp.ScheduleCache()
+    cache.put(get_key("a", mtime=1.0), [1])
+    cache.put(get_key("a", mtime=2.0), [2])
+    assert cache.get(get_key("a", mtime=1.0)) is None
+    assert cache.get(get_key("a", mtime=2.0)) == [2]
+    assert cache.stats.evictions == 1
+    assert cache.stats.entries == 1
+
+
+def test_schedule_cache_invalidate():
+    cache = mpp.ScheduleCache()
+    for name in ("a", "b", "c"):
+        cache.put(get_key(mpp._get_path_key(name)), [name])
+    cache.invalidate("a")
+    assert cache.get(get_key(mpp._get_path_key("a"))) is None
+    assert cache.stats.entries == 2
+    cache.invalidate()
+    assert cache.stats.entries == 0
+    assert cache.stats.invalidations == 3
+
+
+def test_schedule_cache_returns_copies():
+    cache = mpp.ScheduleCache()
+    cache.put(get_key("a"), [1])
+    cache.get(get_key("a")).append(2)
+    assert cache.get(get_key("a")) == [1]
+
+
+def test_prefetch_fills_session_cache(tmp_path):
+    schedule_path = write_schedule(tmp_path / "20240101.csv")
+    missing_path = tmp_path / "20240201.csv"
+    mpp.invalidate_schedule_cache()
+    prefetch = mpp.prefetch_tasks(schedule_path)
+    # finished prefetches are forgotten, so waiting returns the prefetch or None
+    assert mpp.wait_for_prefetch(schedule_path, timeout=10) in (prefetch, None)
+    assert prefetch.is_finished and prefetch.error is None
+    assert mpp.get_cached_tasks(schedule_path, use_sidecar_cache=False) is not None
+    failed = mpp.prefetch_tasks(missing_path)
+    assert failed.wait(10)
+    assert isinstance(failed.error, OSError)
+    mpp.invalidate_schedule_cache()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from vrph import diff, tabular
+
+COLUMNS = ("designation", "task_type", "sheet_number", "start_date", "end_date")
+
+
+def test_diff_tasks(make_task):
+    old_tasks = [
+        make_task("D1", 240101, 240201, unique_id=1),
+        make_task("D2", 240101, 240201, unique_id=2),
+        make_task("D3", 240101, 240201, unique_id=3),
+    ]
+    new_tasks = [
+        make_task("D1", 240101, 240201, unique_id=1)._replace(id=7),
+        make_task("D2", 240115, 240201, unique_id=2),
+        make_task("D4", 240101, 240201, unique_id=4),
+    ]
+    schedule_diff = diff.diff_tasks(old_tasks, new_tasks)
+    assert [task.unique_id for task in schedule_diff.added] == [4]
+    assert [task.unique_id for task in schedule_diff.removed] == [3]
+    assert [(change.key, change.changed_fields) for change in schedule_diff.changed] == [(2, ("start_date",))]
+    assert schedule_diff.unchanged_count == 1
+    assert len(schedule_diff) == 3
+    assert schedule_diff.affected_designations == {"D2", "D3", "D4"}
+
+
+def test_diff_tasks_by_designation(make_task):
+    old_tasks = [
+        make_task("D1", 240101, 240201, unique_id=1),
+        make_task("D1", 240101, 240201, task_type="Démolition", unique_id=2),
+    ]
+    new_tasks = [
+        make_task("D1", 240101, 240301, unique_id=11),
+        make_task("D1", 240101, 240201, task_type="Démolition", unique_id=12),
+    ]
+    assert len(diff.diff_tasks(old_tasks, new_tasks)) == 4
+    schedule_diff = diff.diff_tasks(old_tasks, new_tasks, key_fields=diff.DIFF_KEY_FIELDS_BY_DESIGNATION)
+    assert [change.changed_fields for change in schedule_diff.changed] == [("end_date",)]
+    assert schedule_diff.unchanged_count == 1
+
+
+def test_diff_tasks_repeated_keys(make_task):
+    old_tasks = [make_task("D1", 240101, 240201), make_task("D1", 240301, 240401)]
+    new_tasks = [make_task("D1", 240101, 240201)]
+    schedule_diff = diff.diff_tasks(old_tasks, new_tasks, key_fields=diff.DIFF_KEY_FIELDS_BY_DESIGNATION)
+    assert [task.start_date for task in schedule_diff.removed] == [240301]
+    assert schedule_diff.unchanged_count == 1
+
+
+def test_diff_schedules(tmp_path):
+    def write_schedule(file_name, end_date):
+        record = dict(zip(COLUMNS, ("D1", "Construction", "S1", "2024-01-01", end_date)))
+        return tabular.write_csv_fixture(tmp_path / file_name, [record], COLUMNS)
+
+    old_path = write_schedule("20240101.csv", "2024-02-01")
+    new_path = write_schedule("20240201.csv", "2024-03-01")
+    schedule_diff = diff.diff_schedules(old_path, new_path, key_fields=diff.DIFF_KEY_FIELDS_BY_DESIGNATION)
+    assert schedule_diff.affected_sheet_numbers == {"S1"}
+    assert [change.changed_fields for change in schedule_diff.changed] == [("end_date",)]
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from vrph import history, mpp, mspdi, tabular, utils
+
+COLUMNS = ("designation", "task_type", "sheet_number", "start_date", "end_date")
+
+
+def write_schedule(schedule_dir, file_name, rows):
+    """
+    Writes a csv schedule of (designation, task_type, sheet_number, start_date, end_date) rows.
+    """
+    records = [dict(zip(COLUMNS, row)) for row in rows]
+    return tabular.write_csv_fixture(schedule_dir / file_name, records, COLUMNS)
+
+
+
+class RecordingList(list):
+    """
+    List of (iso_date, path) recording how far it was iterated.
+    """
+    def __init__(self, items):
+        list.__init__(self, items)
+        self.consumed = 0
+
+    def __iter__(self):
+        for item in list.__iter__(self):
+            self.consumed += 1
+            yield item
+
+
+def write_xml_schedules(schedule_dir, count):
+    """
+    Writes count monthly mspdi schedules, the n-th with 2n+3 tasks.
+    """
+    dated_paths = []
+    for month in range(1, count + 1):
+        iso_date = "2024{:02d}01".format(month)
+        xml_path = schedule_dir / "{}.xml".format(iso_date)
+        mspdi.write_mspdi_fixture(xml_path, 2 * month + 1)
+        dated_paths.append((iso_date, xml_path))
+    return dated_paths
+
+def test_history_timeline(tmp_path):
+    write_schedule(tmp_path, "20240101.csv", [
+        ("D1", "Construction", "S1", "2024-01-01", "2024-02-01"),
+        ("D2", "Construction", "S2", "2024-01-01", "2024-02-01"),
+    ])
+    write_schedule(tmp_path, "20240201.csv", [
+        ("D1", "construction", "S1", "2024-01-01", "2024-03-01"),
+    ])
+    schedule_history = history.update_schedule_history(tmp_path, (".csv",), max_workers=1)
+    d1_versions = schedule_history.get_designation_versions("D1", task_type="Construction")
+    assert d1_versions == [
+        history.TaskVersion("20240101", 240101, 240201),
+        history.TaskVersion("20240201", 240101, 240301),
+    ]
+    assert schedule_history.get_designation_versions("D2") == [
+        history.TaskVersion("20240101", 240101, 240201),
+        history.TaskVersion("20240201", None, None),
+    ]
+    assert schedule_history.get_sheet_number_versions("S1") == d1_versions
+    assert history.get_task_version_on(d1_versions, "20231231") is None
+    assert history.get_task_version_on(d1_versions, "20240120").end_date == 240201
+    assert history.get_task_moves(d1_versions) == [tuple(d1_versions)]
+    assert history.read_schedule_history(tmp_path).to_json() == schedule_history.to_json()
+
+
+def test_history_ingests_new_files_only(tmp_path, capsys):
+    write_schedule(tmp_path, "20240101.csv", [("D1", "Construction", "", "2024-01-01", "2024-02-01")])
+    history.update_schedule_history(tmp_path, (".csv",), max_workers=1)
+    write_schedule(tmp_path, "20240201.csv", [("D1", "Construction", "", "2024-01-01", "2024-02-01")])
+    capsys.readouterr()
+    schedule_history = history.update_schedule_history(tmp_path, (".csv",), max_workers=1)
+    output = capsys.readouterr().out
+    assert "20240201.csv" in output
+    assert "20240101.csv" not in output
+    assert len(schedule_history.get_designation_versions("D1")) == 1
+
+
+def test_history_rejects_older_schedule(tmp_path):
+    schedule_path = write_schedule(tmp_path, "20240201.csv", [])
+    schedule_history = history.ScheduleHistory()
+    schedule_history.add_schedule("20240201", [], schedule_path)
+    with pytest.raises(ValueError):
+        schedule_history.add_schedule("20240101", [], tmp_path / "20240101.csv")
+
+
+def test_previous_file_within_lot(tmp_path):
+    for file_name in ("20240101_P1.mpp", "20240110_P1.mpp", "20240115_LOT2.mpp", "20240201_P1.mpp",
+                      "20240301_LOT2.mpp"):
+        (tmp_path / file_name).write_text("", encoding="utf-8")
+    get_previous = utils.get_previous_file_in_dir_by_iso_date_and_extension
+    assert get_previous(tmp_path, ".mpp", tmp_path / "20240201_P1.mpp").name == "20240110_P1.mpp"
+    assert get_previous(tmp_path, ".mpp", tmp_path / "20240301_LOT2.mpp").name == "20240115_LOT2.mpp"
+    assert get_previous(tmp_path, ".mpp", tmp_path / "20240115_LOT2.mpp") is None
+    assert get_previous(tmp_path, ".mpp", tmp_path / "20240101_P1.mpp") is None
+
+
+def test_history_keeps_lots_apart(tmp_path):
+    write_schedule(tmp_path, "20240101_P1.csv", [
+        ("D1", "Construction", "S1", "2024-01-01", "2024-02-01"),
+        ("D2", "Construction", "S2", "2024-01-01", "2024-02-01"),
+    ])
+    write_schedule(tmp_path, "20240115_LOT2.csv", [
+        ("D1", "Construction", "", "2024-05-01", "2024-06-01"),
+    ])
+    write_schedule(tmp_path, "20240201_P1.csv", [
+        ("D1", "Construction", "S1", "2024-01-01", "2024-03-01"),
+        ("D2", "Construction", "S2", "2024-01-01", "2024-02-01"),
+    ])
+    schedule_history = history.update_schedule_history(tmp_path, (".csv",), max_workers=1)
+    assert schedule_history.lots == ["", "LOT2"]
+    assert schedule_history.get_designation_versions("D1") == [
+        history.TaskVersion("20240101", 240101, 240201),
+        history.TaskVersion("20240201", 240101, 240301),
+    ]
+    # LOT2 does not list D2, which is no removal from the schedules without lot
+    assert schedule_history.get_designation_versions("D2") == [history.TaskVersion("20240101", 240101, 240201)]
+    assert schedule_history.get_designation_versions("D1", lot="LOT2") == [
+        history.TaskVersion("20240115", 240501, 240601),
+    ]
+    assert history.read_schedule_history(tmp_path).to_json() == schedule_history.to_json()
+
+
+def test_history_rebuilds_changed_lot_only(tmp_path, capsys):
+    write_schedule(tmp_path, "20240101.csv", [("D1", "Construction", "", "2024-01-01", "2024-02-01")])
+    write_schedule(tmp_path, "20240201_LOT2.csv", [("D1", "Construction", "", "2024-05-01", "2024-06-01")])
+    history.update_schedule_history(tmp_path, (".csv",), max_workers=1)
+    capsys.readouterr()
+    write_schedule(tmp_path, "20240102_LOT2.csv", [("D1", "Construction", "", "2024-04-01", "2024-06-01")])
+    schedule_history = history.update_schedule_history(tmp_path, (".csv",), max_workers=1)
+    output = capsys.readouterr().out
+    assert "rebuilding schedule history of lot 'LOT2' from 2 files" in output
+    assert "lot ''" not in output
+    assert [version.iso_date for version in schedule_history.get_designation_versions("D1", lot="LOT2")] == [
+        "20240102", "20240201",
+    ]
+    assert [version.iso_date for version in schedule_history.get_designation_versions("D1")] == ["20240101"]
+
+    (tmp_path / "20240102_LOT2.csv").unlink()
+    (tmp_path / "20240201_LOT2.csv").unlink()
+    schedule_history = history.update_schedule_history(tmp_path, (".csv",), max_workers=1)
+    assert schedule_history.lots == [""]
+    assert schedule_history.get_designation_versions("D1", lot="LOT2") == []
+
+
+def test_merged_task_index(tmp_path):
+    write_schedule(tmp_path, "20240101.csv", [
+        ("D1", "Construction", "S1", "2024-01-01", "2024-02-01"),
+        ("D2", "Construction", "S2", "2024-01-01", "2024-02-01"),
+    ])
+    write_schedule(tmp_path, "20240201_LOT2.csv", [
+        ("D1", "Construction", "S1", "2024-01-01", "2024-03-01"),
+        ("D2", "Construction", "S2", "2024-01-01", "2024-02-01"),
+    ])
+    task_index = mpp.read_merged_task_index(tmp_path, (".csv",), max_workers=1)
+    assert task_index.lots == ["", "LOT2"]
+    assert task_index.get_task("construction", "D1").end_date == 240301
+    assert [(conflict.key_type, conflict.key, conflict.kept_lot) for conflict in task_index.conflicts] == [
+        ("task_type_designation", ("construction", "D1"), "LOT2"),
+        ("sheet_number", "S1", "LOT2"),
+    ]
+    task_index = mpp.read_merged_task_index(tmp_path, (".csv",), rule="priority", lot_priority=("",), max_workers=1)
+    assert task_index.get_task("construction", "D1").end_date == 240201
+
+
+def test_schedule_ingests_stream_in_date_order_with_bounded_look_ahead(tmp_path):
+    dated_paths = RecordingList(write_xml_schedules(tmp_path, 5))
+    consumed_by_ingest = []
+    ingests = []
+    for ingest in mpp.iter_schedule_ingests(dated_paths, 2, None, True):
+        consumed_by_ingest.append(dated_paths.consumed)
+        ingests.append(ingest)
+    assert [ingest.iso_date for ingest in ingests] == ["20240101", "20240201", "20240301", "20240401", "20240501"]
+    assert [len(ingest.tasks) for ingest in ingests] == [3, 5, 7, 9, 11]
+    # the file being yielded plus at most max_workers files ahead
+    assert consumed_by_ingest == [3, 4, 5, 5, 5]
+    assert not any(ingest.cached for ingest in ingests)
+
+
+def test_schedule_ingests_reuse_cache(tmp_path):
+    dated_paths = write_xml_schedules(tmp_path, 3)
+    parsed = list(mpp.iter_schedule_ingests(dated_paths, 2, None, True))
+    cached = list(mpp.iter_schedule_ingests(dated_paths, 2, None, True))
+    assert [ingest.cached for ingest in cached] == [True, True, True]
+    assert [ingest.tasks for ingest in cached] == [ingest.tasks for ingest in parsed]
+    uncached = list(mpp.iter_schedule_ingests(dated_paths, 1, None, False))
+    assert [ingest.cached for ingest in uncached] == [False, False, False]
+    assert list(mpp.iter_schedule_ingests([], 2, None, True)) == []
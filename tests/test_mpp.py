@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import random
+
+from vrph import benchmark, mpp
+
+
+class StrOnlyDate(object):
+    """
+    A date as IKVM exposes a java LocalDateTime: toString() only reachable via str().
+    """
+    def __init__(self, text):
+        self.text = text
+
+    def ToString(self):
+        return self.text
+
+    def __str__(self):
+        return self.text
+
+
+def test_task_fields_follow_text_field_numbers():
+    assert mpp.TASK_TEXT_FIELD_NAMES == tuple(
+        mpp.TASK_FIELD_NAME_BY_ID[number] for number in sorted(mpp.TASK_FIELD_NAME_BY_ID)
+    )
+    assert mpp.Task._fields[4:-2] == mpp.TASK_TEXT_FIELD_NAMES
+    for getters in (mpp.MPXJ_FIELD_GETTERS, mpp.MSPDI_FIELD_GETTERS):
+        assert set(mpp.Task._fields) <= set(getters)
+    assert set(mpp.TASK_TEXT_FIELD_NAMES) <= set(mpp.TaskTable.STRING_FIELDS)
+
+
+def test_bulk_conversion_matches_per_task():
+    fake_tasks = benchmark.get_fake_mpxj_tasks(50)
+    getters = mpp.DETACHED_MPXJ_FIELD_GETTERS
+    assert mpp.convert_tasks_bulk(fake_tasks, getters=getters) == [
+        mpp.convert_mpxj_task_to_task(task, detached=True) for task in fake_tasks
+    ]
+    assert mpp.convert_tasks_bulk(fake_tasks, mpp.SheetInfo._fields, getters, mpp.SheetInfo) == [
+        mpp.convert_mpxj_task_to_sheet_info(task, detached=True) for task in fake_tasks
+    ]
+
+
+def test_bulk_conversion_calls_aliased_getters_once():
+    fake_tasks = benchmark.get_fake_mpxj_tasks(20)
+    getters = mpp.DETACHED_MPXJ_FIELD_GETTERS
+    assert getters["name"] is getters["sheet_name"]
+    fields = ("name", "sheet_name")
+    _, bulk_calls = mpp.count_native_calls(
+        lambda tasks: mpp.convert_tasks_bulk(tasks, fields, getters, row_type=lambda *values: values), fake_tasks,
+    )
+    assert bulk_calls == 1
+
+
+def test_extract_task_columns():
+    fake_tasks = benchmark.get_fake_mpxj_tasks(10)
+    columns = mpp.extract_task_columns(fake_tasks, ("unique_id", "designation"))
+    assert list(columns) == ["unique_id", "designation"]
+    assert columns["unique_id"] == [task.getUniqueID().intValue() for task in fake_tasks]
+    assert len(columns["designation"]) == 10
+    assert mpp.extract_task_columns([], ("unique_id",)) == {"unique_id": []}
+
+
+def test_date_conversion_uses_str():
+    assert mpp.get_date_truncated_iso_short(StrOnlyDate("2024-02-01T08:00")) == 240201
+    assert mpp.get_date_truncated_iso_short(None) == ""
+    converted = mpp.convert_dates_truncated_iso_short([StrOnlyDate("2023-12-31T17:00"), None, "2024-01-15"])
+    assert list(converted) == [231231, 0, 240115]
+
+
+def test_task_index_folds_task_type_accents_and_case(make_task):
+    demolition = make_task("D001", 240101, 240201, task_type="Démolition ")
+    construction = make_task("D001", 240301, 240401, unique_id=2)
+    task_index = mpp.TaskIndex([demolition, construction])
+    assert mpp.get_normalized_task_type("DÈMOLITION") == "demolition"
+    assert task_index.get_task("demolition", "D001") is demolition
+    assert task_index.get_task("DEMOLITION", "D001") is demolition
+    assert task_index.get_task("Construction", "D001") is construction
+    assert task_index.get_tasks_by_designation("D001") == [demolition, construction]
+    assert task_index.duplicates == []
+
+
+def test_task_index_reports_duplicate_keys(make_task, capsys):
+    first = make_task("D001", 240101, 240201, sheet_number="S1", unique_id=1)
+    second = make_task("D001", 240301, 240401, task_type="construction", sheet_number="S1", unique_id=2)
+    other = make_task("D002", 240101, 240201, sheet_number="S2", unique_id=3)
+    task_index = mpp.TaskIndex([first, second, other, make_task("", unique_id=4)])
+    # the last task wins, as reading into a dict would
+    assert task_index.get_task("Construction", "D001") is second
+    assert task_index.get_task_by_sheet_number("S1") is second
+    assert task_index.duplicates == [
+        mpp.DuplicateKey("task_type_designation", ("construction", "D001"), [first, second]),
+        mpp.DuplicateKey("sheet_number", "S1", [first, second]),
+    ]
+    task_index.print_duplicates()
+    assert "2 tasks share sheet_number S1, using the last one: 1, 2" in capsys.readouterr().out
+    assert task_index.designations == ["D001", "D002"]
+
+
+def test_interval_index_matches_scan(make_task):
+    rng = random.Random(7)
+    tasks = []
+    for i in range(500):
+        start = 200101 + rng.randrange(0, 40000)
+        tasks.append(make_task("D{}".format(i), start, start + rng.randrange(0, 3000)))
+    tasks.append(make_task("undated", 0, ""))
+    interval_index = mpp.TaskIntervalIndex(tasks)
+    assert len(interval_index) == 500
+    for _ in range(50):
+        window_start = 200101 + rng.randrange(0, 40000)
+        window_end = window_start + rng.randrange(0, 2000)
+        found = {task.designation for task in interval_index.overlapping(window_start, window_end)}
+        expected = {
+            task.designation for task in tasks[:500]
+            if task.start_date <= window_end and task.end_date >= window_start
+        }
+        assert found == expected
+        assert {task.designation for task in interval_index.ended_before(window_start)} == {
+            task.designation for task in tasks[:500] if task.end_date < window_start
+        }
+        assert {task.designation for task in interval_index.starting_after(window_end)} == {
+            task.designation for task in tasks[:500] if task.start_date > window_end
+        }
+
+
+def test_preview_designation_states(make_task):
+    tasks = [
+        make_task("built", 230101, 230301),
+        make_task("existing", 190101, 190301),
+        make_task("building", 240101, 240601),
+        make_task("planned", 250101, 250601),
+        make_task("built", 240201, 240301, task_type="Démolition"),
+    ]
+    states = mpp.preview_designation_states(mpp.TaskIntervalIndex(tasks), 240201, 240401, project_start=200101)
+    assert states == {
+        "built": "being_demolished",
+        "existing": "existing",
+        "building": "under_construction",
+        "planned": "not_yet_constructed",
+    }
+
+
+def test_designation_trie_most_specific_match():
+    trie = mpp.DesignationTrie((pattern, pattern) for pattern in ("D0*", "D?01", "D00?", "D00*", "D001"))
+    assert len(trie) == 5
+    assert trie.match("D001") == ("D001", "D001")
+    assert trie.match("D002") == ("D00?", "D00?")
+    assert trie.match("D0023") == ("D00*", "D00*")
+    assert trie.match("D101") == ("D?01", "D?01")
+    assert trie.match("D0") == ("D0*", "D0*")
+    assert trie.match("E001") is None
+
+
+def test_designation_trie_inner_star_is_literal():
+    trie = mpp.DesignationTrie([("A*B", 1), ("A?", 2)])
+    assert trie.match("A*B") == ("A*B", 1)
+    assert trie.match("AXB") is None
+    assert trie.match("AX") == ("A?", 2)
+
+
+def test_designation_trie_replaces_equal_pattern():
+    trie = mpp.DesignationTrie([("Z1-*", 1), ("Z1-*", 2)])
+    assert len(trie) == 1
+    assert trie.match("Z1-101") == ("Z1-*", 2)
+
+
+def test_task_index_matches_patterns(make_task):
+    exact = make_task("GLS-Z1-101", 240101, 240201)
+    pattern = make_task("GLS-Z1*", 240301, 240401, unique_id=2)
+    task_index = mpp.TaskIndex([exact, pattern])
+    assert task_index.match_task("construction", "GLS-Z1-101") is exact
+    assert task_index.match_task("Construction", "GLS-Z1-102") is pattern
+    assert task_index.match_task("construction", "GLS-Z2-101") is None
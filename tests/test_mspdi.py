@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import tracemalloc
+
+from vrph import mpp, mspdi
+
+
+def write_xml(xml_path, tasks_xml):
+    xml_path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Project xmlns="{}"><Name>p</Name><Tasks>{}</Tasks>'
+        "<Resources><Resource><UID>1</UID><Name>r</Name></Resource></Resources></Project>".format(
+            mspdi.MSPDI_NAMESPACE, tasks_xml,
+        ),
+        encoding="utf-8",
+    )
+    return xml_path
+
+
+def test_extended_attributes(tmp_path):
+    xml_path = write_xml(tmp_path / "20240101.xml", (
+        "<Task><UID>5</UID><ID>2</ID><Name>Aushub</Name>"
+        "<Start>2024-02-01T08:00:00</Start><Finish>2024-03-15T17:00:00</Finish>"
+        "<ExtendedAttribute><FieldID>188743731</FieldID><Value>GLS-Z1*</Value></ExtendedAttribute>"
+        "<ExtendedAttribute><FieldID>188743734</FieldID><Value>Démolition</Value></ExtendedAttribute>"
+        "<ExtendedAttribute><FieldID>188743997</FieldID><Value>Z01</Value></ExtendedAttribute>"
+        "<ExtendedAttribute><FieldID>188743740</FieldID><Value></Value></ExtendedAttribute>"
+        "<ExtendedAttribute><FieldID>1</FieldID><Value>unmapped</Value></ExtendedAttribute>"
+        "</Task>"
+    ))
+    (task,) = mspdi.iter_mspdi_tasks(xml_path)
+    assert task == mspdi.MspdiTask(5, 2, "Aushub", 240201, 240315, {1: "GLS-Z1*", 2: "Démolition", 11: "Z01"})
+    (converted,) = mpp.iter_tasks(xml_path, "mspdi")
+    assert (converted.designation, converted.task_type, converted.zone_name, converted.sheet_number) == (
+        "GLS-Z1*", "Démolition", "Z01", "",
+    )
+
+
+def test_tasks_without_dates(tmp_path):
+    xml_path = write_xml(tmp_path / "20240101.xml", (
+        "<Task><UID>0</UID><ID>0</ID><Name>project summary</Name></Task>"
+        "<Task><UID>1</UID><ID>1</ID><Name>milestone</Name><Start>2024-02-01T08:00:00</Start><Finish/></Task>"
+    ))
+    tasks = list(mpp.iter_tasks(xml_path, "mspdi"))
+    assert [(task.name, task.start_date, task.end_date, task.id) for task in tasks] == [
+        ("project summary", "", "", -1),
+        ("milestone", 240201, "", 1),
+    ]
+
+
+def get_streaming_peak_bytes(xml_path):
+    mspdi._truncated_iso_short_by_date_text.clear()
+    tracemalloc.start()
+    try:
+        task_count = sum(1 for _ in mspdi.iter_mspdi_tasks(xml_path))
+        return task_count, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_large_fixture_streams_with_flat_memory(tmp_path):
+    small_path = mspdi.write_mspdi_fixture(tmp_path / "small.xml", 5000)
+    large_path = mspdi.write_mspdi_fixture(tmp_path / "large.xml", 20000)
+    small_count, small_peak = get_streaming_peak_bytes(small_path)
+    large_count, large_peak = get_streaming_peak_bytes(large_path)
+    assert (small_count, large_count) == (5000, 20000)
+    # four times the tasks, the peak only grows by the date memo, not with the task count
+    assert large_peak < small_peak * 2
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+vrph.param on fake Revit API modules, param imports the Revit API at module level.
+"""
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class StorageType(object):
+    String = "String"
+    Integer = "Integer"
+    Double = "Double"
+    ElementId = "ElementId"
+
+
+class ElementId(object):
+    def __init__(self, integer_value):
+        self.IntegerValue = integer_value
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class BuiltInParameter(object):
+    def __getattr__(self, name):
+        return name
+
+
+class Parameter(object):
+    def __init__(self, storage_type, value=None, is_read_only=False):
+        self.StorageType = storage_type
+        self.value = value
+        self.IsReadOnly = is_read_only
+        self.set_values = []
+
+    @property
+    def HasValue(self):
+        return self.value is not None
+
+    def AsString(self):
+        return self.value
+
+    def AsInteger(self):
+        return self.value or 0
+
+    def AsDouble(self):
+        return self.value or 0.0
+
+    def AsElementId(self):
+        return self.value or ElementId.InvalidElementId
+
+    def Set(self, value):
+        self.set_values.append(value)
+        self.value = value
+
+
+class Definition(object):
+    def __init__(self, name, definition_id):
+        self.Name = name
+        self.Id = ElementId(definition_id)
+
+
+class Category(object):
+    def __init__(self, category_id, name):
+        self.Id = ElementId(category_id)
+        self.Name = name
+
+
+WALLS = Category(-2000011, "Walls")
+DOORS = Category(-2000023, "Doors")
+SHEETS = Category(-2003100, "Sheets")
+
+
+class Binding(object):
+    def __init__(self, kind, categories):
+        self.kind = kind
+        self.Categories = list(categories)
+
+    def GetType(self):
+        return types.SimpleNamespace(Name=self.kind)
+
+
+class BindingIterator(object):
+    def __init__(self, items):
+        self.items = items
+        self.position = -1
+
+    def Reset(self):
+        self.position = -1
+
+    def MoveNext(self):
+        self.position += 1
+        return self.position < len(self.items)
+
+    @property
+    def Key(self):
+        return self.items[self.position][0]
+
+    @property
+    def Current(self):
+        return self.items[self.position][1]
+
+
+class BindingMap(object):
+    def __init__(self, document):
+        self.document = document
+
+    @property
+    def Size(self):
+        return len(self.document.bindings)
+
+    def ForwardIterator(self):
+        self.document.iterated_count += 1
+        return BindingIterator(self.document.bindings)
+
+
+class Event(object):
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def fire(self, args):
+        for handler in self.handlers:
+            handler(None, args)
+
+
+class Document(object):
+    def __init__(self, bindings=(), title="project"):
+        self.bindings = list(bindings)
+        self.iterated_count = 0
+        self.PathName = ""
+        self.Title = title
+        self.Application = types.SimpleNamespace(
+            VersionNumber="2024", DocumentChanged=Event(), DocumentOpened=Event(),
+        )
+        self.ParameterBindings = BindingMap(self)
+
+    def change(self):
+        self.Application.DocumentChanged.fire(types.SimpleNamespace(GetDocument=lambda: self))
+
+
+class Element(object):
+    def __init__(self, element_id, param_by_name):
+        self.Id = ElementId(element_id)
+        self.param_by_name = param_by_name
+        self.lookup_count = 0
+
+    def get_Parameter(self, definition):
+        return self.param_by_name.get(definition.Name)
+
+    def LookupParameter(self, name):
+        self.lookup_count += 1
+        return self.param_by_name.get(name)
+
+
+def get_fake_revit_modules():
+    revit_db = types.ModuleType("Autodesk.Revit.DB")
+    revit_db.BuiltInParameter = BuiltInParameter()
+    revit_db.StorageType = StorageType
+    revit_db.Parameter = Parameter
+    revit_db.ElementId = ElementId
+    system = types.ModuleType("System")
+    system.Convert = types.SimpleNamespace(ToString=str, ToInt32=int, ToDouble=float)
+    pyrevit_revit = types.ModuleType("pyrevit.revit")
+    pyrevit_revit.doc = Document()
+    return {
+        "Autodesk": types.ModuleType("Autodesk"),
+        "Autodesk.Revit": types.ModuleType("Autodesk.Revit"),
+        "Autodesk.Revit.DB": revit_db,
+        "System": system,
+        "pyrevit": types.ModuleType("pyrevit"),
+        "pyrevit.revit": pyrevit_revit,
+    }
+
+
+@pytest.fixture
+def param(monkeypatch):
+    for name, module in get_fake_revit_modules().items():
+        monkeypatch.setitem(sys.modules, name, module)
+    import vrph
+    sys.modules.pop("vrph.param", None)
+    try:
+        yield importlib.import_module("vrph.param")
+    finally:
+        sys.modules.pop("vrph.param", None)
+        vrph.__dict__.pop("param", None)
+
+
+def get_designation_document():
+    return Document([
+        (Definition("designation", 1), Binding("InstanceBinding", [WALLS, DOORS, SHEETS])),
+        (Definition("start", 2), Binding("InstanceBinding", [WALLS, DOORS])),
+        (Definition("start", 3), Binding("TypeBinding", [SHEETS])),
+        (Definition("end", 4), Binding("InstanceBinding", [WALLS])),
+    ])
+
+
+def test_bindings_keyed_by_definition(param):
+    document = get_designation_document()
+    assert list(param.get_param_bindings(document)) == [1, 2, 3, 4]
+    start_bindings = param.get_param_bindings_by_name(document)["start"]
+    assert [binding.is_instance for binding in start_bindings] == [True, False]
+    entries = param.get_param_binding_entries_by_category_id(document)
+    assert [binding.definition.Id.IntegerValue for binding in entries[SHEETS.Id.IntegerValue]] == [1, 3]
+    # a same-name type binding does not hide the instance binding
+    param.doc.bindings = document.bindings
+    assert param.parameter_binding_exists("start", True, WALLS.Id.IntegerValue)
+    assert param.parameter_binding_exists("start", False, SHEETS.Id.IntegerValue)
+    assert not param.parameter_binding_exists("start", True, SHEETS.Id.IntegerValue)
+
+
+def test_categories_binding_all_params(param):
+    document = get_designation_document()
+    bound, skipped = param.get_categories_binding_all_params(["designation", "start", "end"], document=document)
+    assert bound == {WALLS.Id.IntegerValue: "Walls"}
+    assert skipped == {
+        "Doors": "end not bound",
+        "Sheets": "start not bound as instance, end not bound",
+    }
+
+
+def test_bindings_cached_until_document_changes(param):
+    document = get_designation_document()
+    param.get_param_bindings(document)
+    param.get_param_binding_entries_by_category_id(document)
+    param.get_categories_binding_all_params(["designation"], document=document)
+    assert document.iterated_count == 1
+    # rebinding to another category keeps the binding count, the change event invalidates
+    document.bindings[3][1].Categories.append(DOORS)
+    document.change()
+    assert "Doors" in param.get_categories_binding_all_params(["end"], document=document)[0].values()
+    assert document.iterated_count == 2
+    other_document = Document(document.bindings[:1], title="other")
+    assert list(param.get_param_bindings(other_document)) == [1]
+    assert len(document.Application.DocumentChanged.handlers) == 1
+    param.clear_param_bindings_cache()
+    param.get_param_bindings(document)
+    assert document.iterated_count == 3
+
+
+def test_write_param_comparisons(param):
+    writer = param.BulkParamWriter(Document())
+    assert writer.write_param(None, "x") == "missing"
+    assert writer.write_param(Parameter(StorageType.String, None), "") == "unchanged"
+    assert writer.write_param(Parameter(StorageType.String, "a"), None) == "written"
+    assert writer.write_param(Parameter(StorageType.String, "a"), 5) == "type_mismatch"
+    assert writer.write_param(Parameter(StorageType.Integer, 3), 3) == "unchanged"
+    assert writer.write_param(Parameter(StorageType.Integer, 3), "3") == "type_mismatch"
+    # an integer without value reads as 0, which must not count as equal
+    assert writer.write_param(Parameter(StorageType.Integer, None), 0) == "written"
+    assert writer.write_param(Parameter(StorageType.Double, 1.0), 1.0 + 1e-12) == "unchanged"
+    assert writer.write_param(Parameter(StorageType.Double, 1.0), 1) == "unchanged"
+    assert writer.write_param(Parameter(StorageType.Double, 1.0), 1.5) == "written"
+    assert writer.write_param(Parameter(StorageType.Double, 1.0), True) == "type_mismatch"
+    assert writer.write_param(Parameter(StorageType.ElementId, ElementId(5)), ElementId(5)) == "unchanged"
+    assert writer.write_param(Parameter(StorageType.ElementId, ElementId(5)), ElementId(6)) == "written"
+    assert writer.write_param(Parameter(StorageType.ElementId, ElementId(5)), 6) == "type_mismatch"
+    assert writer.write_param(Parameter(StorageType.String, "a", is_read_only=True), "b") == "read_only"
+    assert writer.write_param(Parameter(StorageType.String, "a", is_read_only=True), "a") == "unchanged"
+
+
+def test_write_param_sets_empty_string(param):
+    string_param = Parameter(StorageType.String, "a")
+    param.BulkParamWriter(Document()).write_param(string_param, None)
+    assert string_param.set_values == [""]
+
+
+def test_update_many_counts_and_warns_once(param, capsys):
+    document = Document([(Definition("designation", 1), Binding("InstanceBinding", [WALLS]))])
+    elements = [
+        Element(i, {
+            "designation": Parameter(StorageType.String, "D1" if i % 2 else "D0"),
+            "date": Parameter(StorageType.Integer, 240101),
+        })
+        for i in range(4)
+    ]
+    writer = param.BulkParamWriter(document)
+    counts = writer.update_many(
+        (element, {"designation": "D1", "date": 240101, "unbound": "x"}) for element in elements
+    )
+    assert dict(counts) == {"written": 2, "unchanged": 6, "missing": 4, "type_mismatch": 0, "read_only": 0}
+    assert writer.elements_written == 2
+    assert document.iterated_count == 1
+    # the bound designation is retrieved by definition, date and unbound by name
+    assert [element.lookup_count for element in elements] == [2, 2, 2, 2]
+    assert capsys.readouterr().out.count("WARNING: missing param unbound") == 1
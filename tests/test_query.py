@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from vrph import query
+
+
+def test_designation_rules_equals_and_prefix():
+    rules = query.get_designation_value_rules(["D001", "GLS-Z1*", "GLS-Z?-101", "D001"])
+    assert rules == (
+        query.ValueRule("begins_with", "GLS-Z"),
+        query.ValueRule("begins_with", "GLS-Z1"),
+        query.ValueRule("equals", "D001"),
+    )
+
+
+def test_designation_rules_any_value():
+    # None and a pattern without literal prefix both require any value, the has-value rule
+    assert query.get_designation_value_rules(None) == ()
+    assert query.get_designation_value_rules(["D001", "?01"]) == ()
+    assert query.get_designation_value_rules(["*"]) == ()
+    assert query.get_designation_query([-2000011, -2000001], "designation").value_rules == ()
+
+
+def test_designation_rules_cap(capsys):
+    designations = ["D{:04d}".format(i) for i in range(query.QUERY_MAX_VALUE_RULES)]
+    assert len(query.get_designation_value_rules(designations)) == query.QUERY_MAX_VALUE_RULES
+    assert query.get_designation_value_rules(designations + ["E0000"]) == ()
+    assert "201 designation rules exceed 200" in capsys.readouterr().out
+
+
+def test_value_matching_equals_versus_has_value():
+    equals = (query.ValueRule("equals", "D001"),)
+    assert query.is_value_matching("D001", equals)
+    assert not query.is_value_matching("D0011", equals)
+    assert query.is_value_matching("D0011", (query.ValueRule("begins_with", "D001"),))
+    assert query.is_value_matching("anything", ())
+    assert not query.is_value_matching("", ())
+    assert not query.is_value_matching(None, ())
+
+
+def test_fake_source_runs_query():
+    element_source = query.FakeElementSource()
+    wall = element_source.add_element(-2000011, {"designation": "D001"})
+    element_source.add_element(-2000011, {"designation": ""})
+    door = element_source.add_element(-2000023, {"designation": "GLS-Z1-101"})
+    element_source.add_element(-2000001, {"designation": "D001"})
+    any_query = query.get_designation_query([-2000011, -2000023], "designation")
+    # categories are sorted into the query
+    assert list(element_source.iter_element_ids(any_query)) == [door.Id, wall.Id]
+    pattern_query = query.get_designation_query([-2000011, -2000023], "designation", ["GLS-Z1*"])
+    assert list(element_source.iter_elements(pattern_query)) == [door]
+    assert element_source.element_retrieval_count == 1
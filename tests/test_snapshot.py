@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+
+import pytest
+
+from conftest import LIB_DIR
+from vrph import cli, mpp, mspdi, snapshot
+
+
+@pytest.fixture
+def schedule_tasks(tmp_path):
+    def get_texts(task_index):
+        texts = mspdi.get_fixture_texts(task_index)
+        # non ascii strings, longer in utf-8 bytes than in characters
+        texts[11] = ("Zürich", "Zone B", "Émosson", "Z€")[task_index % 4]
+        return texts
+
+    xml_path = mspdi.write_mspdi_fixture(tmp_path / "fixture.xml", 200, get_texts)
+    return mpp.read_tasks(xml_path, "mspdi", use_sidecar_cache=False, use_session_cache=False, verbose=False)
+
+
+def test_round_trip(tmp_path, schedule_tasks):
+    snapshot_path = snapshot.write_task_snapshot(tmp_path / "fixture.vrph_snapshot", schedule_tasks)
+    assert snapshot.is_task_snapshot(snapshot_path)
+    with snapshot.TaskSnapshot(snapshot_path) as task_snapshot:
+        assert len(task_snapshot) == len(schedule_tasks)
+        assert task_snapshot.to_tasks() == schedule_tasks
+        assert task_snapshot.column("zone_name") == [task.zone_name for task in schedule_tasks]
+        rows = task_snapshot.find_rows("designation", "D00003")
+        assert [row.unique_id for row in rows] == [7, 8]
+        assert task_snapshot.find_rows("designation", "unknown") == []
+
+
+def test_string_codes_bisect(tmp_path, schedule_tasks):
+    snapshot_path = snapshot.write_task_snapshot(tmp_path / "fixture.vrph_snapshot", schedule_tasks)
+    with snapshot.TaskSnapshot(snapshot_path) as task_snapshot:
+        strings = task_snapshot.strings
+        for code in range(len(strings)):
+            assert strings.get_code(strings.get_string(code)) == code
+        assert strings.get_string(0) == ""
+        assert strings.get_code("not in the schedule") == -1
+        assert strings.get_code(None) == -1
+
+
+def test_close_with_live_views(tmp_path, schedule_tasks):
+    snapshot_path = snapshot.write_task_snapshot(tmp_path / "fixture.vrph_snapshot", schedule_tasks)
+    task_snapshot = snapshot.TaskSnapshot(snapshot_path)
+    sliced = task_snapshot[10:20]
+    assert [row.unique_id for row in sliced] == list(range(11, 21))
+    codes = task_snapshot.codes("designation")
+    assert len(codes) == len(schedule_tasks)
+    task_snapshot.close()
+    assert task_snapshot.closed
+    assert sliced.closed
+    task_snapshot.close()
+
+
+def test_round_trip_big_endian(tmp_path, schedule_tasks, monkeypatch):
+    monkeypatch.setattr(sys, "byteorder", "big" if sys.byteorder == "little" else "little")
+    snapshot_path = snapshot.write_task_snapshot(tmp_path / "fixture.vrph_snapshot", schedule_tasks)
+    with snapshot.TaskSnapshot(snapshot_path) as task_snapshot:
+        assert task_snapshot.to_tasks() == schedule_tasks
+
+
+def test_open_task_table(tmp_path, schedule_tasks):
+    xml_path = tmp_path / "fixture.xml"
+    snapshot_path = snapshot.export_task_snapshot(xml_path, backend="mspdi")
+    assert str(snapshot_path).endswith(snapshot.SNAPSHOT_SUFFIX)
+    task_table = snapshot.open_task_table(xml_path, "mspdi")
+    assert not isinstance(task_table, snapshot.TaskSnapshot)
+    task_snapshot = snapshot.open_task_table(snapshot_path)
+    assert isinstance(task_snapshot, snapshot.TaskSnapshot)
+    assert task_snapshot.to_tasks() == task_table.to_tasks()
+    task_snapshot.close()
+
+
+def test_cli(tmp_path, schedule_tasks, capsys):
+    xml_path = tmp_path / "fixture.xml"
+    assert cli.main(["--backend", "mspdi", "export", str(xml_path)]) == 0
+    snapshot_path = "{}{}".format(xml_path, snapshot.SNAPSHOT_SUFFIX)
+    capsys.readouterr()
+    assert cli.main(["query", snapshot_path, "D00003", "--fields", "unique_id,designation"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["unique_id\tdesignation", "7\tD00003", "8\tD00003", "2 rows"]
+    assert cli.main(["stats", snapshot_path]) == 0
+    assert "rows:         200" in capsys.readouterr().out
+
+
+def test_mpp_module_runs_cli(tmp_path, schedule_tasks):
+    xml_path = tmp_path / "fixture.xml"
+    completed = subprocess.run(
+        [sys.executable, "-m", "vrph.mpp", "--backend", "mspdi", "dump", str(xml_path), "--limit", "2",
+         "--fields", "id,designation"],
+        cwd=str(LIB_DIR), stdout=subprocess.PIPE, universal_newlines=True,
+    )
+    assert completed.returncode == 0
+    assert completed.stdout.splitlines()[-3:] == ["id\tdesignation", "1\tD00000", "2\tD00000"]
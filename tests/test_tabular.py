@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import json
+
+from vrph import benchmark, mpp, mspdi, tabular, utils
+
+
+def read_tasks(path, backend):
+    return mpp.read_tasks(path, backend, use_sidecar_cache=False, use_session_cache=False, verbose=False)
+
+
+def touch(directory, *file_names):
+    for file_name in file_names:
+        (directory / file_name).write_text("", encoding="utf-8")
+
+
+def test_date_texts():
+    assert tabular.get_date_truncated_iso_short("2023-12-31") == 231231
+    assert tabular.get_date_truncated_iso_short("31.12.2023") == 231231
+    assert tabular.get_date_truncated_iso_short("1.2.2024") == 240201
+    assert tabular.get_date_truncated_iso_short("01.02.2024 08:00") == 240201
+    assert tabular.get_date_truncated_iso_short("") == ""
+    assert tabular.get_date_truncated_iso_short(None) == ""
+
+
+def test_unparseable_date_texts_are_skipped(capsys):
+    for date_text in ("tbd", "1.x.2024", "31.13.2024", "2024/01/31", "2024-01"):
+        assert tabular.get_date_truncated_iso_short(date_text) == ""
+    assert mspdi.get_date_truncated_iso_short("soon") == ""
+    assert mspdi.get_date_truncated_iso_short("soon") == ""
+    output = capsys.readouterr().out
+    assert output.count("WARNING: skipped unparseable date: 'soon'") == 1
+    assert "'1.x.2024'" in output
+
+
+def test_record_ints_are_parsed_defensively(capsys):
+    get_id = mpp.RECORD_FIELD_GETTERS["id"]
+    get_unique_id = mpp.RECORD_FIELD_GETTERS["unique_id"]
+    assert get_id({"id": "12"}) == 12
+    assert get_id({"id": "12.0"}) == 12
+    assert get_id({"id": ""}) == -1
+    assert get_unique_id({"unique_id": " 7 "}) == 7
+    assert get_unique_id({"unique_id": "7.5", "name": "Aushub"}) == 0
+    assert get_unique_id({"unique_id": "n/a"}) == 0
+    output = capsys.readouterr().out
+    assert "WARNING: skipped unparseable unique_id '7.5' of task 'Aushub'" in output
+    assert "'n/a'" in output
+
+
+def test_csv_records(tmp_path):
+    csv_path = tmp_path / "20240101.csv"
+    csv_path.write_text(
+        "Vorgang;Kennung;Anfang;Ende;Nr\n"
+        "Aushub;D001;1.2.2024;15.3.2024;1.0\n"
+        "\n"
+        "Rohbau;D002;2024-03-16;;2\n"
+        "Dach;D003;offen;1.4.2024;x\n",
+        encoding="utf-8",
+    )
+    column_by_field = {
+        "name": "Vorgang", "designation": "Kennung", "start_date": "Anfang", "end_date": "Ende", "unique_id": "Nr",
+    }
+    records = list(tabular.iter_csv_records(csv_path, column_by_field))
+    assert records[:2] == [
+        {"name": "Aushub", "designation": "D001", "start_date": "1.2.2024", "end_date": "15.3.2024", "unique_id": "1.0"},
+        {"name": "Rohbau", "designation": "D002", "start_date": "2024-03-16", "end_date": "", "unique_id": "2"},
+    ]
+    source = mpp.CsvSource(column_by_field)
+    tasks = list(mpp.project_tasks(
+        source.get_source_tasks(csv_path),
+        ("designation", "start_date", "end_date", "unique_id"),
+        getters=source.get_field_getters(),
+    ))
+    # a bad cell skips that value, not the row or the file
+    assert [tuple(task) for task in tasks] == [
+        ("D001", 240201, 240315, 1),
+        ("D002", 240316, "", 2),
+        ("D003", "", 240401, 0),
+    ]
+
+
+def test_jsonl_records_as_text(tmp_path):
+    jsonl_path = tmp_path / "20240101.jsonl"
+    rows = [
+        {"designation": 12, "name": "Aushub", "start_date": "1.2.2024", "zone_name": None, "unique_id": 12.0},
+        {"designation": "D002", "name": "Rohbau", "sheet_number": 4.5},
+    ]
+    jsonl_path.write_text("\n".join(json.dumps(row) for row in rows) + "\n\n", encoding="utf-8")
+    column_by_field = {
+        name: name for name in ("designation", "name", "start_date", "zone_name", "sheet_number", "unique_id")
+    }
+    records = list(tabular.iter_jsonl_records(jsonl_path, column_by_field))
+    assert records[0] == {
+        "designation": "12", "name": "Aushub", "start_date": "1.2.2024", "zone_name": "", "unique_id": "12.0",
+    }
+    assert records[1] == {"designation": "D002", "name": "Rohbau", "sheet_number": "4.5"}
+    tasks = read_tasks(jsonl_path, "jsonl")
+    assert tasks[0].designation == "12"
+    assert tasks[0].start_date == 240201
+    assert tasks[0].zone_name == ""
+    assert tasks[0].unique_id == 12
+
+
+def test_fixture_sources_read_equal(tmp_path):
+    columns = list(mpp.DEFAULT_COLUMN_BY_FIELD.values())
+    xml_path = tmp_path / "fixture.xml"
+    mspdi.write_mspdi_fixture(xml_path, 60)
+    csv_path = tabular.write_csv_fixture(tmp_path / "fixture.csv", benchmark.get_fixture_records(60), columns)
+    jsonl_path = tabular.write_jsonl_fixture(tmp_path / "fixture.jsonl", benchmark.get_fixture_records(60))
+    xml_tasks = read_tasks(xml_path, "mspdi")
+    assert len(xml_tasks) == 60
+    assert read_tasks(csv_path, "csv") == xml_tasks
+    assert read_tasks(jsonl_path, "jsonl") == xml_tasks
+    mpxj_tasks = [mpp.convert_mpxj_task_to_task(task, detached=True) for task in benchmark.get_fake_mpxj_tasks(60)]
+    assert mpxj_tasks == xml_tasks
+
+
+def test_extension_precedence(tmp_path):
+    assert mpp.get_schedule_extensions()[:5] == (".mpp", ".mpx", ".xml", ".csv", ".jsonl")
+    touch(tmp_path, "20240101.xml", "20240101.mpp", "20240201.csv", "20240201_b.csv", "20240301.jsonl", "notes.mpp")
+    path_by_iso_date = utils.get_files_in_dir_by_iso_date_and_extension(tmp_path)
+    assert {iso_date: path.name for iso_date, path in path_by_iso_date.items()} == {
+        "20240101": "20240101.mpp",
+        "20240201": "20240201_b.csv",
+        "20240301": "20240301.jsonl",
+    }
+    path_by_iso_date = utils.get_files_in_dir_by_iso_date_and_extension(tmp_path, (".xml", ".mpp"))
+    assert path_by_iso_date["20240101"].name == "20240101.xml"
+    assert list(path_by_iso_date) == ["20240101"]
+    assert utils.get_latest_file_in_dir_by_iso_date_and_extension(tmp_path, ".mpp").name == "20240101.mpp"